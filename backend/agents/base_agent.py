@@ -7,6 +7,7 @@ from typing import Dict, Any
 from abc import ABC, abstractmethod
 
 from backend.agents.state import AgentState
+from backend.services.telemetry import NodeSpan, span_intent
 
 logger = logging.getLogger(__name__)
 
@@ -47,7 +48,10 @@ class BaseAgent(ABC):
 
     async def __call__(self, state: AgentState) -> AgentState:
         """
-        Wrapper for execute() with error handling and logging.
+        Wrapper for execute() with error handling, logging and a timing span.
+
+        Wall time and OpenAI token usage of the agent are added to the
+        returned updates (node_timings, token_usage, total_tokens_used).
 
         Args:
             state: Current agent state
@@ -57,6 +61,22 @@ class BaseAgent(ABC):
         """
         self.logger.info(f"🤖 {self.name} agent starting...")
 
+        span = NodeSpan(self.name)
+        with span:
+            result = await self._execute_safely(state)
+
+        return {**result, **span.finish(span_intent(state, result))}
+
+    async def _execute_safely(self, state: AgentState) -> AgentState:
+        """
+        Run execute() and convert exceptions into error state updates.
+
+        Args:
+            state: Current agent state
+
+        Returns:
+            Partial state updates
+        """
         try:
             # Execute agent logic
             new_state = await self.execute(state)
@@ -0,0 +1,126 @@
+"""
+Checkpointing for the research graph.
+
+Each request runs on its own LangGraph thread (session_id:request_id). The
+checkpointer persists state after every superstep, so a request that was
+interrupted (timeout, client disconnect, crash, node exception) can be
+resumed from the last completed node by retrying with the same request_id.
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from backend.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiringInMemorySaver(InMemorySaver):
+    """
+    In-memory checkpointer that forgets abandoned threads.
+
+    Completed runs delete their thread, but cancelled, crashed or abandoned
+    runs would otherwise keep their full state forever. Threads not written
+    to for `ttl` seconds are dropped, and at most `max_threads` are kept
+    (least recently written first), mirroring the Mongo checkpoint TTL.
+    """
+
+    def __init__(
+        self,
+        ttl: int = settings.graph_checkpoint_ttl_seconds,
+        max_threads: int = settings.graph_checkpoint_max_threads
+    ):
+        """
+        Initialize checkpointer.
+
+        Args:
+            ttl: Seconds a thread is kept after its last write
+            max_threads: Threads kept at most
+        """
+        super().__init__()
+        self.ttl = ttl
+        self.max_threads = max_threads
+        # {thread_id: last write time}, least recently written first
+        self._touched: "OrderedDict[str, float]" = OrderedDict()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        result = super().put(config, checkpoint, metadata, new_versions)
+        self._touch(config["configurable"]["thread_id"])
+        return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        super().put_writes(config, writes, task_id, task_path)
+        self._touch(config["configurable"]["thread_id"])
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        self._touched.pop(thread_id, None)
+
+    def _touch(self, thread_id: str):
+        """Record a write and drop expired or excess threads."""
+        now = time.time()
+        self._touched[thread_id] = now
+        self._touched.move_to_end(thread_id)
+
+        while self._touched:
+            oldest, written_at = next(iter(self._touched.items()))
+            if oldest == thread_id or (now - written_at <= self.ttl and len(self._touched) <= self.max_threads):
+                break
+            self.delete_thread(oldest)
+            logger.info(f"🧹 Dropped abandoned graph checkpoint thread {oldest}")
+
+
+def create_checkpointer(backend: str = settings.graph_checkpointer) -> Optional[Any]:
+    """
+    Create the graph checkpointer.
+
+    Args:
+        backend: "none", "memory" or "mongo" (needs langgraph-checkpoint-mongodb)
+
+    Returns:
+        Checkpoint saver, or None when checkpointing is disabled
+    """
+    if backend == "none":
+        return None
+
+    if backend == "mongo":
+        try:
+            from pymongo import MongoClient
+            from langgraph.checkpoint.mongodb import MongoDBSaver
+
+            saver = MongoDBSaver(
+                MongoClient(settings.mongodb_uri),
+                db_name=settings.mongodb_db_name,
+                ttl=settings.graph_checkpoint_ttl_seconds
+            )
+            logger.info("✅ Graph checkpointing: MongoDB")
+            return saver
+
+        except ImportError:
+            logger.warning(
+                "langgraph-checkpoint-mongodb not installed, "
+                "falling back to in-memory graph checkpointing"
+            )
+
+    elif backend != "memory":
+        raise ValueError(f"Unknown graph checkpointer: {backend}")
+
+    logger.info("✅ Graph checkpointing: in-memory")
+    return ExpiringInMemorySaver()
+
+
+def thread_config(session_id: str, request_id: str) -> Dict[str, Any]:
+    """
+    Build the LangGraph run config for a request.
+
+    Args:
+        session_id: Session identifier
+        request_id: Request identifier
+
+    Returns:
+        Config with thread_id = "session_id:request_id"
+    """
+    return {"configurable": {"thread_id": f"{session_id}:{request_id}"}}
@@ -3,6 +3,7 @@ Forward-Looking Agent - Fetches analyst consensus and price targets.
 Provides forward-looking guidance for investment decisions.
 """
 from typing import List
+import asyncio
 
 from backend.agents.base_agent import BaseAgent
 from backend.agents.state import AgentState, AnalystConsensus
@@ -37,26 +38,28 @@ class ForwardLookingAgent(BaseAgent):
             self.logger.warning("No tickers to fetch analyst data for")
             return state
 
-        # Fetch analyst data for each ticker
-        analyst_data_list = []
-
-        for ticker in tickers:
-            self.logger.info(f"Fetching analyst consensus for {ticker}")
+        # Fetch analyst data for all tickers concurrently (usually already
+        # cached by the router's prefetch)
+        self.logger.info(f"Fetching analyst consensus for {tickers}")
+        results = await asyncio.gather(
+            *(self._fetch_analyst_data(ticker) for ticker in tickers),
+            return_exceptions=True
+        )
 
-            try:
-                data = self._fetch_analyst_data(ticker)
-                if data:
-                    analyst_data_list.append(data)
-            except Exception as e:
-                self.logger.error(f"Failed to fetch analyst data for {ticker}: {e}")
+        analyst_data_list = []
+        for ticker, result in zip(tickers, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Failed to fetch analyst data for {ticker}: {result}")
                 # Continue with other tickers
+            elif result:
+                analyst_data_list.append(result)
 
         # Return only the fields we're updating (for parallel execution)
         return {
             "analyst_consensus": analyst_data_list
         }
 
-    def _fetch_analyst_data(self, ticker: str) -> AnalystConsensus:
+    async def _fetch_analyst_data(self, ticker: str) -> AnalystConsensus:
         """
         Fetch analyst consensus for a single ticker.
 
@@ -66,8 +69,8 @@ class ForwardLookingAgent(BaseAgent):
         Returns:
             AnalystConsensus dict or None
         """
-        # Get analyst recommendations from Yahoo Finance
-        analyst_data = self.yahoo.get_analyst_recommendations(ticker)
+        # Get analyst recommendations from Yahoo Finance (async with caching)
+        analyst_data = await self.yahoo.get_analyst_recommendations_async(ticker)
 
         if not analyst_data:
             self.logger.warning(f"No analyst data available for {ticker}")
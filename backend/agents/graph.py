@@ -1,22 +1,25 @@
 """
 LangGraph workflow definition for multi-agent research system.
 Uses LangGraph 1.0+ API with parallel execution support.
+
+The compiled graph (and the agent singletons it pulls in) is built on first
+use via get_research_graph(), so importing this module stays cheap.
 """
 import logging
+import threading
+import uuid
 from langgraph.graph import StateGraph
 from langgraph.constants import START, END
 from langgraph.types import Send
-from typing import Literal
+from typing import Literal, AsyncIterator, Tuple, Dict, Any, List, Optional
 
 from backend.agents.state import AgentState, create_initial_state
-from backend.agents.router_agent import router_agent
-from backend.agents.market_data_agent import market_data_agent
-from backend.agents.sentiment_agent import sentiment_agent
-from backend.agents.forward_looking_agent import forward_looking_agent
-from backend.agents.visualization_agent import visualization_agent
-from backend.agents.report_agent import report_agent
-from backend.rag.pipeline import rag_pipeline
+from backend.agents.checkpointing import create_checkpointer, thread_config
 from backend.memory.conversation import conversation_memory
+from backend.memory.write_behind import conversation_writer
+from backend.memory.working_set import session_working_set, AGENT_OUTPUTS
+from backend.services.telemetry import timed_node
+from backend.services.artifact_store import artifact_store
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +27,7 @@ logger = logging.getLogger(__name__)
 # Helper nodes for memory and RAG
 
 
+@timed_node("memory_loader")
 async def memory_loader(state: AgentState) -> AgentState:
     """
     Load conversation history from MongoDB.
@@ -37,6 +41,9 @@ async def memory_loader(state: AgentState) -> AgentState:
     session_id = state.get("session_id")
 
     try:
+        # Make sure the previous turn of this session has been persisted
+        await conversation_writer.wait_for_session(session_id)
+
         # Load conversation history (returns empty list if session doesn't exist)
         messages = await conversation_memory.get_conversation(session_id, limit=10)
 
@@ -53,6 +60,7 @@ async def memory_loader(state: AgentState) -> AgentState:
         return {}  # Return empty dict, no updates
 
 
+@timed_node("rag_retrieval")
 async def rag_retrieval(state: AgentState) -> AgentState:
     """
     Retrieve relevant documents from RAG pipeline.
@@ -73,6 +81,8 @@ async def rag_retrieval(state: AgentState) -> AgentState:
             "executed_agents": ["rag_retrieval"]
         }
 
+    from backend.rag.pipeline import rag_pipeline
+
     try:
         # Retrieve context with or without ticker
         # If tickers present, use first one for metadata filtering
@@ -125,10 +135,14 @@ async def rag_retrieval(state: AgentState) -> AgentState:
         }
 
 
+@timed_node("memory_saver")
 async def memory_saver(state: AgentState) -> AgentState:
     """
     Save final report to conversation history.
 
+    The write is queued on the write-behind worker, so the response is not
+    held up by MongoDB. User query and report go out in one batched upsert.
+
     Args:
         state: Current state with report
 
@@ -142,18 +156,16 @@ async def memory_saver(state: AgentState) -> AgentState:
         logger.warning("No report to save")
         return {}
 
-    try:
-        # Save user query
-        await conversation_memory.save_message(
-            session_id, "user", state.get("user_query", "")
-        )
+    # Keep this turn's tickers and agent outputs for follow-up questions
+    session_working_set.record(session_id, state)
 
-        # Save assistant response
-        await conversation_memory.save_message(
-            session_id, "assistant", report
-        )
+    try:
+        await conversation_writer.submit(session_id, [
+            {"role": "user", "content": state.get("user_query", "")},
+            {"role": "assistant", "content": report}
+        ])
 
-        logger.info(f"Saved conversation to session {session_id}")
+        logger.info(f"Queued conversation save for session {session_id}")
 
     except Exception as e:
         logger.error(f"Failed to save conversation: {e}")
@@ -164,21 +176,17 @@ async def memory_saver(state: AgentState) -> AgentState:
 # Router logic for parallel execution
 
 
-def route_to_agents(state: AgentState) -> list[Send]:
+def select_agents(state: AgentState) -> List[str]:
     """
-    Dynamic router that sends to multiple agents in parallel.
-
-    Uses LangGraph 1.0+ Send API for parallel execution.
-    Each agent should be sent to exactly once to avoid concurrent updates.
+    Decide which specialist agents the routing decision calls for.
 
     Args:
         state: Current state after router analysis
 
     Returns:
-        List of Send objects for parallel execution
+        Agent node names, in dispatch order, each at most once
     """
-    sends = []
-    sent_to = set()  # Track which agents we've already queued
+    agents = []
     tickers = state.get("tickers", [])
     has_tickers = bool(tickers)
 
@@ -189,32 +197,27 @@ def route_to_agents(state: AgentState) -> list[Send]:
 
     # 1. RAG retrieval - only if explicitly enabled by router
     if should_retrieve_context:
-        sends.append(Send("rag_retrieval", state))
-        sent_to.add("rag_retrieval")
+        agents.append("rag_retrieval")
         logger.debug("RAG retrieval: explicitly enabled by router")
     elif not has_tickers:
         # Fallback: if no tickers found, use RAG for semantic search
-        sends.append(Send("rag_retrieval", state))
-        sent_to.add("rag_retrieval")
+        agents.append("rag_retrieval")
         logger.debug("RAG retrieval: fallback (no tickers found)")
 
     # 2. Market data agent - only if has tickers and router enabled
     if should_fetch_market and has_tickers:
-        sends.append(Send("market_data", state))
-        sent_to.add("market_data")
+        agents.append("market_data")
         logger.debug("Market data agent: enabled by router")
 
     # 3. Sentiment agent - only if has tickers and router enabled
     if should_analyze_sentiment and has_tickers:
-        sends.append(Send("sentiment", state))
-        sent_to.add("sentiment")
+        agents.append("sentiment")
         logger.debug("Sentiment agent: enabled by router")
 
     # 4. Forward-looking agent - run if market data is being fetched
     #    (needs market data for analyst consensus and forward guidance)
     if should_fetch_market and has_tickers:
-        sends.append(Send("forward_looking", state))
-        sent_to.add("forward_looking")
+        agents.append("forward_looking")
         logger.debug("Forward-looking agent: enabled (market data requested)")
 
     # NOTE: visualization is NOT in parallel execution
@@ -224,19 +227,82 @@ def route_to_agents(state: AgentState) -> list[Send]:
     # default to comprehensive research (market + sentiment)
     if has_tickers and not should_fetch_market and not should_analyze_sentiment:
         logger.debug("No agents explicitly enabled, using fallback: market + sentiment")
-        if "market_data" not in sent_to:
-            sends.append(Send("market_data", state))
-            sent_to.add("market_data")
-        if "sentiment" not in sent_to:
-            sends.append(Send("sentiment", state))
-            sent_to.add("sentiment")
-        if "forward_looking" not in sent_to:
-            sends.append(Send("forward_looking", state))
-            sent_to.add("forward_looking")
+        for agent in ("market_data", "sentiment", "forward_looking"):
+            if agent not in agents:
+                agents.append(agent)
+
+    return agents
 
-    logger.info(f"Routing to {len(sent_to)} agents in parallel: {sent_to}")
 
-    return sends
+def route_to_agents(state: AgentState) -> list[Send]:
+    """
+    Dynamic router that sends to multiple agents in parallel.
+
+    Uses LangGraph 1.0+ Send API for parallel execution.
+    Each agent should be sent to exactly once to avoid concurrent updates.
+    Agents whose output was reused from the session working set are
+    skipped; if nothing is left to run, control goes straight to the
+    aggregator.
+
+    Args:
+        state: Current state after router analysis
+
+    Returns:
+        List of Send objects for parallel execution
+    """
+    reused = set(state.get("reused_agents", []))
+    agents = [agent for agent in select_agents(state) if agent not in reused]
+
+    logger.info(
+        f"Routing to {len(agents)} agents in parallel: {agents}"
+        + (f" (reused: {sorted(reused)})" if reused else "")
+    )
+
+    if not agents:
+        return [Send("aggregator", state)]
+    return [Send(agent, state) for agent in agents]
+
+
+def join_router_and_memory(state: AgentState) -> AgentState:
+    """
+    Join point for the parallel memory_loader and router branches.
+
+    The router never reads conversation_history, so loading history from
+    MongoDB runs alongside routing instead of in front of it. This node
+    waits for both before dispatching to the specialist agents.
+
+    It also pulls still-fresh outputs of the session's previous turn (same
+    tickers) from the working set; route_to_agents skips those agents.
+
+    Args:
+        state: State with routing decision and conversation history
+
+    Returns:
+        Reused agent outputs and reused_agents (empty dict if none)
+    """
+    logger.debug(
+        f"Router and memory joined: intent={state.get('intent')}, "
+        f"history={len(state.get('conversation_history', []))} messages"
+    )
+
+    tickers = state.get("tickers", [])
+    if not tickers:
+        return {}
+
+    fresh = session_working_set.get_fresh_outputs(
+        state.get("session_id"),
+        tickers,
+        select_agents(state)
+    )
+    if not fresh:
+        return {}
+
+    logger.info(f"♻️ Reusing fresh outputs from previous turn: {sorted(fresh)}")
+
+    updates = {"reused_agents": sorted(fresh)}
+    for outputs in fresh.values():
+        updates.update(outputs)
+    return updates
 
 
 def aggregate_results(state: AgentState) -> AgentState:
@@ -272,16 +338,16 @@ def aggregate_results(state: AgentState) -> AgentState:
 # Build the graph
 
 
-def create_research_graph():
+def create_research_graph(checkpointer: Optional[Any] = None):
     """
     Create the LangGraph workflow for investment research.
 
     Flow:
         START
           ↓
-        memory_loader
+        [parallel: memory_loader, router]
           ↓
-        router
+        router_join
           ↓
         [parallel: market_data, sentiment, forward_looking, rag_retrieval]
           ↓
@@ -295,15 +361,28 @@ def create_research_graph():
           ↓
         END
 
+    Args:
+        checkpointer: Optional LangGraph checkpoint saver. When set, every run
+                      needs a thread config (see checkpointing.thread_config)
+
     Returns:
         Compiled StateGraph
     """
+    # Agent modules build their singletons (and heavy clients) on import
+    from backend.agents.router_agent import router_agent
+    from backend.agents.market_data_agent import market_data_agent
+    from backend.agents.sentiment_agent import sentiment_agent
+    from backend.agents.forward_looking_agent import forward_looking_agent
+    from backend.agents.visualization_agent import visualization_agent
+    from backend.agents.report_agent import report_agent
+
     # Create graph with AgentState
     workflow = StateGraph(AgentState)
 
     # Add nodes
     workflow.add_node("memory_loader", memory_loader)
     workflow.add_node("router", router_agent)
+    workflow.add_node("router_join", join_router_and_memory)
     workflow.add_node("market_data", market_data_agent)
     workflow.add_node("sentiment", sentiment_agent)
     workflow.add_node("forward_looking", forward_looking_agent)
@@ -314,14 +393,18 @@ def create_research_graph():
     workflow.add_node("memory_saver", memory_saver)
 
     # Define edges
+    # Memory loading and routing are independent - run them in parallel
     workflow.add_edge(START, "memory_loader")
-    workflow.add_edge("memory_loader", "router")
+    workflow.add_edge(START, "router")
+
+    # Wait for both branches before dispatching to specialist agents
+    workflow.add_edge(["memory_loader", "router"], "router_join")
 
     # Conditional parallel routing (visualization is NOT included here)
     workflow.add_conditional_edges(
-        "router",
+        "router_join",
         route_to_agents,
-        ["market_data", "sentiment", "forward_looking", "rag_retrieval"]
+        ["market_data", "sentiment", "forward_looking", "rag_retrieval", "aggregator"]
     )
 
     # All parallel paths converge to aggregator
@@ -337,11 +420,91 @@ def create_research_graph():
     workflow.add_edge("memory_saver", END)
 
     # Compile the graph
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+
+# Singleton instance (built lazily)
+_research_graph = None
+_research_graph_lock = threading.Lock()
+
+
+def get_research_graph():
+    """
+    Get the compiled research graph, building it on first call.
+
+    Thread-safe so the API can warm it up in a worker thread while
+    requests are already being served.
+
+    Returns:
+        Compiled StateGraph with the configured checkpointer
+    """
+    global _research_graph
+    if _research_graph is None:
+        with _research_graph_lock:
+            if _research_graph is None:
+                _research_graph = create_research_graph(checkpointer=create_checkpointer())
+                logger.info("✅ Research graph compiled")
+    return _research_graph
+
+
+def is_research_graph_ready() -> bool:
+    """Whether the research graph has been built."""
+    return _research_graph is not None
+
+
+def __getattr__(name: str):
+    # Backwards compatible `from backend.agents.graph import research_graph`
+    if name == "research_graph":
+        return get_research_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def _prepare_run(
+    session_id: str,
+    user_query: str,
+    request_id: Optional[str]
+) -> Tuple[Optional[AgentState], Dict[str, Any], AgentState]:
+    """
+    Decide whether a request starts fresh or resumes from its checkpoint.
+
+    A request resumes when its thread has a checkpoint for the same query
+    with nodes still pending (the previous attempt was interrupted).
+
+    Args:
+        session_id: Session identifier
+        user_query: User's research question
+        request_id: Request identifier (retries reuse it); generated if None
+
+    Returns:
+        (graph input or None to resume, run config, current state)
+    """
+    request_id = request_id or uuid.uuid4().hex
+    config = thread_config(session_id, request_id)
+    research_graph = get_research_graph()
+    checkpointer = research_graph.checkpointer
+
+    if checkpointer is not None:
+        snapshot = await research_graph.aget_state(config)
+
+        if snapshot.values:
+            if snapshot.next and snapshot.values.get("user_query") == user_query:
+                logger.info(f"🔄 Resuming request {request_id} at {list(snapshot.next)}")
+                # Checkpointed handles must resolve until the resumed run finishes
+                artifact_store.touch(request_id)
+                return None, config, snapshot.values
+
+            # Finished or different query under the same id: start over
+            await checkpointer.adelete_thread(config["configurable"]["thread_id"])
 
+    initial_state = create_initial_state(session_id, user_query, request_id=request_id)
+    return initial_state, config, initial_state
 
-# Create singleton instance
-research_graph = create_research_graph()
+
+async def _finish_run(config: Dict[str, Any]):
+    """Drop the checkpoints of a completed request."""
+    checkpointer = get_research_graph().checkpointer
+    if checkpointer is not None:
+        await checkpointer.adelete_thread(config["configurable"]["thread_id"])
 
 
 # Convenience function for running the graph
@@ -349,26 +512,110 @@ research_graph = create_research_graph()
 
 async def run_research_query(
     session_id: str,
-    user_query: str
+    user_query: str,
+    request_id: Optional[str] = None
 ) -> AgentState:
     """
     Run a research query through the complete agent workflow.
 
+    Retrying with the same request_id resumes an interrupted run from its
+    last completed node instead of re-running upstream agents.
+
     Args:
         session_id: Unique session identifier
         user_query: User's research question
+        request_id: Request identifier (optional)
 
     Returns:
         Final AgentState with report
     """
     logger.info(f"Starting research query: {user_query[:50]}...")
 
-    # Create initial state
-    initial_state = create_initial_state(session_id, user_query)
+    graph_input, config, _ = await _prepare_run(session_id, user_query, request_id)
 
-    # Run the graph
-    final_state = await research_graph.ainvoke(initial_state)
+    # Run the graph (input None resumes from the checkpoint)
+    final_state = await get_research_graph().ainvoke(graph_input, config)
+    await _finish_run(config)
 
     logger.info("Research query completed")
 
     return final_state
+
+
+# Nodes whose completion is reported to streaming clients with their partial data
+STREAMED_AGENT_NODES = {
+    "market_data", "sentiment", "forward_looking",
+    "rag_retrieval", "visualization", "report"
+}
+
+
+async def stream_research_query(
+    session_id: str,
+    user_query: str,
+    request_id: Optional[str] = None
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Run a research query and yield progress events as nodes finish.
+
+    Events (event_type, data):
+        router         - routing decision (intent, tickers, flags)
+        agent_complete - a specialist agent finished, with its partial output
+        report_token   - one streamed token of the report
+        final_state    - the complete final AgentState (always last)
+
+    A resumed request only emits events for the nodes that still had to run.
+
+    Args:
+        session_id: Unique session identifier
+        user_query: User's research question
+        request_id: Request identifier (optional, reuse to resume)
+
+    Yields:
+        Tuples of (event_type, data)
+    """
+    logger.info(f"Starting streaming research query: {user_query[:50]}...")
+
+    graph_input, config, final_state = await _prepare_run(session_id, user_query, request_id)
+
+    async for mode, chunk in get_research_graph().astream(
+        graph_input,
+        config,
+        stream_mode=["updates", "custom", "values"]
+    ):
+        if mode == "values":
+            final_state = chunk
+
+        elif mode == "custom":
+            event = dict(chunk)
+            yield event.pop("event", "custom"), event
+
+        else:
+            for node, update in chunk.items():
+                update = update or {}
+
+                if node == "router":
+                    yield "router", {
+                        "intent": update.get("intent"),
+                        "tickers": update.get("tickers", []),
+                        "routing_flags": {
+                            "market_data": update.get("should_fetch_market_data", False),
+                            "sentiment": update.get("should_analyze_sentiment", False),
+                            "context": update.get("should_retrieve_context", False)
+                        }
+                    }
+                elif node == "router_join":
+                    # Outputs reused from the session working set
+                    for agent in update.get("reused_agents", []):
+                        yield "agent_complete", {
+                            "agent": agent,
+                            "data": {field: update.get(field, []) for field in AGENT_OUTPUTS[agent]},
+                            "reused": True
+                        }
+                elif node in STREAMED_AGENT_NODES:
+                    yield "agent_complete", {"agent": node, "data": update}
+
+    await _finish_run(config)
+
+    logger.info("Streaming research query completed")
+
+    yield "final_state", final_state
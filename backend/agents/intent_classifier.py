@@ -0,0 +1,234 @@
+"""
+Fast-path intent classifier for the router.
+Assigns intent and routing flags from bilingual keyword tables without an LLM call.
+"""
+import re
+import logging
+from typing import Dict, List, Tuple, TypedDict
+
+logger = logging.getLogger(__name__)
+
+
+class IntentDecision(TypedDict):
+    """Routing decision produced by the fast-path classifier."""
+    intent: str
+    fetch_market_data: bool
+    analyze_sentiment: bool
+    retrieve_context: bool
+    confidence: float  # 0.0 to 1.0
+    reasoning: str
+
+
+# Flag mapping per intent (market_data, sentiment, context).
+# Mirrors the "Intent Types & Flag Mapping" table in the router LLM prompt.
+INTENT_FLAGS: Dict[str, Tuple[bool, bool, bool]] = {
+    "price_query": (True, False, False),
+    "fundamental_analysis": (True, False, True),
+    "sentiment_analysis": (True, True, False),
+    "general_research": (True, True, True),
+    "comparison": (True, False, True),
+}
+
+# Keyword tables: (pattern, weight). Strong keywords (1.0) identify an intent on
+# their own; weak keywords (0.5) only tip the balance.
+# English patterns are matched on word boundaries, Chinese patterns as substrings.
+KEYWORDS_EN: Dict[str, List[Tuple[str, float]]] = {
+    "price_query": [
+        (r"price", 1.0), (r"quote", 1.0), (r"trading at", 1.0),
+        (r"how much is", 1.0), (r"share price", 1.0), (r"stock price", 1.0),
+        (r"worth", 0.5), (r"today", 0.5), (r"now", 0.5),
+    ],
+    "fundamental_analysis": [
+        (r"p/?e( ratio)?", 1.0), (r"fundamentals?", 1.0), (r"valuation", 1.0),
+        (r"earnings", 1.0), (r"revenue", 1.0), (r"margins?", 1.0),
+        (r"financials?", 1.0), (r"ratios?", 1.0), (r"balance sheet", 1.0),
+        (r"cash flow", 1.0), (r"eps", 1.0), (r"debt", 0.5),
+    ],
+    "sentiment_analysis": [
+        (r"sentiment", 1.0), (r"news", 1.0), (r"headlines?", 1.0),
+        (r"public opinion", 1.0), (r"buzz", 1.0), (r"what are people saying", 1.0),
+        (r"recent", 0.5),
+    ],
+    "general_research": [
+        (r"should i (invest|buy|sell|hold)", 1.0), (r"outlook", 1.0), (r"research report", 1.0),
+        (r"full (research|report|analysis)", 1.0), (r"investment (case|thesis)", 1.0),
+        (r"good investment", 1.0), (r"worth investing", 1.0),
+        (r"analy[sz]e", 0.5), (r"overview", 0.5),
+    ],
+    "comparison": [
+        (r"compare", 1.0), (r"comparison", 1.0), (r"vs", 1.0), (r"versus", 1.0),
+        (r"better than", 1.0), (r"which is better", 1.0),
+    ],
+}
+
+KEYWORDS_ZH: Dict[str, List[Tuple[str, float]]] = {
+    "price_query": [
+        ("股价", 1.0), ("价格", 1.0), ("多少钱", 1.0), ("报价", 1.0),
+        ("现价", 1.0), ("多少", 0.5), ("今天", 0.5),
+    ],
+    "fundamental_analysis": [
+        ("财务", 1.0), ("估值", 1.0), ("市盈率", 1.0), ("营收", 1.0),
+        ("利润", 1.0), ("毛利", 1.0), ("基本面", 1.0), ("财报", 1.0),
+        ("现金流", 1.0), ("负债", 0.5),
+    ],
+    "sentiment_analysis": [
+        ("情绪", 1.0), ("新闻", 1.0), ("舆论", 1.0), ("消息", 1.0),
+        ("舆情", 1.0), ("最近", 0.5),
+    ],
+    "general_research": [
+        ("投资前景", 1.0), ("值得投资", 1.0), ("值得买", 1.0), ("能买吗", 1.0),
+        ("研究报告", 1.0), ("前景", 1.0), ("要不要", 1.0), ("该不该", 1.0),
+        ("分析", 0.5),
+    ],
+    "comparison": [
+        ("比较", 1.0), ("对比", 1.0), ("哪个好", 1.0), ("哪个更好", 1.0),
+        ("相比", 1.0),
+    ],
+}
+
+# Cues that the user wants an explanation, a forecast or advice rather than a
+# lookup ("Why did AAPL price drop?", "price target"). Keyword scores cannot
+# tell these apart, so a matching query is capped below the fast-path
+# threshold and left to the LLM.
+ANALYSIS_CUES_EN: List[str] = [
+    r"why", r"how come", r"targets?", r"forecasts?", r"predict(ions?|ed)?",
+    r"expect(ed|ations?)?", r"should i (sell|hold)",
+]
+ANALYSIS_CUES_ZH: List[str] = ["为什么", "为何", "目标价", "预测", "预期"]
+
+# Confidence ceiling for queries with analysis cues
+ANALYSIS_CUE_CONFIDENCE = 0.5
+
+_CJK_PATTERN = re.compile(r"[\u4e00-\u9fff]")
+
+
+def is_chinese(text: str) -> bool:
+    """Check whether text contains Chinese characters."""
+    return bool(_CJK_PATTERN.search(text))
+
+
+class IntentClassifier:
+    """
+    Deterministic keyword/rule classifier for query intent.
+
+    Scores each intent against English and Chinese keyword tables and reports
+    a confidence. The router only trusts the decision when the confidence is
+    at or above its threshold; otherwise it falls back to the LLM.
+    """
+
+    # Queries longer than this are usually nuanced enough to deserve the LLM
+    MAX_SIMPLE_WORDS = 12
+    MAX_SIMPLE_CJK_CHARS = 30
+
+    def __init__(self):
+        """Compile keyword tables."""
+        self._en_patterns = {
+            intent: [(re.compile(rf"\b{pattern}\b", re.IGNORECASE), weight) for pattern, weight in keywords]
+            for intent, keywords in KEYWORDS_EN.items()
+        }
+        self._zh_keywords = KEYWORDS_ZH
+        self._cue_patterns = [re.compile(rf"\b{cue}\b", re.IGNORECASE) for cue in ANALYSIS_CUES_EN]
+
+    def classify(self, query: str) -> IntentDecision:
+        """
+        Classify query intent.
+
+        Runs on the raw query only, so it can start before tickers are resolved.
+        Ticker-dependent adjustments happen in the router's reconciliation step.
+
+        Args:
+            query: User query
+
+        Returns:
+            IntentDecision with intent, routing flags and confidence
+        """
+        scores, matched = self._score(query)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        top_intent, top_score = ranked[0]
+        second_score = ranked[1][1] if len(ranked) > 1 else 0.0
+
+        if top_score == 0:
+            return self._decision("general_research", 0.0, "no keyword matched")
+
+        # Confidence: a strong match with no competitor is high, a strong match
+        # against weak-only competitors is slightly lower, ties and weak-only
+        # matches are low
+        if top_score < 1.0:
+            confidence = 0.6
+        elif second_score == 0:
+            confidence = 0.95
+        elif second_score < 1.0:
+            confidence = 0.9
+        else:
+            confidence = top_score / (top_score + second_score)
+
+        # Long queries tend to carry nuance the keyword tables miss
+        if not self.is_simple(query):
+            confidence *= 0.8
+
+        reasoning = f"keywords={matched[top_intent]}"
+        cues = self.analysis_cues(query)
+        if cues:
+            confidence = min(confidence, ANALYSIS_CUE_CONFIDENCE)
+            reasoning += f", analysis cues={cues}"
+
+        return self._decision(top_intent, round(confidence, 2), reasoning)
+
+    def analysis_cues(self, query: str) -> List[str]:
+        """
+        Find cues that the query asks for an explanation, forecast or advice.
+
+        Args:
+            query: User query
+
+        Returns:
+            Matched cues (empty for plain lookups)
+        """
+        cues = [match.group(0).lower() for match in (p.search(query) for p in self._cue_patterns) if match]
+        if is_chinese(query):
+            cues.extend(cue for cue in ANALYSIS_CUES_ZH if cue in query)
+        return cues
+
+    def _score(self, query: str) -> Tuple[Dict[str, float], Dict[str, List[str]]]:
+        """Score every intent against the keyword tables."""
+        scores: Dict[str, float] = {intent: 0.0 for intent in INTENT_FLAGS}
+        matched: Dict[str, List[str]] = {intent: [] for intent in INTENT_FLAGS}
+
+        for intent, patterns in self._en_patterns.items():
+            for pattern, weight in patterns:
+                match = pattern.search(query)
+                if match:
+                    scores[intent] += weight
+                    matched[intent].append(match.group(0).lower())
+
+        if is_chinese(query):
+            for intent, keywords in self._zh_keywords.items():
+                for keyword, weight in keywords:
+                    if keyword in query:
+                        scores[intent] += weight
+                        matched[intent].append(keyword)
+
+        return scores, matched
+
+    def is_simple(self, query: str) -> bool:
+        """Check whether a query is short enough for keyword classification."""
+        cjk_chars = len(_CJK_PATTERN.findall(query))
+        if cjk_chars:
+            return cjk_chars <= self.MAX_SIMPLE_CJK_CHARS
+        return len(query.split()) <= self.MAX_SIMPLE_WORDS
+
+    def _decision(self, intent: str, confidence: float, reasoning: str) -> IntentDecision:
+        """Build an IntentDecision with the intent's default flags."""
+        fetch_market, analyze_sentiment, retrieve_context = INTENT_FLAGS[intent]
+        return IntentDecision(
+            intent=intent,
+            fetch_market_data=fetch_market,
+            analyze_sentiment=analyze_sentiment,
+            retrieve_context=retrieve_context,
+            confidence=confidence,
+            reasoning=f"fast-path: {reasoning}"
+        )
+
+
+# Singleton instance
+intent_classifier = IntentClassifier()
@@ -0,0 +1,149 @@
+"""
+Token budgeting for report prompts.
+
+Report sections grow with the number of tickers (one block per ticker),
+so a large comparison can produce a very long prompt. PromptBudget measures
+sections with tiktoken and, when they exceed the budget, shrinks the
+lowest-priority sections first: whole ticker/context blocks are dropped
+from the end and replaced by a short omission note.
+"""
+from typing import Dict, List, Tuple
+import logging
+
+from backend.services.tokenizer import count_tokens, encoding_for
+
+logger = logging.getLogger(__name__)
+
+# Report sections from most to least important. Trimming starts at the end.
+SECTION_PRIORITY: List[str] = [
+    "Market Analysis",
+    "Analyst Consensus & Forward-Looking",
+    "Peer Valuation Comparison",
+    "52-Week Trend Analysis",
+    "Sentiment & News",
+    "Supporting Context",
+]
+
+# Tokens a trimmed section keeps at least (enough for one ticker block)
+MIN_SECTION_TOKENS = 120
+
+# Blocks (per ticker / per document) inside a formatted section
+BLOCK_SEPARATOR = "\n\n"
+
+
+class PromptBudget:
+    """Counts prompt tokens and fits report sections into a token budget."""
+
+    def __init__(self, model: str):
+        """
+        Initialize budget helper.
+
+        Args:
+            model: Chat model (selects the tokenizer)
+        """
+        self.model = model
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens with the model's tokenizer."""
+        return count_tokens(text, self.model)
+
+    def fit_sections(
+        self,
+        sections: Dict[str, str],
+        budget: int
+    ) -> Tuple[Dict[str, str], List[str]]:
+        """
+        Shrink sections so their combined size fits the budget.
+
+        Args:
+            sections: {section name: formatted content}
+            budget: Tokens available for all section contents
+
+        Returns:
+            Tuple of (fitted sections in the original order, names of trimmed sections)
+        """
+        sizes = {name: self.count_tokens(content) for name, content in sections.items()}
+        allocations = self.allocate(sizes, budget)
+
+        fitted = {}
+        trimmed = []
+        for name, content in sections.items():
+            if allocations[name] < sizes[name]:
+                fitted[name] = self.trim(content, allocations[name])
+                trimmed.append(name)
+            else:
+                fitted[name] = content
+        return fitted, trimmed
+
+    def allocate(self, sizes: Dict[str, int], budget: int) -> Dict[str, int]:
+        """
+        Assign each section a token budget.
+
+        Everything fits: every section keeps its size. Otherwise the overflow
+        is taken from the lowest-priority sections first, down to
+        MIN_SECTION_TOKENS each (unknown sections rank lowest).
+
+        Args:
+            sizes: {section name: token count}
+            budget: Total tokens available
+
+        Returns:
+            {section name: allocated tokens}
+        """
+        allocations = dict(sizes)
+        overflow = sum(sizes.values()) - budget
+        if overflow <= 0:
+            return allocations
+
+        def rank(name: str) -> int:
+            return SECTION_PRIORITY.index(name) if name in SECTION_PRIORITY else len(SECTION_PRIORITY)
+
+        for name in sorted(sizes, key=rank, reverse=True):
+            reducible = max(0, sizes[name] - min(sizes[name], MIN_SECTION_TOKENS))
+            cut = min(reducible, overflow)
+            allocations[name] -= cut
+            overflow -= cut
+            if overflow <= 0:
+                break
+
+        return allocations
+
+    def trim(self, content: str, budget: int) -> str:
+        """
+        Trim a section to a token budget.
+
+        Keeps leading blocks (primary tickers / most relevant documents) and
+        notes how many were omitted; a single oversized block is cut off
+        at the token limit.
+
+        Args:
+            content: Formatted section
+            budget: Tokens allowed
+
+        Returns:
+            Trimmed section
+        """
+        blocks = [block for block in content.split(BLOCK_SEPARATOR) if block.strip()]
+
+        kept: List[str] = []
+        used = 0
+        for block in blocks:
+            block_tokens = self.count_tokens(block + BLOCK_SEPARATOR)
+            if used + block_tokens > budget:
+                break
+            kept.append(block)
+            used += block_tokens
+
+        if not kept:
+            return self._truncate(blocks[0] if blocks else content, budget) + " …"
+
+        omitted = len(blocks) - len(kept)
+        if omitted:
+            kept.append(f"_({omitted} more omitted to fit the prompt budget)_")
+        return BLOCK_SEPARATOR.join(kept)
+
+    def _truncate(self, text: str, budget: int) -> str:
+        """Cut text to at most `budget` tokens."""
+        encoding = encoding_for(self.model)
+        tokens = encoding.encode_ordinary(text)
+        return encoding.decode(tokens[:max(budget, 0)])
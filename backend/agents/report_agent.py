@@ -2,11 +2,235 @@
 Report Generator Agent - Synthesizes all agent outputs into coherent report.
 Generates structured investment research reports.
 """
-from openai import AsyncOpenAI
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union, get_args, get_origin, get_type_hints
+from langgraph.config import get_stream_writer
 
 from backend.agents.base_agent import BaseAgent
-from backend.agents.state import AgentState
+from backend.agents.intent_classifier import intent_classifier, is_chinese
+from backend.agents.prompt_budget import PromptBudget
+from backend.agents.state import AgentState, InvestorSnapshot
 from backend.config.settings import settings
+from backend.services.llm_gateway import llm_gateway
+
+
+# JSON schema for the combined report + snapshot completion (mirrors InvestorSnapshot)
+COMBINED_RESPONSE_SCHEMA = {
+    "name": "report_with_snapshot",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "report": {"type": "string"},
+            "snapshot": {
+                "type": "object",
+                "properties": {
+                    "ticker": {"type": "string"},
+                    "current_price": {"type": ["number", "null"]},
+                    "price_change_pct": {"type": ["number", "null"]},
+                    "market_cap": {"type": ["integer", "null"]},
+                    "pe_ratio": {"type": ["number", "null"]},
+                    "investment_rating": {
+                        "type": "string",
+                        "enum": ["strong_buy", "buy", "hold", "sell", "strong_sell"]
+                    },
+                    "rating_explanation": {"type": "string"},
+                    "key_highlights": {"type": "array", "items": {"type": "string"}},
+                    "risk_warnings": {"type": "array", "items": {"type": "string"}}
+                },
+                "required": [
+                    "ticker", "current_price", "price_change_pct", "market_cap", "pe_ratio",
+                    "investment_rating", "rating_explanation", "key_highlights", "risk_warnings"
+                ],
+                "additionalProperties": False
+            }
+        },
+        "required": ["report", "snapshot"],
+        "additionalProperties": False
+    }
+}
+
+
+def _matches_type(value: Any, hint: Any) -> bool:
+    """Check a JSON value against a TypedDict field annotation."""
+    origin = get_origin(hint)
+
+    if origin is Union:
+        return any(_matches_type(value, arg) for arg in get_args(hint))
+    if origin is Literal:
+        return value in get_args(hint)
+    if origin in (list, List):
+        (item_hint,) = get_args(hint) or (Any,)
+        return isinstance(value, list) and all(_matches_type(item, item_hint) for item in value)
+    if hint is Any:
+        return True
+    if hint is type(None):
+        return value is None
+    if hint is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if hint is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, hint)
+
+
+# Static report instructions (system message). Request data goes in the user
+# message, after this prefix, so the prefix can be served from the provider's
+# prompt cache.
+REPORT_SYSTEM_PROMPT = """You are an expert investment research analyst. Create clear, professional, and data-driven reports. IMPORTANT: Respond in the same language as the user's query. If the user asks in Chinese, respond in Chinese. If in English, respond in English.
+
+The user message contains the query, the tickers, the query intent and the available data sections.
+
+**IMPORTANT INSTRUCTIONS:**
+- Generate ONLY sections based on the available data in the user message
+- DO NOT hallucinate or make up information for unavailable data
+- Use clear markdown formatting
+- Be objective and data-driven
+- RESPOND IN THE SAME LANGUAGE AS THE USER'S QUERY (Chinese query = Chinese response, English query = English response)
+
+**Analysis Guidelines:**
+- 52-week trends: Stocks near highs (80%+) = strong momentum or resistance. Near lows (20%-) = weakness or potential value
+- Peer valuation: Premium (positive %) = market confidence or overvaluation. Discount (negative %) = undervaluation or concerns"""
+
+# Template-specific report structure, appended to REPORT_SYSTEM_PROMPT
+TEMPLATE_INSTRUCTIONS: Dict[str, str] = {
+    "brief_market": """
+Provide a BRIEF market summary (3-4 sentences) covering:
+- Current price and change
+- 52-week position and what it indicates
+- Quick valuation assessment""",
+
+    "sentiment_focused": """
+Provide a sentiment-focused analysis with:
+1. **Executive Summary** (2-3 sentences, sentiment-driven)
+2. **Sentiment Analysis** (detailed news themes and sentiment breakdown)
+3. **Market Context** (brief price overview to support sentiment)
+4. **Conclusion** (investment perspective based primarily on sentiment)""",
+
+    "peer_comparison": """
+Provide a peer comparison analysis with:
+1. **Executive Summary** (2-3 sentences)
+2. **Market Overview** (current price and basics)
+3. **Peer Valuation Comparison** (detailed comparison with sector)
+4. **Key Insights** (3-5 bullet points on valuation positioning)
+5. **Conclusion** (investment perspective based on relative valuation)""",
+
+    "comprehensive": """
+Provide a comprehensive investment research report with:
+1. **Executive Summary** (2-3 sentences)
+2. Then cover each available section in detail
+3. **Key Insights** (3-5 bullet points synthesizing all data)
+4. **Conclusion** (balanced investment perspective)"""
+}
+
+# Static snapshot instructions; the ticker's data goes in the user message
+SNAPSHOT_SYSTEM_PROMPT = """You are a financial advisor helping beginner investors. Generate clear, simple snapshots in JSON format. Be concise and avoid technical jargon.
+
+From the investment data in the user message, generate a beginner-friendly snapshot as ONLY a valid JSON object with this exact structure:
+{
+  "ticker": "<ticker>",
+  "current_price": <current price, copied from the data>,
+  "price_change_pct": <price change %, copied from the data>,
+  "market_cap": <market cap in dollars, copied from the data>,
+  "pe_ratio": <P/E ratio from the data, null if N/A>,
+  "investment_rating": "one of: strong_buy, buy, hold, sell, strong_sell",
+  "rating_explanation": "1-2 sentence explanation in simple terms",
+  "key_highlights": ["highlight 1", "highlight 2", "highlight 3"],
+  "risk_warnings": ["risk 1", "risk 2"]
+}
+
+Guidelines:
+- investment_rating: Based on price momentum, valuation, sentiment, and analyst views
+- rating_explanation: WHY this rating in simple language
+- key_highlights: 3-5 positive facts (growth, strengths, opportunities)
+- risk_warnings: 2-3 main risks (valuation concerns, market risks, business challenges)
+- Use simple language for beginners, avoid jargon
+- Be objective and balanced
+
+Return ONLY the JSON object, no other text."""
+
+# Appended to the report system prompt in the combined report + snapshot mode
+COMBINED_SNAPSHOT_INSTRUCTIONS = """
+
+## Beginner Snapshot
+
+Besides the report, produce a beginner-friendly snapshot for the first ticker listed, from the same data.
+- current_price, price_change_pct, market_cap, pe_ratio: copy from the data (null if missing)
+- investment_rating: Based on price momentum, valuation, sentiment, and analyst views
+- rating_explanation: WHY this rating in simple language (1-2 sentences)
+- key_highlights: 3-5 positive facts (growth, strengths, opportunities)
+- risk_warnings: 2-3 main risks (valuation concerns, market risks, business challenges)
+- Use simple language for beginners, avoid jargon
+
+Return a JSON object with "report" (the full markdown report) and "snapshot"."""
+
+# Text of the deterministic brief_market report
+BRIEF_MARKET_LABELS: Dict[str, Dict[str, str]] = {
+    "en": {
+        "title": "Market Snapshot",
+        "details": "Market Data",
+        "source": "Source: Yahoo Finance market data.",
+        "no_price": "**{ticker}** — Current price is not available.",
+        "price": "**{ticker}** is trading at ${price:.2f}",
+        "change": ", {direction} {change:.2f}% today",
+        "up": "up",
+        "down": "down",
+        "period": ".",
+        "range": "It sits at {position:.1f}% of its 52-week range (${low:.2f} - ${high:.2f}), {trend}.",
+        "near_high": "near its 52-week high",
+        "near_low": "near its 52-week low",
+        "mid_range": "in the middle of the range",
+        "pe": "The P/E ratio is {pe:.2f}.",
+        "separator": " ",
+    },
+    "zh": {
+        "title": "行情速览",
+        "details": "行情数据",
+        "source": "数据来源：Yahoo Finance 行情数据。",
+        "no_price": "**{ticker}** — 暂无当前价格。",
+        "price": "**{ticker}** 当前股价为 ${price:.2f}",
+        "change": "，今日{direction} {change:.2f}%",
+        "up": "上涨",
+        "down": "下跌",
+        "period": "。",
+        "range": "股价位于52周区间（${low:.2f} - ${high:.2f}）的 {position:.1f}% 位置，{trend}。",
+        "near_high": "接近52周高点",
+        "near_low": "接近52周低点",
+        "mid_range": "处于区间中部",
+        "pe": "市盈率为 {pe:.2f}。",
+        "separator": "",
+    },
+}
+
+# Labels of _format_market_data per language (the LLM prompt uses "en")
+MARKET_DATA_LABELS: Dict[str, Dict[str, str]] = {
+    "en": {
+        "empty": "No market data available.",
+        "current_price": "Current Price",
+        "market_cap": "Market Cap",
+        "pe_ratio": "P/E Ratio",
+        "range": "52-Week Range",
+        "position": "Current Position in Range",
+        "near_high": " (Near 52-week high)",
+        "near_low": " (Near 52-week low)",
+        "mid_range": " (Mid-range)",
+        "distance_from_high": "Distance from 52W High",
+        "distance_from_low": "Distance from 52W Low",
+    },
+    "zh": {
+        "empty": "暂无行情数据。",
+        "current_price": "当前价格",
+        "market_cap": "市值",
+        "pe_ratio": "市盈率",
+        "range": "52周区间",
+        "position": "区间位置",
+        "near_high": "（接近52周高点）",
+        "near_low": "（接近52周低点）",
+        "mid_range": "（区间中部）",
+        "distance_from_high": "距52周高点",
+        "distance_from_low": "距52周低点",
+    },
+}
 
 
 class ReportAgent(BaseAgent):
@@ -19,8 +243,9 @@ class ReportAgent(BaseAgent):
 
     def __init__(self):
         super().__init__("report")
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
-        self.model = settings.openai_model
+        self.llm = llm_gateway
+        self.model = self.llm.model_for("report")
+        self.prompt_budget = PromptBudget(self.model)
 
     async def execute(self, state: AgentState) -> AgentState:
         """
@@ -58,28 +283,66 @@ class ReportAgent(BaseAgent):
             "context": bool(context)
         }
 
-        # Generate report based on available data and template
-        report = await self._generate_report(
-            user_query=user_query,
-            tickers=tickers,
-            intent=intent,
-            template=template,
-            market_data=market_data,
-            sentiment=sentiment,
-            analyst_consensus=analyst_consensus,
-            peer_valuation=peer_valuation,
-            context=context,
-            data_sources=data_sources
-        )
+        # Simple price queries: the brief is formatted numbers, no LLM needed
+        template_report = None
+        if self._use_template_report(template, user_query, market_data):
+            template_report = self._render_brief_market(user_query, market_data)
+
+        # Optional mode: one structured completion returns report and snapshot,
+        # so the data block is sent once instead of twice
+        combined = None
+        if template_report is None and settings.report_combined_completion:
+            combined = await self._generate_report_and_snapshot(
+                user_query=user_query,
+                tickers=tickers,
+                intent=intent,
+                template=template,
+                market_data=market_data,
+                sentiment=sentiment,
+                analyst_consensus=analyst_consensus,
+                peer_valuation=peer_valuation,
+                context=context,
+                data_sources=data_sources
+            )
 
-        # Generate snapshot for beginner investors
-        snapshot = await self._generate_snapshot(
-            tickers=tickers,
-            market_data=market_data,
-            sentiment=sentiment,
-            analyst_consensus=analyst_consensus,
-            peer_valuation=peer_valuation
-        )
+        if template_report is not None:
+            report, snapshot = template_report, None
+        elif combined is not None:
+            report, snapshot = combined
+        else:
+            # Report and beginner snapshot use the same inputs but not each other,
+            # so both completions run concurrently (node time = max, not sum)
+            report, snapshot = await asyncio.gather(
+                self._generate_report(
+                    user_query=user_query,
+                    tickers=tickers,
+                    intent=intent,
+                    template=template,
+                    market_data=market_data,
+                    sentiment=sentiment,
+                    analyst_consensus=analyst_consensus,
+                    peer_valuation=peer_valuation,
+                    context=context,
+                    data_sources=data_sources
+                ),
+                self._generate_snapshot(
+                    tickers=tickers,
+                    market_data=market_data,
+                    sentiment=sentiment,
+                    analyst_consensus=analyst_consensus,
+                    peer_valuation=peer_valuation
+                ),
+                return_exceptions=True
+            )
+
+            # A failure in one must not discard the other
+            if isinstance(report, Exception):
+                self.logger.error(f"Report generation failed: {report}")
+                report = self._generate_fallback_report(user_query, tickers, market_data, sentiment)
+
+            if isinstance(snapshot, Exception):
+                self.logger.error(f"Snapshot generation failed: {snapshot}")
+                snapshot = None
 
         # Build report metadata
         report_metadata = {
@@ -87,7 +350,8 @@ class ReportAgent(BaseAgent):
             "data_sources": data_sources,
             "intent": intent,
             "tickers": tickers,
-            "report_template": template
+            "report_template": template,
+            "report_generator": "template" if template_report is not None else "llm"
         }
 
         # Return report, snapshot, and metadata
@@ -119,6 +383,94 @@ class ReportAgent(BaseAgent):
         self.logger.info(f"Selected template: {template} for intent: {intent}")
         return template
 
+    def _use_template_report(self, template: str, user_query: str, market_data: list) -> bool:
+        """
+        Check whether the report can be rendered without the LLM.
+
+        Args:
+            template: Selected report template
+            user_query: User's query
+            market_data: Market data
+
+        Returns:
+            True for plain price lookups (a confident fast-path price_query
+            without why/target/forecast cues) with market data
+        """
+        if not (settings.report_template_price_queries and template == "brief_market" and market_data):
+            return False
+
+        decision = intent_classifier.classify(user_query)
+        return (
+            decision["intent"] == "price_query"
+            and decision["confidence"] >= settings.router_fast_path_confidence
+            and not intent_classifier.analysis_cues(user_query)
+        )
+
+    def _render_brief_market(self, user_query: str, market_data: list) -> str:
+        """
+        Render the brief_market report deterministically, in the query's language.
+
+        One summary paragraph per ticker (price, 52-week position, valuation)
+        followed by the same data blocks the LLM prompt would get.
+
+        Args:
+            user_query: User's query (selects English or Chinese)
+            market_data: Market data from MarketDataAgent
+
+        Returns:
+            Markdown report
+        """
+        language = "zh" if is_chinese(user_query) else "en"
+        labels = BRIEF_MARKET_LABELS[language]
+
+        summaries = [self._summarize_ticker(data, language) for data in market_data]
+        details = self._format_market_data(market_data, MARKET_DATA_LABELS[language])
+
+        report = f"# {labels['title']}\n\n"
+        report += "\n\n".join(summaries)
+        report += f"\n\n## {labels['details']}\n\n{details.strip()}\n\n"
+        report += f"---\n*{labels['source']}*"
+
+        self.logger.info(f"✅ Report rendered from template ({language}), LLM skipped")
+
+        # Streaming clients still get the report text, in one piece
+        writer = self._get_stream_writer()
+        if writer is not None:
+            writer({"event": "report_token", "token": report})
+
+        return report
+
+    def _summarize_ticker(self, data: dict, language: str) -> str:
+        """Build the 2-3 sentence summary for one ticker."""
+        labels = BRIEF_MARKET_LABELS[language]
+        ticker = data.get("ticker", "N/A")
+        price = data.get("current_price")
+        change = data.get("change_percent")
+        week_52_high = data.get("year_high")
+        week_52_low = data.get("year_low")
+        week_52_position = data.get("week_52_position")
+        pe = data.get("pe_ratio")
+
+        if not price:
+            return labels["no_price"].format(ticker=ticker)
+
+        sentences = [labels["price"].format(ticker=ticker, price=price)]
+        if change:
+            direction = labels["up"] if change > 0 else labels["down"]
+            sentences[0] += labels["change"].format(direction=direction, change=abs(change))
+        sentences[0] += labels["period"]
+
+        if week_52_high and week_52_low and week_52_position is not None:
+            trend = labels.get(data.get("trend_signal"), labels["mid_range"])
+            sentences.append(labels["range"].format(
+                position=week_52_position, low=week_52_low, high=week_52_high, trend=trend
+            ))
+
+        if pe:
+            sentences.append(labels["pe"].format(pe=pe))
+
+        return labels["separator"].join(sentences)
+
     async def _generate_report(
         self,
         user_query: str,
@@ -150,6 +502,70 @@ class ReportAgent(BaseAgent):
         Returns:
             Formatted report string
         """
+        messages = self._build_report_messages(
+            user_query=user_query,
+            tickers=tickers,
+            intent=intent,
+            template=template,
+            market_data=market_data,
+            sentiment=sentiment,
+            analyst_consensus=analyst_consensus,
+            peer_valuation=peer_valuation,
+            context=context,
+            data_sources=data_sources
+        )
+
+        try:
+            writer = self._get_stream_writer()
+
+            if writer is None:
+                # Running outside the graph (scripts) - plain completion
+                response = await self.llm.chat_completion(
+                    "report",
+                    cache=False,  # Free-form narrative, never served from cache
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=1500
+                )
+                report = response.choices[0].message.content.strip()
+            else:
+                # Inside the graph - stream tokens to astream() consumers
+                report = await self._stream_report(messages, writer)
+
+            self.logger.info("✅ Report generated successfully")
+            return report
+
+        except Exception as e:
+            self.logger.error(f"Report generation failed: {e}")
+
+            # Fallback: Simple text report
+            return self._generate_fallback_report(
+                user_query, tickers, market_data, sentiment
+            )
+
+    def _build_report_messages(
+        self,
+        user_query: str,
+        tickers: list,
+        intent: str,
+        template: str,
+        market_data: list,
+        sentiment: list,
+        analyst_consensus: list,
+        peer_valuation: list,
+        context: list,
+        data_sources: dict
+    ) -> List[Dict[str, str]]:
+        """
+        Build chat messages for the report completion.
+
+        Args:
+            Same as _generate_report()
+
+        Returns:
+            System and user messages
+        """
         # Build dynamic sections based on template and data availability
         sections = self._build_sections(
             template=template,
@@ -161,41 +577,91 @@ class ReportAgent(BaseAgent):
             context=context
         )
 
+        system_prompt = self._create_system_prompt(template)
+
+        # Fit section data into what the prompt budget leaves after the fixed text
+        overhead = self.prompt_budget.count_tokens(system_prompt) + self.prompt_budget.count_tokens(
+            self._create_prompt(
+                user_query=user_query,
+                tickers=tickers,
+                intent=intent,
+                sections={name: "" for name in sections}
+            )
+        )
+        data_sections = {name: content for name, content in sections.items() if name != "Key Insights"}
+        fitted, trimmed = self.prompt_budget.fit_sections(
+            data_sections, settings.report_max_prompt_tokens - overhead
+        )
+        sections = {name: fitted.get(name, content) for name, content in sections.items()}
+
         # Create dynamic prompt based on template
         prompt = self._create_prompt(
             user_query=user_query,
             tickers=tickers,
             intent=intent,
-            template=template,
             sections=sections
         )
 
-        try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert investment research analyst. Create clear, professional, and data-driven reports. IMPORTANT: Respond in the same language as the user's query. If the user asks in Chinese, respond in Chinese. If in English, respond in English."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1500
+        prompt_tokens = self.prompt_budget.count_tokens(system_prompt) + self.prompt_budget.count_tokens(prompt)
+        if trimmed:
+            self.logger.info(
+                f"🧮 Report prompt: {prompt_tokens} tokens "
+                f"(budget {settings.report_max_prompt_tokens}, trimmed: {', '.join(trimmed)})"
             )
+        else:
+            self.logger.info(f"🧮 Report prompt: {prompt_tokens} tokens")
 
-            report = response.choices[0].message.content.strip()
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
 
-            self.logger.info("✅ Report generated successfully")
-            return report
+        return messages
 
-        except Exception as e:
-            self.logger.error(f"Report generation failed: {e}")
+    async def _stream_report(self, messages: list, writer: Callable[[dict], None]) -> str:
+        """
+        Generate report with OpenAI streaming, forwarding each token.
 
-            # Fallback: Simple text report
-            return self._generate_fallback_report(
-                user_query, tickers, market_data, sentiment
-            )
+        Tokens are emitted as {"event": "report_token", "token": ...} on the
+        LangGraph custom stream; the writer is a no-op under ainvoke().
+
+        Args:
+            messages: Chat messages
+            writer: LangGraph stream writer
+
+        Returns:
+            Complete report text
+        """
+        stream = self.llm.chat_completion_stream(
+            "report",
+            model=self.model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=1500
+        )
+
+        tokens = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                tokens.append(token)
+                writer({"event": "report_token", "token": token})
+
+        return "".join(tokens).strip()
+
+    def _get_stream_writer(self) -> Optional[Callable[[dict], None]]:
+        """
+        Get the LangGraph stream writer for the current run.
+
+        Returns:
+            Stream writer, or None when called outside a graph run
+        """
+        try:
+            return get_stream_writer()
+        except RuntimeError:
+            return None
 
     def _build_sections(
         self,
@@ -261,22 +727,36 @@ class ReportAgent(BaseAgent):
 
         return sections
 
+    def _create_system_prompt(self, template: str) -> str:
+        """
+        Create the static system prompt for a template.
+
+        Contains no request data, so it is identical for every report with
+        the same template and can be served from the provider's prompt cache.
+
+        Args:
+            template: Template name
+
+        Returns:
+            System prompt string
+        """
+        instruction = TEMPLATE_INSTRUCTIONS.get(template, TEMPLATE_INSTRUCTIONS["comprehensive"])
+        return f"{REPORT_SYSTEM_PROMPT}\n\n---\n{instruction}"
+
     def _create_prompt(
         self,
         user_query: str,
         tickers: list,
         intent: str,
-        template: str,
         sections: dict
     ) -> str:
         """
-        Create dynamic prompt based on template and available sections.
+        Create the user prompt with the request data.
 
         Args:
             user_query: User's query
             tickers: List of tickers
             intent: Query intent
-            template: Template name
             sections: Dict of section names and content
 
         Returns:
@@ -288,43 +768,6 @@ class ReportAgent(BaseAgent):
             if section_name != "Key Insights":  # Skip placeholder
                 data_section += f"\n---\n\n**{section_name}:**\n{content}\n"
 
-        # Build required sections list
-        section_names = list(sections.keys())
-
-        # Template-specific instructions
-        template_instructions = {
-            "brief_market": """
-Provide a BRIEF market summary (3-4 sentences) covering:
-- Current price and change
-- 52-week position and what it indicates
-- Quick valuation assessment""",
-
-            "sentiment_focused": """
-Provide a sentiment-focused analysis with:
-1. **Executive Summary** (2-3 sentences, sentiment-driven)
-2. **Sentiment Analysis** (detailed news themes and sentiment breakdown)
-3. **Market Context** (brief price overview to support sentiment)
-4. **Conclusion** (investment perspective based primarily on sentiment)""",
-
-            "peer_comparison": """
-Provide a peer comparison analysis with:
-1. **Executive Summary** (2-3 sentences)
-2. **Market Overview** (current price and basics)
-3. **Peer Valuation Comparison** (detailed comparison with sector)
-4. **Key Insights** (3-5 bullet points on valuation positioning)
-5. **Conclusion** (investment perspective based on relative valuation)""",
-
-            "comprehensive": """
-Provide a comprehensive investment research report with:
-1. **Executive Summary** (2-3 sentences)
-2. Then cover each available section in detail
-3. **Key Insights** (3-5 bullet points synthesizing all data)
-4. **Conclusion** (balanced investment perspective)"""
-        }
-
-        instruction = template_instructions.get(template, template_instructions["comprehensive"])
-
-        # Build prompt
         prompt = f"""Generate an investment research report to answer this query:
 
 **User Query:** {user_query}
@@ -335,19 +778,7 @@ Provide a comprehensive investment research report with:
 
 ---
 
-{instruction}
-
-**IMPORTANT INSTRUCTIONS:**
-- Generate ONLY sections based on the available data above
-- Available sections: {', '.join(section_names)}
-- DO NOT hallucinate or make up information for unavailable data
-- Use clear markdown formatting
-- Be objective and data-driven
-- RESPOND IN THE SAME LANGUAGE AS THE USER'S QUERY (Chinese query = Chinese response, English query = English response)
-
-**Analysis Guidelines:**
-- 52-week trends: Stocks near highs (80%+) = strong momentum or resistance. Near lows (20%-) = weakness or potential value
-- Peer valuation: Premium (positive %) = market confidence or overvaluation. Discount (negative %) = undervaluation or concerns
+**Available sections:** {', '.join(sections.keys())}
 """
 
         return prompt
@@ -394,10 +825,11 @@ Provide a comprehensive investment research report with:
         return "\n".join(sections) if sections else "52-week trend data not available."
 
 
-    def _format_market_data(self, market_data: list) -> str:
-        """Format market data for report."""
+    def _format_market_data(self, market_data: list, labels: Optional[Dict[str, str]] = None) -> str:
+        """Format market data for report (English labels unless others are given)."""
+        labels = labels or MARKET_DATA_LABELS["en"]
         if not market_data:
-            return "No market data available."
+            return labels["empty"]
 
         sections = []
         for data in market_data:
@@ -417,33 +849,33 @@ Provide a comprehensive investment research report with:
 
             section = f"**{ticker}**\n"
             if price:
-                section += f"- Current Price: ${price:.2f}"
+                section += f"- {labels['current_price']}: ${price:.2f}"
                 if change:
                     section += f" ({change:+.2f}%)"
                 section += "\n"
 
             if market_cap:
-                section += f"- Market Cap: ${market_cap:,.0f}\n"
+                section += f"- {labels['market_cap']}: ${market_cap:,.0f}\n"
             if pe:
-                section += f"- P/E Ratio: {pe:.2f}\n"
+                section += f"- {labels['pe_ratio']}: {pe:.2f}\n"
 
             # Add 52-week trend analysis
             if week_52_high and week_52_low and week_52_position is not None:
-                section += f"- 52-Week Range: ${week_52_low:.2f} - ${week_52_high:.2f}\n"
-                section += f"- Current Position in Range: {week_52_position:.1f}%"
+                section += f"- {labels['range']}: ${week_52_low:.2f} - ${week_52_high:.2f}\n"
+                section += f"- {labels['position']}: {week_52_position:.1f}%"
 
                 if trend_signal == "near_high":
-                    section += " (Near 52-week high)"
+                    section += labels["near_high"]
                 elif trend_signal == "near_low":
-                    section += " (Near 52-week low)"
+                    section += labels["near_low"]
                 else:
-                    section += " (Mid-range)"
+                    section += labels["mid_range"]
                 section += "\n"
 
                 if distance_from_high is not None:
-                    section += f"- Distance from 52W High: {distance_from_high:+.1f}%\n"
+                    section += f"- {labels['distance_from_high']}: {distance_from_high:+.1f}%\n"
                 if distance_from_low is not None:
-                    section += f"- Distance from 52W Low: {distance_from_low:+.1f}%\n"
+                    section += f"- {labels['distance_from_low']}: {distance_from_low:+.1f}%\n"
 
             sections.append(section)
 
@@ -639,7 +1071,7 @@ Provide a comprehensive investment research report with:
 Ticker: {ticker}
 Current Price: ${current_price:.2f}
 Price Change: {price_change_pct:+.2f}%
-Market Cap: ${market_cap / 1e9:.2f}B
+Market Cap: ${market_cap:,.0f} (${market_cap / 1e9:.2f}B)
 P/E Ratio: {pe_str}
 """
 
@@ -659,42 +1091,16 @@ P/E Ratio: {pe_str}
             if target:
                 analyst_summary = f"\nAnalyst Target: ${target:.2f} ({upside:+.1f}% potential)\nRecommendation: {rec.upper()}"
 
-        # Create prompt for snapshot generation
-        prompt = f"""Based on this investment data for {ticker}, generate a beginner-friendly snapshot in JSON format:
-
-{market_summary}{sentiment_summary}{analyst_summary}
-
-Generate ONLY a valid JSON object with this exact structure:
-{{
-  "ticker": "{ticker}",
-  "current_price": {current_price},
-  "price_change_pct": {price_change_pct},
-  "market_cap": {market_cap},
-  "pe_ratio": {pe_ratio if pe_ratio else 'null'},
-  "investment_rating": "one of: strong_buy, buy, hold, sell, strong_sell",
-  "rating_explanation": "1-2 sentence explanation in simple terms",
-  "key_highlights": ["highlight 1", "highlight 2", "highlight 3"],
-  "risk_warnings": ["risk 1", "risk 2"]
-}}
-
-Guidelines:
-- investment_rating: Based on price momentum, valuation, sentiment, and analyst views
-- rating_explanation: WHY this rating in simple language
-- key_highlights: 3-5 positive facts (growth, strengths, opportunities)
-- risk_warnings: 2-3 main risks (valuation concerns, market risks, business challenges)
-- Use simple language for beginners, avoid jargon
-- Be objective and balanced
-
-Return ONLY the JSON object, no other text."""
+        # Request data only - the output structure is in SNAPSHOT_SYSTEM_PROMPT
+        prompt = f"""Investment data for {ticker}:
+{market_summary}{sentiment_summary}{analyst_summary}"""
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
+            response = await self.llm.chat_completion(
+                "snapshot",
+                model=self.llm.model_for("snapshot"),
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a financial advisor helping beginner investors. Generate clear, simple snapshots in JSON format. Be concise and avoid technical jargon."
-                    },
+                    {"role": "system", "content": SNAPSHOT_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.5,
@@ -702,7 +1108,6 @@ Return ONLY the JSON object, no other text."""
                 response_format={"type": "json_object"}
             )
 
-            import json
             snapshot_data = json.loads(response.choices[0].message.content.strip())
 
             self.logger.info(f"✅ Snapshot generated successfully for {ticker}")
@@ -712,6 +1117,104 @@ Return ONLY the JSON object, no other text."""
             self.logger.error(f"Failed to generate snapshot: {str(e)}")
             return None
 
+    async def _generate_report_and_snapshot(
+        self,
+        user_query: str,
+        tickers: list,
+        intent: str,
+        template: str,
+        market_data: list,
+        sentiment: list,
+        analyst_consensus: list,
+        peer_valuation: list,
+        context: list,
+        data_sources: dict
+    ) -> Optional[Tuple[str, Optional[InvestorSnapshot]]]:
+        """
+        Generate report and snapshot with one JSON-schema-constrained completion.
+
+        The data block is sent once for both outputs. The snapshot is validated
+        against InvestorSnapshot; on any failure the caller falls back to the
+        two-completion path.
+
+        Args:
+            Same as _generate_report()
+
+        Returns:
+            (report, snapshot) tuple, or None to fall back
+        """
+        ticker = tickers[0] if tickers else None
+        if not ticker or not any(m.get("ticker") == ticker for m in market_data or []):
+            # Nothing to snapshot - the regular path handles this case
+            return None
+
+        messages = self._build_report_messages(
+            user_query=user_query,
+            tickers=tickers,
+            intent=intent,
+            template=template,
+            market_data=market_data,
+            sentiment=sentiment,
+            analyst_consensus=analyst_consensus,
+            peer_valuation=peer_valuation,
+            context=context,
+            data_sources=data_sources
+        )
+        messages[0] = {
+            "role": "system",
+            "content": messages[0]["content"] + COMBINED_SNAPSHOT_INSTRUCTIONS
+        }
+
+        try:
+            response = await self.llm.chat_completion(
+                "report_combined",
+                cache=False,
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=2100,
+                response_format={"type": "json_schema", "json_schema": COMBINED_RESPONSE_SCHEMA}
+            )
+            data = json.loads(response.choices[0].message.content)
+
+            report = data.get("report")
+            snapshot = self._validate_snapshot(data.get("snapshot"))
+            if not isinstance(report, str) or not report.strip() or snapshot is None:
+                self.logger.warning("Combined completion failed validation, falling back to two calls")
+                return None
+
+        except Exception as e:
+            self.logger.warning(f"Combined completion failed ({e}), falling back to two calls")
+            return None
+
+        # Streaming clients still get the report text, in one piece
+        writer = self._get_stream_writer()
+        if writer is not None:
+            writer({"event": "report_token", "token": report.strip()})
+
+        self.logger.info(f"✅ Report and snapshot generated in one completion for {ticker}")
+        return report.strip(), snapshot
+
+    def _validate_snapshot(self, data: Any) -> Optional[InvestorSnapshot]:
+        """
+        Validate a snapshot dict against the InvestorSnapshot TypedDict.
+
+        Args:
+            data: Parsed snapshot
+
+        Returns:
+            Snapshot with exactly the TypedDict's fields, or None if invalid
+        """
+        if not isinstance(data, dict):
+            return None
+
+        for field, hint in get_type_hints(InvestorSnapshot).items():
+            if field not in data or not _matches_type(data[field], hint):
+                self.logger.warning(f"Snapshot field '{field}' invalid: {data.get(field)!r}")
+                return None
+
+        return {field: data[field] for field in get_type_hints(InvestorSnapshot)}
+
     def _generate_fallback_report(
         self,
         query: str,
@@ -3,14 +3,79 @@ Sentiment Agent - Analyzes financial news and sentiment.
 Uses RAG pipeline for news retrieval and LLM for sentiment analysis.
 """
 import json
-from typing import List
-from openai import AsyncOpenAI
+import asyncio
+from typing import Dict, List, Tuple
 
 from backend.agents.base_agent import BaseAgent
 from backend.agents.state import AgentState, SentimentAnalysis
 from backend.config.settings import settings
 from backend.rag.pipeline import rag_pipeline
 from backend.rag.news_aggregator import news_aggregator
+from backend.services.llm_gateway import llm_gateway
+from backend.services.tokenizer import count_tokens
+
+SYSTEM_PROMPT = "You are an expert financial analyst. Analyze news sentiment objectively and respond with valid JSON. Respond in the same language as the user's query (English or Chinese)."
+
+# Instructions go in the system message, ahead of the news, so the static
+# prefix is identical across calls and eligible for provider prompt caching
+TICKER_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+
+The user message contains recent news articles about one ticker. Provide:
+1. Overall sentiment (positive/neutral/negative)
+2. Confidence level (0.0 to 1.0)
+3. Key themes (3-5 main topics)
+4. Brief summary (2-3 sentences)
+
+Respond in JSON format:
+{
+    "sentiment": "<positive/neutral/negative>",
+    "confidence": <0.0-1.0>,
+    "themes": ["theme1", "theme2", ...],
+    "summary": "<brief summary>"
+}"""
+
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+
+The user message contains one news section per ticker. Judge every ticker only on its own news section.
+
+For each ticker provide:
+1. Overall sentiment (positive/neutral/negative)
+2. Confidence level (0.0 to 1.0)
+3. Key themes (3-5 main topics)
+4. Brief summary (2-3 sentences)
+
+Respond with a JSON object {"results": [...]} containing one entry per ticker."""
+
+# Structured output for batched analysis: one entry per ticker
+BATCH_RESPONSE_SCHEMA = {
+    "name": "batched_sentiment",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "ticker": {"type": "string"},
+                        "sentiment": {"type": "string", "enum": ["positive", "neutral", "negative"]},
+                        "confidence": {"type": "number"},
+                        "themes": {"type": "array", "items": {"type": "string"}},
+                        "summary": {"type": "string"}
+                    },
+                    "required": ["ticker", "sentiment", "confidence", "themes", "summary"],
+                    "additionalProperties": False
+                }
+            }
+        },
+        "required": ["results"],
+        "additionalProperties": False
+    }
+}
+
+# Completion tokens reserved per ticker in a batched request
+BATCH_COMPLETION_TOKENS_PER_TICKER = 300
 
 
 class SentimentAgent(BaseAgent):
@@ -20,12 +85,15 @@ class SentimentAgent(BaseAgent):
     - Uses LLM to extract sentiment
     - Identifies key themes
     - Provides summary
+
+    With several tickers, news for all of them is packed into one structured
+    request (split into token-budgeted batches when the payload is large).
     """
 
     def __init__(self):
         super().__init__("sentiment")
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
-        self.model = settings.openai_model
+        self.llm = llm_gateway
+        self.model = self.llm.model_for("sentiment")
         self.rag = rag_pipeline
         self.news = news_aggregator
 
@@ -45,19 +113,24 @@ class SentimentAgent(BaseAgent):
             self.logger.warning("No tickers to analyze sentiment for")
             return state
 
-        # Analyze sentiment for each ticker
-        sentiment_results = []
-
-        for ticker in tickers:
-            self.logger.info(f"Analyzing sentiment for {ticker}")
-
-            try:
-                analysis = await self._analyze_ticker_sentiment(ticker)
-                if analysis:
-                    sentiment_results.append(analysis)
-            except Exception as e:
-                self.logger.error(f"Sentiment analysis failed for {ticker}: {e}")
-                # Continue with other tickers
+        # 1. Retrieve news for all tickers concurrently
+        news_results = await asyncio.gather(
+            *(self._retrieve_news(ticker) for ticker in tickers),
+            return_exceptions=True
+        )
+
+        items: List[Tuple[str, str, int]] = []  # (ticker, news_text, news_count)
+        for ticker, news_docs in zip(tickers, news_results):
+            if isinstance(news_docs, Exception) or not news_docs:
+                self.logger.warning(f"No news found for {ticker}")
+                continue
+            items.append((ticker, self._format_news_for_llm(news_docs), len(news_docs)))
+
+        # 2. Analyze sentiment - batched for several tickers, single call otherwise
+        if len(items) > 1 and settings.sentiment_batch_enabled:
+            sentiment_results = await self._batched_sentiment_analysis(items)
+        else:
+            sentiment_results = await self._per_ticker_sentiment_analysis(items)
 
         # Return only the fields we're updating (for parallel execution)
         # Always return a list (empty or with data) for Annotated[List, operator.add]
@@ -65,30 +138,161 @@ class SentimentAgent(BaseAgent):
             "sentiment_analysis": sentiment_results
         }
 
-    async def _analyze_ticker_sentiment(self, ticker: str) -> SentimentAnalysis:
+    async def _per_ticker_sentiment_analysis(
+        self,
+        items: List[Tuple[str, str, int]]
+    ) -> List[SentimentAnalysis]:
         """
-        Analyze sentiment for a single ticker.
+        Analyze each ticker with its own completion (run concurrently).
 
         Args:
-            ticker: Stock ticker symbol
+            items: (ticker, news_text, news_count) tuples
 
         Returns:
-            SentimentAnalysis dict
+            List of SentimentAnalysis in input order
+        """
+        results = await asyncio.gather(
+            *(self._llm_sentiment_analysis(ticker, news_text, news_count)
+              for ticker, news_text, news_count in items),
+            return_exceptions=True
+        )
+
+        sentiment_results = []
+        for (ticker, _, _), result in zip(items, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Sentiment analysis failed for {ticker}: {result}")
+                continue
+            if result:
+                sentiment_results.append(result)
+        return sentiment_results
+
+    async def _batched_sentiment_analysis(
+        self,
+        items: List[Tuple[str, str, int]]
+    ) -> List[SentimentAnalysis]:
+        """
+        Analyze several tickers with as few completions as the token budget allows.
+
+        Tickers missing from a batch response (or from a failed batch) are
+        retried with the single-ticker prompt.
+
+        Args:
+            items: (ticker, news_text, news_count) tuples
+
+        Returns:
+            List of SentimentAnalysis in input order
+        """
+        batches = self._split_batches(items, settings.sentiment_batch_max_prompt_tokens)
+        self.logger.info(f"Analyzing sentiment for {len(items)} tickers in {len(batches)} batched call(s)")
+
+        batch_results = await asyncio.gather(
+            *(self._llm_batch_sentiment(batch) for batch in batches),
+            return_exceptions=True
+        )
+
+        analyses: Dict[str, SentimentAnalysis] = {}
+        for batch, result in zip(batches, batch_results):
+            if isinstance(result, Exception):
+                self.logger.warning(f"Batched sentiment call failed: {result}")
+                continue
+            analyses.update(result)
+
+        missing = [item for item in items if item[0] not in analyses]
+        if missing:
+            self.logger.warning(f"Falling back to single-ticker sentiment for {[m[0] for m in missing]}")
+            for analysis in await self._per_ticker_sentiment_analysis(missing):
+                analyses[analysis["ticker"]] = analysis
+
+        return [analyses[ticker] for ticker, _, _ in items if ticker in analyses]
+
+    def _split_batches(
+        self,
+        items: List[Tuple[str, str, int]],
+        max_prompt_tokens: int
+    ) -> List[List[Tuple[str, str, int]]]:
         """
-        # 1. Retrieve recent news from vector store
-        news_docs = await self._retrieve_news(ticker)
+        Greedily pack tickers into batches under a prompt token budget.
 
-        if not news_docs:
-            self.logger.warning(f"No news found for {ticker}")
-            return None
+        A single ticker larger than the budget gets a batch of its own.
 
-        # 2. Format news for LLM
-        news_text = self._format_news_for_llm(news_docs)
+        Args:
+            items: (ticker, news_text, news_count) tuples
+            max_prompt_tokens: Prompt token budget per batch
 
-        # 3. Analyze sentiment using LLM
-        sentiment_data = await self._llm_sentiment_analysis(ticker, news_text, len(news_docs))
+        Returns:
+            List of batches
+        """
+        batches: List[List[Tuple[str, str, int]]] = []
+        current: List[Tuple[str, str, int]] = []
+        current_tokens = count_tokens(BATCH_SYSTEM_PROMPT, self.model) + 30  # Ticker list line
+
+        for item in items:
+            item_tokens = count_tokens(item[1], self.model) + 20  # Per-ticker header
+            if current and current_tokens + item_tokens > max_prompt_tokens:
+                batches.append(current)
+                current = []
+                current_tokens = count_tokens(BATCH_SYSTEM_PROMPT, self.model) + 30
+            current.append(item)
+            current_tokens += item_tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _llm_batch_sentiment(
+        self,
+        batch: List[Tuple[str, str, int]]
+    ) -> Dict[str, SentimentAnalysis]:
+        """
+        Analyze sentiment for a batch of tickers in one structured completion.
+
+        Args:
+            batch: (ticker, news_text, news_count) tuples
+
+        Returns:
+            {ticker: SentimentAnalysis} for tickers present in the response
+        """
+        news_blocks = "\n\n".join(
+            f"### {ticker}\n{news_text}" for ticker, news_text, _ in batch
+        )
+        prompt = f"""Tickers: {', '.join(t for t, _, _ in batch)}
+
+{news_blocks}"""
+
+        response = await self.llm.chat_completion(
+            "sentiment_batch",
+            model=self.model,
+            messages=[
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=BATCH_COMPLETION_TOKENS_PER_TICKER * len(batch),
+            response_format={"type": "json_schema", "json_schema": BATCH_RESPONSE_SCHEMA}
+        )
+
+        results = json.loads(response.choices[0].message.content)["results"]
+        news_counts = {ticker: news_count for ticker, _, news_count in batch}
+
+        analyses: Dict[str, SentimentAnalysis] = {}
+        for result in results:
+            ticker = str(result.get("ticker", "")).upper()
+            if ticker not in news_counts:
+                continue
+            analyses[ticker] = SentimentAnalysis(
+                ticker=ticker,
+                overall_sentiment=result.get("sentiment", "neutral"),
+                confidence=float(result.get("confidence", 0.5)),
+                key_themes=result.get("themes", []),
+                news_count=news_counts[ticker],
+                summary=result.get("summary", "No summary available")
+            )
+            self.logger.info(
+                f"✅ {ticker} sentiment: {analyses[ticker]['overall_sentiment']} "
+                f"(confidence: {analyses[ticker]['confidence']:.2f})"
+            )
 
-        return sentiment_data
+        return analyses
 
     async def _retrieve_news(self, ticker: str) -> List[dict]:
         """
@@ -114,7 +318,7 @@ class SentimentAgent(BaseAgent):
                 return results
 
             # Fallback to news aggregator
-            news_summary = self.news.get_news_summary(ticker, limit=10)
+            news_summary = await asyncio.to_thread(self.news.get_news_summary, ticker, limit=10)
             if news_summary and news_summary.get("news"):
                 return [
                     {
@@ -167,29 +371,16 @@ class SentimentAgent(BaseAgent):
         Returns:
             SentimentAnalysis dict
         """
-        prompt = f"""Analyze the sentiment of these recent news articles about {ticker}:
-
-{news_text}
+        prompt = f"""Recent news articles about {ticker}:
 
-Provide:
-1. Overall sentiment (positive/neutral/negative)
-2. Confidence level (0.0 to 1.0)
-3. Key themes (3-5 main topics)
-4. Brief summary (2-3 sentences)
-
-Respond in JSON format:
-{{
-    "sentiment": "<positive/neutral/negative>",
-    "confidence": <0.0-1.0>,
-    "themes": ["theme1", "theme2", ...],
-    "summary": "<brief summary>"
-}}"""
+{news_text}"""
 
         try:
-            response = await self.client.chat.completions.create(
+            response = await self.llm.chat_completion(
+                "sentiment",
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": "You are an expert financial analyst. Analyze news sentiment objectively and respond with valid JSON. Respond in the same language as the user's query (English or Chinese)."},
+                    {"role": "system", "content": TICKER_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
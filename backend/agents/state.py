@@ -3,9 +3,19 @@ Agent state definitions for LangGraph workflow.
 Uses TypedDict for type safety and immutable state management.
 """
 from typing import TypedDict, List, Optional, Dict, Any, Literal, Annotated
-from typing_extensions import TypedDict as ExtTypedDict
+from typing_extensions import TypedDict as ExtTypedDict, NotRequired
 from datetime import datetime
 import operator
+import uuid
+
+# Handle to a payload kept in the request-scoped artifact store
+# (backend/services/artifact_store.py), e.g. "artifact://<request_id>/visualization/<id>"
+ArtifactHandle = str
+
+
+def merge_dicts(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Reducer merging dicts written by parallel nodes (right wins on key clash)."""
+    return {**(left or {}), **(right or {})}
 
 
 class AgentMessage(TypedDict):
@@ -138,6 +148,9 @@ class ReportMetadata(TypedDict):
     intent: str  # Query intent
     tickers: List[str]  # Tickers analyzed
     report_template: str  # Which template was used
+    node_timings: NotRequired[Dict[str, float]]  # Wall time per node (ms)
+    token_usage: NotRequired[Dict[str, Dict[str, int]]]  # LLM tokens per node
+    total_tokens_used: NotRequired[int]  # LLM tokens across all nodes
 
 
 class AgentState(TypedDict):
@@ -147,9 +160,11 @@ class AgentState(TypedDict):
     LangGraph passes this state through all nodes.
     Fields without Annotated are last-write-wins.
     Fields with Annotated[..., operator.add] merge values from parallel nodes.
+    Fields with Annotated[..., merge_dicts] merge per-node dict entries.
     """
     # Session info (immutable, set once)
     session_id: str
+    request_id: str  # Unique per query; scopes artifacts
     user_query: str
     conversation_history: List[AgentMessage]
 
@@ -170,6 +185,7 @@ class AgentState(TypedDict):
 
     # Execution tracking
     executed_agents: Annotated[List[str], operator.add]  # Track which agents ran
+    reused_agents: List[str]  # Agents skipped because the session working set was fresh
     agent_errors: Dict[str, str]  # Track agent-specific errors {agent_name: error_message}
 
     # Agent outputs (can be set by parallel agents - use Annotated to merge lists)
@@ -178,7 +194,7 @@ class AgentState(TypedDict):
     retrieved_context: Annotated[List[RetrievedContext], operator.add]
     analyst_consensus: Annotated[List[AnalystConsensus], operator.add]
     peer_valuation: Annotated[List[PeerValuation], operator.add]
-    visualization_data: Annotated[List[VisualizationData], operator.add]
+    visualization_data: Annotated[List[ArtifactHandle], operator.add]  # Handles to VisualizationData
 
     # Final output
     report: Optional[str]
@@ -190,14 +206,19 @@ class AgentState(TypedDict):
 
     # Metadata
     timestamp: str
-    total_tokens_used: int
     retry_count: int
 
+    # Telemetry (written by every node's timing span)
+    node_timings: Annotated[Dict[str, float], merge_dicts]  # {node: wall time ms}
+    token_usage: Annotated[Dict[str, Dict[str, int]], merge_dicts]  # {node: {prompt_tokens, ...}}
+    total_tokens_used: Annotated[int, operator.add]  # Summed across nodes
+
 
 def create_initial_state(
     session_id: str,
     user_query: str,
-    conversation_history: Optional[List[AgentMessage]] = None
+    conversation_history: Optional[List[AgentMessage]] = None,
+    request_id: Optional[str] = None
 ) -> AgentState:
     """
     Create initial agent state for a new query.
@@ -206,12 +227,14 @@ def create_initial_state(
         session_id: Unique session identifier
         user_query: User's research query
         conversation_history: Previous messages (optional)
+        request_id: Request identifier (generated if omitted)
 
     Returns:
         Initial AgentState
     """
     return AgentState(
         session_id=session_id,
+        request_id=request_id or uuid.uuid4().hex,
         user_query=user_query,
         conversation_history=conversation_history or [],
 
@@ -226,6 +249,7 @@ def create_initial_state(
 
         # Execution tracking
         executed_agents=[],
+        reused_agents=[],
         agent_errors={},
 
         # Agent outputs (initially empty lists for parallel merge)
@@ -247,5 +271,9 @@ def create_initial_state(
 
         # Metadata
         timestamp=datetime.utcnow().isoformat(),
+
+        # Telemetry
+        node_timings={},
+        token_usage={},
         total_tokens_used=0
     )
@@ -8,6 +8,7 @@ from datetime import datetime
 from backend.agents.base_agent import BaseAgent
 from backend.agents.state import AgentState, VisualizationData, PricePoint
 from backend.services.yahoo_finance import yahoo_finance
+from backend.services.artifact_store import artifact_store
 
 
 class VisualizationAgent(BaseAgent):
@@ -16,11 +17,15 @@ class VisualizationAgent(BaseAgent):
     - Historical price charts (1 year daily data)
     - 52-week range indicators
     - Peer comparison charts
+
+    Payloads go to the request-scoped artifact store; state only carries
+    their handles (resolved by the API layer).
     """
 
     def __init__(self):
         super().__init__("visualization")
         self.yahoo = yahoo_finance
+        self.artifacts = artifact_store
 
     async def execute(self, state: AgentState) -> AgentState:
         """
@@ -30,7 +35,7 @@ class VisualizationAgent(BaseAgent):
             state: Current agent state
 
         Returns:
-            State with visualization_data populated
+            State with visualization_data handles populated
         """
         tickers = state.get("tickers", [])
 
@@ -39,7 +44,8 @@ class VisualizationAgent(BaseAgent):
             return state
 
         # Generate visualization data for each ticker
-        viz_data_list = []
+        request_id = state.get("request_id", "")
+        viz_handles = []
 
         for ticker in tickers:
             self.logger.info(f"Generating visualization data for {ticker}")
@@ -47,7 +53,7 @@ class VisualizationAgent(BaseAgent):
             try:
                 viz_data = await self._generate_viz_data(ticker, state)
                 if viz_data:
-                    viz_data_list.append(viz_data)
+                    viz_handles.append(self.artifacts.put(request_id, "visualization", viz_data))
 
             except Exception as e:
                 self.logger.error(f"Failed to generate viz data for {ticker}: {e}")
@@ -55,7 +61,7 @@ class VisualizationAgent(BaseAgent):
 
         # Return only the field we're updating (for parallel execution)
         return {
-            "visualization_data": viz_data_list
+            "visualization_data": viz_handles
         }
 
     async def _generate_viz_data(
@@ -70,6 +70,15 @@ class ReportMetadataModel(BaseModel):
         description="Tickers analyzed"
     )
     report_template: str = Field(..., description="Which report template was used")
+    node_timings: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Wall time per workflow node in milliseconds"
+    )
+    token_usage: Dict[str, Dict[str, int]] = Field(
+        default_factory=dict,
+        description="LLM token usage per workflow node (prompt/completion/total tokens, calls)"
+    )
+    total_tokens_used: int = Field(0, description="LLM tokens used across all nodes")
 
 
 class InvestorSnapshotModel(BaseModel):
@@ -113,6 +122,15 @@ class ResearchQueryRequest(BaseModel):
         examples=["550e8400-e29b-41d4-a716-446655440000"]
     )
 
+    request_id: Optional[str] = Field(
+        None,
+        description="Optional request ID. Retrying a failed or interrupted request with the same ID "
+                    "(and session_id and query) resumes the workflow from its last completed step. "
+                    "Clients that want to retry should generate and send one; otherwise the "
+                    "server-generated ID is returned in the X-Request-ID header of error responses.",
+        examples=["9f1c2e7a4b3d4c5e8f6a7b8c9d0e1f2a"]
+    )
+
 
 class ResearchQueryResponse(BaseModel):
     """Response model for research query results."""
@@ -123,6 +141,12 @@ class ResearchQueryResponse(BaseModel):
         examples=["550e8400-e29b-41d4-a716-446655440000"]
     )
 
+    request_id: Optional[str] = Field(
+        None,
+        description="Request identifier (reuse it to resume this request if it fails)",
+        examples=["9f1c2e7a4b3d4c5e8f6a7b8c9d0e1f2a"]
+    )
+
     query: str = Field(
         ...,
         description="The original query submitted",
@@ -147,6 +171,12 @@ class ResearchQueryResponse(BaseModel):
         examples=[["router", "market_data", "sentiment", "rag_retrieval"]]
     )
 
+    reused_agents: List[str] = Field(
+        default_factory=list,
+        description="Agents skipped because their output from the previous turn was still fresh",
+        examples=[["market_data", "forward_looking"]]
+    )
+
     agent_errors: Dict[str, str] = Field(
         default_factory=dict,
         description="Per-agent error messages if any occurred",
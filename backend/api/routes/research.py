@@ -3,9 +3,11 @@ Research API endpoints for multi-agent investment research system.
 Provides REST API for submitting queries and retrieving conversation history.
 """
 from fastapi import APIRouter, HTTPException, status
-from typing import List
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, AsyncIterator
 import logging
 import uuid
+import json
 
 from backend.api.models import (
     ResearchQueryRequest,
@@ -16,9 +18,12 @@ from backend.api.models import (
     MessageModel,
     ErrorResponse
 )
-from backend.agents.graph import run_research_query
 from backend.memory.conversation import conversation_memory
-from backend.rag.pipeline import rag_pipeline
+from backend.services.artifact_store import artifact_store
+
+# The research graph and RAG pipeline (agents, OpenAI, yfinance, chromadb,
+# langgraph) are imported inside the handlers that need them, so the API
+# process starts and answers health checks before they are loaded.
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +40,137 @@ router = APIRouter(
 )
 
 
+def _resume_headers(session_id: str, request_id: str) -> Dict[str, str]:
+    """
+    Headers identifying a request, so a client can retry it after an error.
+
+    Args:
+        session_id: Session identifier
+        request_id: Request identifier
+
+    Returns:
+        X-Session-ID and X-Request-ID headers
+    """
+    return {"X-Session-ID": session_id, "X-Request-ID": request_id}
+
+
+async def _build_research_response(
+    session_id: str,
+    query: str,
+    final_state: Dict[str, Any]
+) -> ResearchQueryResponse:
+    """
+    Build the API response from the workflow's final state.
+
+    Args:
+        session_id: Session identifier
+        query: Original user query
+        final_state: Final AgentState from the research graph
+
+    Returns:
+        ResearchQueryResponse
+
+    Raises:
+        HTTPException: 500 if no report was generated
+    """
+    # Extract data from final state
+    report = final_state.get("report", "")
+    tickers = final_state.get("tickers", [])
+    market_data = final_state.get("market_data", [])
+    sentiment = final_state.get("sentiment_analysis", [])
+    analyst_consensus = final_state.get("analyst_consensus", [])
+    context = final_state.get("retrieved_context", [])
+    # State carries artifact handles; resolve the payloads for the response
+    visualization_data = artifact_store.resolve(final_state.get("visualization_data", []))
+    snapshot = final_state.get("snapshot")
+    report_metadata = final_state.get("report_metadata")
+
+    # Telemetry is taken from the final state rather than the report node,
+    # so it also covers the report and memory_saver nodes themselves
+    if report_metadata:
+        report_metadata = {
+            **report_metadata,
+            "node_timings": final_state.get("node_timings", {}),
+            "token_usage": final_state.get("token_usage", {}),
+            "total_tokens_used": final_state.get("total_tokens_used", 0)
+        }
+
+    # Extract execution tracking
+    executed_agents = final_state.get("executed_agents", [])
+    agent_errors = final_state.get("agent_errors", {})
+
+    # Extract routing decision
+    intent = final_state.get("intent")
+    routing_flags = {
+        "market_data": final_state.get("should_fetch_market_data", False),
+        "sentiment": final_state.get("should_analyze_sentiment", False),
+        "context": final_state.get("should_retrieve_context", False)
+    }
+
+    # Check if report was generated
+    if not report:
+        logger.error(f"No report generated for session {session_id}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to generate research report"
+        )
+
+    # Calculate data availability: data exists AND agent succeeded (no error)
+    # market_data agent also populates peer_valuation, so check both
+    market_data_available = (
+        len(market_data) > 0 and "market_data" not in agent_errors
+    )
+    sentiment_available = (
+        len(sentiment) > 0 and "sentiment" not in agent_errors
+    )
+    analyst_consensus_available = (
+        len(analyst_consensus) > 0 and "forward_looking" not in agent_errors
+    )
+
+    # Check deep analysis availability (SEC 10-K data) for the primary ticker
+    deep_analysis_available = False
+    can_request_deep_analysis = False
+
+    if tickers:
+        from backend.rag.pipeline import rag_pipeline
+
+        primary_ticker = tickers[0]  # Use first ticker as primary
+        deep_analysis_available = await rag_pipeline.has_deep_analysis_data(primary_ticker)
+
+        # User can request deep analysis if:
+        # 1. Query has a ticker
+        # 2. Deep analysis not already available
+        # 3. Query intent suggests depth (not just price_query)
+        can_request_deep_analysis = (
+            not deep_analysis_available and
+            intent not in ["price_query"]
+        )
+
+    response = ResearchQueryResponse(
+        session_id=session_id,
+        request_id=final_state.get("request_id"),
+        query=query,
+        report=report,
+        tickers=tickers,
+        executed_agents=executed_agents,
+        reused_agents=final_state.get("reused_agents", []),
+        agent_errors=agent_errors,
+        intent=intent,
+        routing_flags=routing_flags,
+        market_data_available=market_data_available,
+        sentiment_available=sentiment_available,
+        analyst_consensus_available=analyst_consensus_available,
+        context_retrieved=len(context),
+        deep_analysis_available=deep_analysis_available,
+        can_request_deep_analysis=can_request_deep_analysis,
+        visualization_data=visualization_data or [],
+        snapshot=snapshot,
+        report_metadata=report_metadata
+    )
+
+    return response
+
+
 @router.post(
     "/query",
     response_model=ResearchQueryResponse,
@@ -42,7 +178,10 @@ router = APIRouter(
     summary="Submit Research Query",
     description="Submit an investment research query and receive a comprehensive analysis report. "
                 "The system uses a multi-agent workflow to gather market data, sentiment analysis, "
-                "analyst consensus, and relevant documents to generate the report.",
+                "analyst consensus, and relevant documents to generate the report. "
+                "To retry a failed request without redoing completed steps, send it again with the "
+                "same `session_id` and `request_id`; when the client sent none, error responses carry "
+                "the server-generated ones in the `X-Session-ID` and `X-Request-ID` headers.",
     responses={
         200: {
             "description": "Research report generated successfully",
@@ -53,7 +192,8 @@ router = APIRouter(
             "model": ErrorResponse
         },
         500: {
-            "description": "Internal server error during report generation",
+            "description": "Internal server error during report generation "
+                           "(X-Session-ID / X-Request-ID headers identify the request for a retry)",
             "model": ErrorResponse
         }
     }
@@ -71,126 +211,159 @@ async def create_research_query(request: ResearchQueryRequest) -> ResearchQueryR
     6. Returns report with metadata
 
     Args:
-        request: ResearchQueryRequest with query and optional session_id
+        request: ResearchQueryRequest with query and optional session_id/request_id
 
     Returns:
         ResearchQueryResponse with report and metadata
 
     Raises:
         HTTPException: 400 for invalid request, 500 for processing errors
+            (with X-Session-ID / X-Request-ID headers for resuming)
     """
-    try:
-        # Use provided session_id or create new one
-        session_id = request.session_id or str(uuid.uuid4())
+    # Use provided session_id or create new one
+    session_id = request.session_id or str(uuid.uuid4())
+    # Reusing a request_id resumes an interrupted run from its checkpoint
+    request_id = request.request_id or uuid.uuid4().hex
 
+    try:
         logger.info(f"Processing research query for session {session_id}: {request.query[:50]}...")
 
         # Run the multi-agent workflow
+        from backend.agents.graph import run_research_query
+
         final_state = await run_research_query(
             session_id=session_id,
-            user_query=request.query
+            user_query=request.query,
+            request_id=request_id
         )
 
-        # Extract data from final state
-        report = final_state.get("report", "")
-        tickers = final_state.get("tickers", [])
-        market_data = final_state.get("market_data", [])
-        sentiment = final_state.get("sentiment_analysis", [])
-        analyst_consensus = final_state.get("analyst_consensus", [])
-        context = final_state.get("retrieved_context", [])
-        visualization_data = final_state.get("visualization_data", [])
-        snapshot = final_state.get("snapshot")
-        report_metadata = final_state.get("report_metadata")
-
-        # Extract execution tracking
-        executed_agents = final_state.get("executed_agents", [])
-        agent_errors = final_state.get("agent_errors", {})
-
-        # Extract routing decision
-        intent = final_state.get("intent")
-        routing_flags = {
-            "market_data": final_state.get("should_fetch_market_data", False),
-            "sentiment": final_state.get("should_analyze_sentiment", False),
-            "context": final_state.get("should_retrieve_context", False)
-        }
-
-        # Check if report was generated
-        if not report:
-            logger.error(f"No report generated for session {session_id}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to generate research report"
-            )
-
-        # Calculate data availability: data exists AND agent succeeded (no error)
-        # market_data agent also populates peer_valuation, so check both
-        market_data_available = (
-            len(market_data) > 0 and "market_data" not in agent_errors
-        )
-        sentiment_available = (
-            len(sentiment) > 0 and "sentiment" not in agent_errors
-        )
-        analyst_consensus_available = (
-            len(analyst_consensus) > 0 and "forward_looking" not in agent_errors
-        )
-
-        # Check deep analysis availability (SEC 10-K data) for the primary ticker
-        deep_analysis_available = False
-        can_request_deep_analysis = False
-
-        if tickers:
-            primary_ticker = tickers[0]  # Use first ticker as primary
-            deep_analysis_available = await rag_pipeline.has_deep_analysis_data(primary_ticker)
-
-            # User can request deep analysis if:
-            # 1. Query has a ticker
-            # 2. Deep analysis not already available
-            # 3. Query intent suggests depth (not just price_query)
-            can_request_deep_analysis = (
-                not deep_analysis_available and
-                intent not in ["price_query"]
-            )
-
-        # Build response
-        response = ResearchQueryResponse(
-            session_id=session_id,
-            query=request.query,
-            report=report,
-            tickers=tickers,
-            executed_agents=executed_agents,
-            agent_errors=agent_errors,
-            intent=intent,
-            routing_flags=routing_flags,
-            market_data_available=market_data_available,
-            sentiment_available=sentiment_available,
-            analyst_consensus_available=analyst_consensus_available,
-            context_retrieved=len(context),
-            deep_analysis_available=deep_analysis_available,
-            can_request_deep_analysis=can_request_deep_analysis,
-            visualization_data=visualization_data or [],
-            snapshot=snapshot,
-            report_metadata=report_metadata
-        )
+        try:
+            response = await _build_research_response(session_id, request.query, final_state)
+        finally:
+            # The run finished and its checkpoints are gone: no retry can resolve these handles
+            artifact_store.release(request_id)
 
         logger.info(
             f"Successfully generated report for session {session_id} "
-            f"(tickers={tickers}, context_docs={len(context)})"
+            f"(tickers={response.tickers}, context_docs={response.context_retrieved})"
         )
 
         return response
 
-    except HTTPException:
-        # Re-raise HTTP exceptions
+    except HTTPException as e:
+        # Re-raise HTTP exceptions, identifying the request for a retry
+        e.headers = {**(e.headers or {}), **_resume_headers(session_id, request_id)}
         raise
 
     except Exception as e:
         logger.error(f"Error processing research query: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to process research query: {str(e)}"
+            detail=f"Failed to process research query: {str(e)}",
+            headers=_resume_headers(session_id, request_id)
         )
 
 
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    """
+    Format one Server-Sent Event.
+
+    Args:
+        event: Event type
+        data: JSON-serializable payload
+
+    Returns:
+        SSE frame string
+    """
+    payload = json.dumps(data, default=str, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+@router.post(
+    "/query/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Submit Research Query (Streaming)",
+    description="Streaming variant of POST /research/query. Returns a text/event-stream with "
+                "progress events as the workflow runs: `start`, `router` (routing decision), "
+                "`agent_complete` (each agent's partial data), `report_token` (report tokens "
+                "as the model generates them), then `done` with the same payload as the "
+                "non-streaming endpoint, or `error`. `start` and `error` carry the `session_id` "
+                "and `request_id` to send again to resume a failed request.",
+    responses={
+        200: {
+            "description": "Event stream of research progress",
+            "content": {"text/event-stream": {}}
+        }
+    }
+)
+async def stream_research_query_endpoint(request: ResearchQueryRequest) -> StreamingResponse:
+    """
+    Submit a research query and stream progress events.
+
+    Args:
+        request: ResearchQueryRequest with query and optional session_id/request_id
+
+    Returns:
+        StreamingResponse emitting Server-Sent Events
+    """
+    session_id = request.session_id or str(uuid.uuid4())
+    request_id = request.request_id or uuid.uuid4().hex
+
+    logger.info(f"Processing streaming research query for session {session_id}: {request.query[:50]}...")
+
+    async def event_stream() -> AsyncIterator[str]:
+        # Emit immediately so the client gets its first byte before any agent runs
+        yield _format_sse("start", {
+            "session_id": session_id,
+            "request_id": request_id,
+            "query": request.query
+        })
+
+        try:
+            from backend.agents.graph import stream_research_query
+
+            async for event, data in stream_research_query(session_id, request.query, request_id):
+                if event == "final_state":
+                    try:
+                        response = await _build_research_response(session_id, request.query, data)
+                    finally:
+                        # The run finished and its checkpoints are gone: no retry can resolve these handles
+                        artifact_store.release(request_id)
+                    yield _format_sse("done", response.model_dump(mode="json"))
+                elif event == "agent_complete" and data["agent"] == "visualization":
+                    update = dict(data["data"])
+                    update["visualization_data"] = artifact_store.resolve(update.get("visualization_data", []))
+                    yield _format_sse(event, {"agent": "visualization", "data": update})
+                else:
+                    yield _format_sse(event, data)
+
+        except HTTPException as e:
+            yield _format_sse("error", {
+                "status_code": e.status_code,
+                "detail": e.detail,
+                "session_id": session_id,
+                "request_id": request_id
+            })
+
+        except Exception as e:
+            logger.error(f"Error streaming research query: {e}", exc_info=True)
+            yield _format_sse("error", {
+                "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "detail": f"Failed to process research query: {str(e)}",
+                "session_id": session_id,
+                "request_id": request_id
+            })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering (nginx)
+        }
+    )
+
+
 @router.post(
     "/deep-analysis/{ticker}",
     status_code=status.HTTP_202_ACCEPTED,
@@ -246,6 +419,8 @@ async def request_deep_analysis(ticker: str):
         HTTPException: 400 if ticker invalid or data already exists, 500 for errors
     """
     try:
+        from backend.rag.pipeline import rag_pipeline
+
         ticker = ticker.upper()
 
         logger.info(f"Received deep analysis request for {ticker}")
@@ -337,6 +512,8 @@ async def check_deep_analysis_status(ticker: str):
         HTTPException: 500 for errors
     """
     try:
+        from backend.rag.pipeline import rag_pipeline
+
         ticker = ticker.upper()
         available = await rag_pipeline.has_deep_analysis_data(ticker)
 
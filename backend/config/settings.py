@@ -33,6 +33,79 @@ class Settings(BaseSettings):
     api_host: str = "0.0.0.0"
     api_port: int = 8000
 
+    # Router fast path (keyword classifier ahead of the intent LLM)
+    router_fast_path_enabled: bool = True
+    router_fast_path_confidence: float = 0.85  # Minimum confidence to skip the LLM
+    router_fast_path_shadow_rate: float = 0.05  # Fraction of fast-path decisions re-checked by the LLM
+
+    # LLM gateway (shared OpenAI connection pool and rate budgets)
+    llm_max_connections: int = 50
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry: float = 30.0  # Seconds an idle connection is kept open
+    llm_http2: bool = True  # Falls back to HTTP/1.1 if the h2 package is missing
+    llm_request_timeout: float = 60.0
+    llm_max_retries: int = 4
+    llm_requests_per_minute: int = 500  # Shared across all agents
+    llm_tokens_per_minute: int = 150000  # Shared across all agents
+
+    # Model tiering and hedged requests (tier per call site lives in services/llm_gateway.py)
+    openai_fast_model: str = "gpt-4o-mini"  # Router, sentiment, snapshot
+    llm_hedging_enabled: bool = True
+    llm_hedge_percentile: float = 0.95  # Hedge calls slower than this latency percentile
+    llm_hedge_min_samples: int = 20  # Latencies needed per call site before hedging
+    llm_hedge_min_delay: float = 0.5  # Seconds
+    llm_hedge_max_rate: float = 0.1  # Max fraction of a call site's recent calls that are hedged
+
+    # LLM response cache (per-call-site TTLs live in services/llm_cache.py)
+    llm_cache_enabled: bool = True
+    llm_cache_backend: str = "disk"  # "disk" or "mongo"
+    llm_cache_dir: str = "./data/llm_cache"
+
+    # Embedding backend ("openai", or "onnx"/"hashing" to embed locally on CPU)
+    embedding_backend: str = "openai"
+    local_embedding_dim: int = 384  # Hashing backend vector size
+    local_embedding_batch_size: int = 256  # Texts per local inference call
+
+    # Embedding caches
+    query_embedding_cache_enabled: bool = True
+    query_embedding_cache_size: int = 2048  # Query vectors kept in memory
+    query_embedding_cache_ttl_seconds: int = 7 * 24 * 3600
+    query_embedding_cache_persist: bool = False  # Also keep query vectors in the SQLite file
+    embedding_cache_path: str = "./data/embedding_cache.sqlite3"
+    chunk_embedding_cache_enabled: bool = True  # Skip re-embedding unchanged chunks on ingestion
+    chunk_embedding_cache_dtype: str = "float32"  # "float16" halves the file size
+
+    # Embedding batching (OpenAI limits: 2048 inputs and 300k tokens per request)
+    embedding_batch_max_inputs: int = 512
+    embedding_batch_max_tokens: int = 100000
+    embedding_max_concurrency: int = 4  # Batches in flight per embed_batch call
+
+    # Sentiment analysis
+    sentiment_batch_enabled: bool = True  # One structured call for several tickers
+    sentiment_batch_max_prompt_tokens: int = 6000  # Split batches above this prompt size
+
+    # Report generation
+    report_combined_completion: bool = False  # One JSON-schema completion for report + snapshot
+    report_max_prompt_tokens: int = 4000  # Low-priority sections are trimmed above this
+    report_template_price_queries: bool = True  # Render simple price queries without the LLM
+
+    # Market data
+    market_data_prefetch_enabled: bool = True  # Prefetch stock/analyst data once tickers resolve
+
+    # Session working set (reuse of the previous turn's agent outputs)
+    working_set_enabled: bool = True
+    working_set_ticker_ttl_seconds: int = 1800  # Follow-ups may reuse tickers this long
+    working_set_max_sessions: int = 1000
+
+    # Startup
+    warm_research_graph_on_startup: bool = True  # Build agents/graph in the background
+
+    # Graph checkpointing (resume interrupted requests)
+    graph_checkpointer: str = "memory"  # "none", "memory" or "mongo"
+    graph_checkpoint_ttl_seconds: int = 3600  # Expiry of unfinished runs' checkpoints
+    graph_checkpoint_max_threads: int = 1000  # In-memory: unfinished runs kept at most
+    artifact_ttl_seconds: int = 3900  # Outlives checkpoints so resumed runs still resolve their artifacts
+
     # Session Management
     session_expire_minutes: int = 30
     session_secret_key: str
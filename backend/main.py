@@ -3,16 +3,34 @@ FastAPI application entry point for Multi-Agent Investment Research System.
 Phase 5: REST API endpoints with multi-agent research workflow.
 """
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
+import asyncio
 import logging
+import sys
 
 # Import routers
 from backend.api.routes import research
 
 # Import database services
+from backend.config.settings import settings
 from backend.services.database import mongodb
 from backend.memory.conversation import conversation_memory
+from backend.memory.write_behind import conversation_writer
+from backend.services.metrics import metrics
+from backend.services.llm_cache import llm_response_cache
+from backend.services.artifact_store import artifact_store
+from backend.memory.working_set import session_working_set
+
+# Heavy modules (research graph, agents, OpenAI client) are loaded lazily;
+# health and shutdown only look at them once something has imported them
+GRAPH_MODULE = "backend.agents.graph"
+LLM_GATEWAY_MODULE = "backend.services.llm_gateway"
+YAHOO_FINANCE_MODULE = "backend.services.yahoo_finance"
+EMBEDDING_CACHE_MODULE = "backend.rag.embedding_cache"
+EMBEDDINGS_MODULE = "backend.rag.embeddings"
+ROUTER_AGENT_MODULE = "backend.agents.router_agent"
 
 # Configure logging
 logging.basicConfig(
@@ -48,12 +66,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Session-ID", "X-Request-ID"],  # Let clients resume failed requests
 )
 
 
+def _loaded(module_name: str, attr: str):
+    """
+    Get an attribute of an already imported module without importing it.
+
+    Returns None if the module is not loaded (or still being imported by
+    the warm-up thread).
+    """
+    module = sys.modules.get(module_name)
+    return getattr(module, attr, None) if module is not None else None
+
+
+# Background warm-up task (kept referenced so it is not garbage collected)
+_graph_warmup_task = None
+
+
+def _build_research_graph():
+    """Import and compile the research graph (runs in a worker thread)."""
+    from backend.agents.graph import get_research_graph
+    get_research_graph()
+
+
+async def _warm_research_graph():
+    """Build the research graph off the event loop after startup."""
+    try:
+        await asyncio.to_thread(_build_research_graph)
+        logger.info("✅ Research graph warmed up")
+    except Exception as e:
+        # The first research request will retry the build
+        logger.error(f"❌ Research graph warm-up failed: {e}")
+
+
 @app.on_event("startup")
 async def startup_event():
     """Run on application startup."""
+    global _graph_warmup_task
+
     logger.info("=" * 60)
     logger.info("Starting Multi-Agent Investment Research System")
     logger.info("Phase 5: REST API with Multi-Agent Workflow")
@@ -68,6 +120,17 @@ async def startup_event():
         await conversation_memory.create_indexes()
         logger.info("✅ MongoDB indexes created")
 
+        # LLM response cache TTL index (mongo backend only)
+        await llm_response_cache.create_indexes()
+
+        # Start background conversation writer
+        conversation_writer.start()
+
+        # Load agents and compile the graph in the background so the API
+        # (and /health) is available immediately
+        if settings.warm_research_graph_on_startup:
+            _graph_warmup_task = asyncio.create_task(_warm_research_graph())
+
         logger.info("=" * 60)
         logger.info("🚀 System ready! API docs available at /docs")
         logger.info("=" * 60)
@@ -85,6 +148,16 @@ async def shutdown_event():
     logger.info("=" * 60)
 
     try:
+        # Flush pending conversation writes before closing MongoDB
+        await conversation_writer.stop()
+        logger.info(f"✅ Conversation writer stopped (stats: {conversation_writer.stats})")
+
+        # Close shared OpenAI connection pool (if it was ever loaded)
+        llm_gateway = _loaded(LLM_GATEWAY_MODULE, "llm_gateway")
+        if llm_gateway is not None:
+            await llm_gateway.aclose()
+            logger.info(f"✅ LLM gateway closed (stats: {llm_gateway.stats})")
+
         # Close MongoDB connection
         await mongodb.close()
         logger.info("✅ MongoDB connection closed")
@@ -120,9 +193,11 @@ async def root():
         "endpoints": {
             "docs": "/docs",
             "research_query": "POST /api/research/query",
+            "research_query_stream": "POST /api/research/query/stream",
             "conversation_history": "GET /api/research/history/{session_id}",
             "list_sessions": "GET /api/research/sessions",
-            "health": "GET /health"
+            "health": "GET /health",
+            "metrics": "GET /metrics"
         }
     }
 
@@ -138,6 +213,16 @@ async def health_check():
         # Check MongoDB health
         mongo_healthy = await mongodb.health_check()
 
+        is_graph_ready = _loaded(GRAPH_MODULE, "is_research_graph_ready")
+        graph_ready = is_graph_ready is not None and is_graph_ready()
+        llm_gateway = _loaded(LLM_GATEWAY_MODULE, "llm_gateway")
+        yahoo_finance = _loaded(YAHOO_FINANCE_MODULE, "yahoo_finance")
+        query_embedding_cache = _loaded(EMBEDDING_CACHE_MODULE, "query_embedding_cache")
+        chunk_embedding_cache = _loaded(EMBEDDING_CACHE_MODULE, "chunk_embedding_cache")
+        embedding_service = _loaded(EMBEDDINGS_MODULE, "embedding_service")
+        router_agent = _loaded(ROUTER_AGENT_MODULE, "router_agent")
+        agreement_rate = router_agent.get_agreement_rate() if router_agent is not None else None
+
         return {
             "status": "healthy" if mongo_healthy else "degraded",
             "timestamp": datetime.utcnow().isoformat(),
@@ -145,8 +230,54 @@ async def health_check():
             "phase": "5",
             "components": {
                 "mongodb": "healthy" if mongo_healthy else "unhealthy",
-                "api": "healthy"
-            }
+                "api": "healthy",
+                "research_graph": "ready" if graph_ready else "loading"
+            },
+            "conversation_writer": {
+                "running": conversation_writer.is_running,
+                "queue_depth": conversation_writer.queue_depth,
+                **conversation_writer.stats
+            },
+            "llm_gateway": {
+                "prompt_cache_ratio": round(llm_gateway.prompt_cache_ratio, 3),
+                **llm_gateway.stats
+            } if llm_gateway is not None else None,
+            "router_fast_path": {
+                "agreement_rate": round(agreement_rate, 3) if agreement_rate is not None else None,
+                **router_agent.fast_path_stats
+            } if router_agent is not None else None,
+            "market_data_prefetch": {
+                "hit_ratio": round(yahoo_finance.prefetch_hit_ratio, 3),
+                **yahoo_finance.stats
+            } if yahoo_finance is not None else None,
+            "session_working_set": {
+                "sessions": session_working_set.session_count,
+                **session_working_set.stats
+            },
+            "artifact_store": {
+                "requests_held": artifact_store.request_count,
+                **artifact_store.stats
+            },
+            "llm_cache": {
+                "backend": llm_response_cache.backend,
+                "hit_ratio": round(llm_response_cache.hit_ratio, 3),
+                **llm_response_cache.stats
+            },
+            "query_embedding_cache": {
+                "size": query_embedding_cache.size,
+                "hit_ratio": round(query_embedding_cache.hit_ratio, 3),
+                **query_embedding_cache.stats
+            } if query_embedding_cache is not None else None,
+            "chunk_embedding_cache": {
+                "hit_ratio": round(chunk_embedding_cache.hit_ratio, 3),
+                **chunk_embedding_cache.stats
+            } if chunk_embedding_cache is not None else None,
+            "embeddings": {
+                "backend": embedding_service.backend.name,
+                "model": embedding_service.model,
+                "avg_query_ms": round(embedding_service.avg_query_ms, 2),
+                **embedding_service.stats
+            } if embedding_service is not None else None
         }
 
     except Exception as e:
@@ -159,6 +290,48 @@ async def health_check():
         }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Prometheus metrics endpoint.
+
+    Exposes per-node latency and token histograms labelled by intent,
+    conversation write-behind queue depth and the router's fast-path
+    decisions with their agreement rate against the LLM.
+    """
+    metrics.gauge(
+        "conversation_writer_queue_depth",
+        "Conversation writes waiting to be persisted"
+    ).set(conversation_writer.queue_depth)
+
+    router_agent = _loaded(ROUTER_AGENT_MODULE, "router_agent")
+    if router_agent is not None:
+        decisions = metrics.gauge(
+            "router_intent_decisions",
+            "Router intent decisions by path (fast_path, llm, rechecks)",
+            label_names=("path",)
+        )
+        for path in ("fast_path", "llm", "rechecks"):
+            decisions.set(router_agent.fast_path_stats[path], path=path)
+
+        metrics.gauge(
+            "router_fast_path_comparisons",
+            "Fast-path classifier decisions checked against the LLM"
+        ).set(router_agent.fast_path_stats["comparisons"])
+
+        agreement_rate = router_agent.get_agreement_rate()
+        if agreement_rate is not None:
+            metrics.gauge(
+                "router_fast_path_agreement_rate",
+                "Fraction of checked fast-path decisions that matched the LLM"
+            ).set(agreement_rate)
+
+    return PlainTextResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
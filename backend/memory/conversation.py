@@ -114,6 +114,54 @@ class ConversationMemory:
         else:
             logger.info(f"Saved {role} message to session {session_id}")
 
+    async def save_messages(
+        self,
+        session_id: str,
+        messages: List[Dict]
+    ):
+        """
+        Append several messages to a session in a single upsert.
+
+        Creates the session document if it does not exist yet, so no separate
+        insert or retry round-trip is needed.
+
+        Args:
+            session_id: Session identifier
+            messages: List of dicts with 'role', 'content' and optional 'timestamp'
+        """
+        if not messages:
+            return
+
+        collection = await self._get_collection()
+        now = datetime.utcnow()
+
+        message_docs = [
+            {
+                "role": message["role"],
+                "content": message["content"],
+                "timestamp": message.get("timestamp") or now
+            }
+            for message in messages
+        ]
+
+        await collection.update_one(
+            {"session_id": session_id},
+            {
+                "$push": {"messages": {"$each": message_docs}},
+                "$set": {
+                    "updated_at": now,
+                    "expires_at": now + timedelta(hours=24)  # TTL
+                },
+                "$setOnInsert": {
+                    "user_id": None,
+                    "created_at": now
+                }
+            },
+            upsert=True
+        )
+
+        logger.info(f"Saved {len(message_docs)} messages to session {session_id}")
+
     async def get_conversation(
         self,
         session_id: str,
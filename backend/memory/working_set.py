@@ -0,0 +1,178 @@
+"""
+Session working set: the last turn's tickers and specialist agent outputs.
+
+Follow-up questions in a session usually concern the same tickers, so the
+market data, analyst consensus and sentiment fetched on the previous turn
+are reused while fresh instead of being fetched again. Kept in process
+memory; a session served by another worker simply misses.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+import time
+
+from backend.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# State fields written by each reusable agent
+AGENT_OUTPUTS: Dict[str, tuple] = {
+    "market_data": ("market_data", "peer_valuation"),
+    "forward_looking": ("analyst_consensus",),
+    "sentiment": ("sentiment_analysis",),
+}
+
+# How long each agent's output stays fresh (seconds)
+AGENT_TTLS: Dict[str, int] = {
+    "market_data": 300,        # Same as the Yahoo Finance cache
+    "forward_looking": 900,    # Analyst targets move slowly
+    "sentiment": 900,          # News flow within a conversation
+}
+
+
+class SessionWorkingSet:
+    """
+    Per-session cache of tickers and agent outputs with freshness timestamps.
+
+    Outputs are only reused for the exact same ticker list, so a follow-up
+    that adds or drops a ticker re-runs the agents.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = settings.working_set_max_sessions,
+        ticker_ttl: int = settings.working_set_ticker_ttl_seconds,
+        enabled: bool = settings.working_set_enabled
+    ):
+        """
+        Initialize working set.
+
+        Args:
+            max_sessions: Sessions kept (least recently used are dropped)
+            ticker_ttl: Seconds a session's tickers stay usable for follow-ups
+            enabled: Global switch
+        """
+        self.max_sessions = max_sessions
+        self.ticker_ttl = ticker_ttl
+        self.enabled = enabled
+        # {session_id: {"tickers": [...], "tickers_at": ts, "outputs": {agent: {...}}}}
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        # Metrics
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "ticker_reuses": 0,
+            "recorded": 0
+        }
+
+    @property
+    def session_count(self) -> int:
+        """Number of sessions with a working set."""
+        return len(self._sessions)
+
+    def last_tickers(self, session_id: str) -> List[str]:
+        """
+        Tickers of the session's previous turn, if still fresh.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            Ticker list (empty if none or expired)
+        """
+        entry = self._get(session_id)
+        if not entry or time.time() - entry["tickers_at"] > self.ticker_ttl:
+            return []
+
+        self.stats["ticker_reuses"] += 1
+        return list(entry["tickers"])
+
+    def get_fresh_outputs(
+        self,
+        session_id: str,
+        tickers: List[str],
+        agents: Iterable[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up reusable outputs for the given agents.
+
+        Args:
+            session_id: Session identifier
+            tickers: Tickers of the current turn
+            agents: Agents the router is about to dispatch
+
+        Returns:
+            {agent: state updates} for agents whose output is still fresh
+        """
+        entry = self._get(session_id)
+        outputs = entry["outputs"] if entry else {}
+        now = time.time()
+        fresh = {}
+
+        for agent in agents:
+            if agent not in AGENT_OUTPUTS:
+                continue
+
+            cached = outputs.get(agent)
+            if cached and cached["tickers"] == sorted(tickers) and now - cached["at"] < AGENT_TTLS[agent]:
+                fresh[agent] = cached["data"]
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+
+        return fresh
+
+    def record(self, session_id: str, state: Dict[str, Any]):
+        """
+        Store the tickers and the outputs of agents that ran this turn.
+
+        Outputs reused from the working set are not re-recorded, so their
+        original timestamp keeps counting down.
+
+        Args:
+            session_id: Session identifier
+            state: Final state of the turn
+        """
+        if not self.enabled:
+            return
+
+        tickers = state.get("tickers") or []
+        if not tickers:
+            return
+
+        entry = self._sessions.get(session_id)
+        if entry is None or entry["tickers"] != tickers:
+            # Different tickers: previous outputs cannot be reused anymore
+            entry = {"outputs": {}}
+        entry["tickers"] = list(tickers)
+        entry["tickers_at"] = time.time()
+
+        executed = set(state.get("executed_agents", []))
+        errors = state.get("agent_errors", {})
+        for agent, fields in AGENT_OUTPUTS.items():
+            if agent in executed and agent not in errors:
+                entry["outputs"][agent] = {
+                    "tickers": sorted(tickers),
+                    "at": time.time(),
+                    "data": {field: state.get(field, []) for field in fields}
+                }
+                self.stats["recorded"] += 1
+
+        self._sessions[session_id] = entry
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def _get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled or not session_id:
+            return None
+
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            self._sessions.move_to_end(session_id)
+        return entry
+
+
+# Singleton instance
+session_working_set = SessionWorkingSet()
@@ -0,0 +1,197 @@
+"""
+Write-behind queue for conversation persistence.
+Moves MongoDB conversation writes off the request's critical path.
+"""
+from typing import Dict, List, Optional
+from datetime import datetime
+import asyncio
+import logging
+
+from backend.memory.conversation import conversation_memory
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationWriteBehind:
+    """
+    Background writer for conversation messages.
+
+    - Requests enqueue (session_id, messages) and return immediately
+    - A worker task persists each entry with one batched upsert
+    - Failed writes are retried with exponential backoff
+    - stop() drains the queue on shutdown so accepted writes are not lost
+    - When the worker is not running (CLI scripts) or the queue is full,
+      writes happen inline instead of being dropped
+    """
+
+    def __init__(self, max_queue_size: int = 1000, max_retries: int = 3):
+        """
+        Initialize write-behind queue.
+
+        Args:
+            max_queue_size: Queue capacity before falling back to inline writes
+            max_retries: Write attempts per entry before giving up
+        """
+        self.memory = conversation_memory
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Pending writes per session, so readers can wait for their own writes
+        self._pending: Dict[str, int] = {}
+        self._session_idle: Dict[str, asyncio.Event] = {}
+
+        # Metrics
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "failed": 0,
+            "inline_writes": 0,
+            "max_queue_depth": 0
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of entries waiting to be written."""
+        return self._queue.qsize() if self._queue else 0
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the background worker is running."""
+        return self._worker is not None and not self._worker.done()
+
+    def start(self):
+        """Start the background worker (call from a running event loop)."""
+        if self.is_running:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._worker = asyncio.create_task(self._run())
+        logger.info("✅ Conversation write-behind worker started")
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Drain pending writes and stop the worker.
+
+        Args:
+            timeout: Maximum seconds to wait for the queue to drain
+        """
+        if not self.is_running:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            logger.info("✅ Conversation write-behind queue drained")
+        except asyncio.TimeoutError:
+            logger.error(
+                f"❌ Write-behind drain timed out after {timeout}s, "
+                f"{self.queue_depth} entries not persisted"
+            )
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def submit(self, session_id: str, messages: List[Dict]):
+        """
+        Queue messages for persistence.
+
+        Args:
+            session_id: Session identifier
+            messages: List of dicts with 'role' and 'content'
+        """
+        # Stamp messages now so ordering reflects request time, not write time
+        now = datetime.utcnow()
+        messages = [{**message, "timestamp": message.get("timestamp") or now} for message in messages]
+
+        if self.is_running and not self._queue.full():
+            self._mark_pending(session_id)
+            self._queue.put_nowait((session_id, messages))
+            self.stats["enqueued"] += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.queue_depth)
+            return
+
+        # No worker or queue full: write inline rather than drop
+        if self.is_running:
+            logger.warning(f"Write-behind queue full ({self.queue_depth}), writing inline")
+        self.stats["inline_writes"] += 1
+        await self._write(session_id, messages)
+
+    async def wait_for_session(self, session_id: str, timeout: float = 1.0):
+        """
+        Wait until queued writes for a session are persisted.
+
+        Lets a follow-up query read its own previous turn.
+
+        Args:
+            session_id: Session identifier
+            timeout: Maximum seconds to wait
+        """
+        event = self._session_idle.get(session_id)
+        if event is None:
+            return
+
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out waiting for pending writes of session {session_id}")
+
+    async def _run(self):
+        """Worker loop: persist queued entries one at a time."""
+        while True:
+            session_id, messages = await self._queue.get()
+            try:
+                await self._write(session_id, messages)
+            finally:
+                self._mark_done(session_id)
+                self._queue.task_done()
+
+    async def _write(self, session_id: str, messages: List[Dict]):
+        """
+        Persist messages with retry and exponential backoff.
+
+        Args:
+            session_id: Session identifier
+            messages: Messages to append
+        """
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                await self.memory.save_messages(session_id, messages)
+                self.stats["written"] += 1
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.stats["failed"] += 1
+                    logger.error(
+                        f"❌ Failed to save conversation for session {session_id} "
+                        f"after {attempt} attempts: {e}"
+                    )
+                    return
+                logger.warning(f"Conversation write attempt {attempt} failed: {e}, retrying")
+                await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+
+    def _mark_pending(self, session_id: str):
+        """Track a queued write for a session."""
+        self._pending[session_id] = self._pending.get(session_id, 0) + 1
+        self._session_idle.setdefault(session_id, asyncio.Event()).clear()
+
+    def _mark_done(self, session_id: str):
+        """Track a completed write for a session."""
+        remaining = self._pending.get(session_id, 1) - 1
+        if remaining > 0:
+            self._pending[session_id] = remaining
+            return
+
+        self._pending.pop(session_id, None)
+        event = self._session_idle.pop(session_id, None)
+        if event:
+            event.set()
+
+
+# Singleton instance
+conversation_writer = ConversationWriteBehind()
@@ -2,7 +2,7 @@
 Document chunking utilities for RAG pipeline.
 Splits documents into optimal chunks for embedding and retrieval.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import tiktoken
 import logging
 
@@ -22,11 +22,18 @@ class DocumentChunker:
         """
         self.chunk_size = chunk_size
         self.overlap = overlap
-        self.encoding = tiktoken.get_encoding("cl100k_base")  # GPT-4 encoding
+        self._encoding = None
+
+    @property
+    def encoding(self):
+        """Tokenizer (loaded on first use; may download the BPE file)."""
+        if self._encoding is None:
+            self._encoding = tiktoken.get_encoding("cl100k_base")  # GPT-4 encoding
+        return self._encoding
 
     def count_tokens(self, text: str) -> int:
         """Count tokens in text."""
-        return len(self.encoding.encode(text))
+        return len(self.encoding.encode_ordinary(text))
 
     def chunk_text(
         self,
@@ -45,35 +52,59 @@ class DocumentChunker:
         Returns:
             List of text chunks
         """
+        return [chunk for chunk, _, _ in self.chunk_spans(text, chunk_size, overlap)]
+
+    def chunk_spans(
+        self,
+        text: str,
+        chunk_size: Optional[int] = None,
+        overlap: Optional[int] = None,
+        tokens: Optional[List[int]] = None
+    ) -> List[Tuple[str, int, int]]:
+        """
+        Split text into overlapping chunks, keeping each chunk's token span.
+
+        The text is encoded once; a chunk's token count is the length of its
+        span (end - start), so callers never need to re-tokenize chunks.
+
+        Args:
+            text: Text to chunk
+            chunk_size: Override default chunk size
+            overlap: Override default overlap
+            tokens: Tokens of `text`, if already encoded
+
+        Returns:
+            List of (chunk text, start token, end token)
+        """
         chunk_size = chunk_size or self.chunk_size
         overlap = overlap or self.overlap
 
         # Encode text to tokens
-        tokens = self.encoding.encode(text)
+        if tokens is None:
+            tokens = self.encoding.encode_ordinary(text)
         total_tokens = len(tokens)
 
         if total_tokens <= chunk_size:
-            return [text]
+            return [(text, 0, total_tokens)]
 
-        chunks = []
+        spans = []
         start = 0
 
         while start < total_tokens:
             # Get chunk of tokens
             end = min(start + chunk_size, total_tokens)
-            chunk_tokens = tokens[start:end]
-
-            # Decode back to text
-            chunk_text = self.encoding.decode(chunk_tokens)
-            chunks.append(chunk_text)
+            spans.append((start, end))
 
             # Move start position with overlap
             if end >= total_tokens:
                 break
             start = end - overlap
 
+        # Decode back to text
+        chunks = self.encoding.decode_batch([tokens[start:end] for start, end in spans])
+
         logger.info(f"✅ Chunked text into {len(chunks)} chunks ({total_tokens} tokens total)")
-        return chunks
+        return [(chunk, start, end) for chunk, (start, end) in zip(chunks, spans)]
 
     def chunk_by_section(self, sections: Dict[str, str]) -> List[Dict[str, Any]]:
         """
@@ -86,19 +117,21 @@ class DocumentChunker:
             List of dicts with chunk data including section metadata
         """
         all_chunks = []
+        section_tokens = self.encoding.encode_ordinary_batch(list(sections.values()))
 
-        for section_name, section_text in sections.items():
+        for (section_name, section_text), tokens in zip(sections.items(), section_tokens):
             # Chunk this section
-            chunks = self.chunk_text(section_text)
+            chunks = self.chunk_spans(section_text, tokens=tokens)
 
             # Add metadata to each chunk
-            for i, chunk in enumerate(chunks):
+            for i, (chunk, start, end) in enumerate(chunks):
                 all_chunks.append({
                     "text": chunk,
                     "section": section_name,
                     "chunk_index": i,
                     "total_chunks_in_section": len(chunks),
-                    "token_count": self.count_tokens(chunk)
+                    "token_start": start,
+                    "token_count": end - start
                 })
 
         logger.info(f"✅ Created {len(all_chunks)} chunks from {len(sections)} sections")
@@ -112,6 +145,7 @@ class DocumentChunker:
         doc_type: Optional[str] = None,
         date: Optional[str] = None,
         section: Optional[str] = None,
+        token_count: Optional[int] = None,
         **extra_metadata
     ) -> Dict[str, Any]:
         """
@@ -124,6 +158,7 @@ class DocumentChunker:
             doc_type: Type of document ("10-K", "news", "analysis", etc.)
             date: Document date (ISO format)
             section: Section name (if from structured document)
+            token_count: Token count of the chunk, if known from chunking
             **extra_metadata: Additional metadata fields
 
         Returns:
@@ -131,7 +166,7 @@ class DocumentChunker:
         """
         metadata = {
             "source": source,
-            "token_count": self.count_tokens(chunk),
+            "token_count": token_count if token_count is not None else self.count_tokens(chunk),
             "chunk_length": len(chunk)
         }
 
@@ -170,16 +205,17 @@ class DocumentChunker:
         Returns:
             List of dicts with 'text' and 'metadata' keys
         """
-        chunks = self.chunk_text(text)
+        chunks = self.chunk_spans(text)
 
         chunk_docs = []
-        for i, chunk in enumerate(chunks):
+        for i, (chunk, start, end) in enumerate(chunks):
             metadata = self.create_chunk_metadata(
                 chunk=chunk,
                 source=source,
                 ticker=ticker,
                 doc_type=doc_type,
                 date=date,
+                token_count=end - start,
                 chunk_index=i,
                 total_chunks=len(chunks)
             )
@@ -222,6 +258,7 @@ class DocumentChunker:
                 doc_type=filing_type,
                 date=filing_date,
                 section=chunk_data["section"],
+                token_count=chunk_data["token_count"],
                 chunk_index=chunk_data["chunk_index"]
             )
 
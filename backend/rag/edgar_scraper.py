@@ -19,15 +19,26 @@ class EDGARScraper:
     """Scraper for SEC EDGAR filings."""
 
     def __init__(self):
-        """Initialize EDGAR downloader with user agent."""
+        """Initialize scraper (the EDGAR downloader is created on first use)."""
         self.download_folder = Path("./data/edgar_filings")
-        self.download_folder.mkdir(parents=True, exist_ok=True)
+        self._downloader: Optional[Downloader] = None
 
-        self.downloader = Downloader(
-            company_name="InvestmentResearch",
-            email_address=settings.sec_edgar_user_agent.split()[-1],  # Extract email
-            download_folder=str(self.download_folder)
-        )
+    @property
+    def downloader(self) -> Downloader:
+        """
+        EDGAR downloader (created lazily).
+
+        Constructing it fetches SEC's ticker → CIK mapping over the network,
+        so it is deferred until a filing is actually downloaded.
+        """
+        if self._downloader is None:
+            self.download_folder.mkdir(parents=True, exist_ok=True)
+            self._downloader = Downloader(
+                company_name="InvestmentResearch",
+                email_address=settings.sec_edgar_user_agent.split()[-1],  # Extract email
+                download_folder=str(self.download_folder)
+            )
+        return self._downloader
 
     def download_filing(
         self,
@@ -0,0 +1,222 @@
+"""
+Embedding backends.
+
+EmbeddingService delegates the actual vector computation to a backend:
+
+- "openai": text-embedding-3-small through the shared LLM gateway (default)
+- "onnx": all-MiniLM-L6-v2 on CPU with the ONNX runtime bundled by chromadb
+  (no network after the one-time model download)
+- "hashing": deterministic feature-hashing embedder (numpy only), for tests
+  and offline runs of the pipeline
+
+Vectors of different backends live in different spaces and must never be
+compared; each backend exposes a `space` id that is recorded on the Chroma
+collection it writes to.
+"""
+from functools import lru_cache
+from typing import List, Optional
+import asyncio
+import hashlib
+import logging
+import re
+
+import numpy as np
+
+from backend.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Output dimensions of the OpenAI embedding models
+OPENAI_EMBEDDING_DIMS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+# Input limit per request of the OpenAI embeddings API
+OPENAI_MAX_INPUTS = 2048
+
+_TOKEN = re.compile(r"\w+")
+
+
+class EmbeddingBackend:
+    """
+    Base class for embedding backends.
+
+    Subclasses set `name`, `model` and `dimension` and implement `embed`.
+    """
+
+    name: str = ""
+    model: str = ""
+    dimension: int = 0
+    max_batch_inputs: int = 256  # Texts per embed() call
+    max_batch_tokens: Optional[int] = None  # None: batches are not token-limited
+    max_concurrency: int = 1  # Batches in flight (local inference already uses all cores)
+    cost_per_million_tokens: float = 0.0
+
+    @property
+    def space(self) -> str:
+        """Identifier of the vector space (backend, model and dimension)."""
+        return f"{self.name}:{self.model}:{self.dimension}"
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed one batch of texts.
+
+        Args:
+            texts: Texts to embed (at most `max_batch_inputs`)
+
+        Returns:
+            One vector per text, in order
+        """
+        raise NotImplementedError
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """OpenAI embeddings API through the shared LLM gateway."""
+
+    name = "openai"
+    max_batch_tokens = settings.embedding_batch_max_tokens
+    cost_per_million_tokens = 0.02  # text-embedding-3-small
+
+    def __init__(self, model: str = settings.openai_embedding_model):
+        """
+        Initialize backend.
+
+        Args:
+            model: OpenAI embedding model
+        """
+        from backend.services.llm_gateway import llm_gateway
+
+        self.llm = llm_gateway
+        self.model = model
+        self.dimension = OPENAI_EMBEDDING_DIMS.get(model, 1536)
+        self.max_batch_inputs = min(settings.embedding_batch_max_inputs, OPENAI_MAX_INPUTS)
+        self.max_concurrency = settings.embedding_max_concurrency
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        # Retries and rate limiting are handled by the gateway
+        response = await self.llm.embeddings(model=self.model, input=texts)
+        return [item.embedding for item in response.data]
+
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    """
+    all-MiniLM-L6-v2 (384 dimensions) on CPU via chromadb's ONNX runtime.
+
+    The model truncates inputs at 256 word pieces, so long chunks are
+    embedded from their beginning only.
+    """
+
+    name = "onnx"
+    model = "all-MiniLM-L6-v2"
+    dimension = 384
+
+    def __init__(self):
+        """Initialize backend (the model is loaded on first use)."""
+        self.max_batch_inputs = settings.local_embedding_batch_size
+        self._function = None
+
+    @property
+    def function(self):
+        """chromadb ONNX embedding function (downloads the model once)."""
+        if self._function is None:
+            from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+
+            self._function = ONNXMiniLM_L6_V2(preferred_providers=["CPUExecutionProvider"])
+        return self._function
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        # Inference is CPU-bound: keep it off the event loop
+        vectors = await asyncio.to_thread(self.function, texts)
+        return np.asarray(vectors, dtype=np.float32).tolist()
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """
+    Deterministic feature-hashing embedder.
+
+    Word unigrams and bigrams are hashed (blake2b, stable across processes)
+    into signed buckets and the vector is L2-normalized, so texts sharing
+    words have a positive cosine similarity. No model, no network: meant for
+    tests and offline development, not for retrieval quality.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dimension: int = settings.local_embedding_dim):
+        """
+        Initialize backend.
+
+        Args:
+            dimension: Vector size
+        """
+        self.model = f"hashing-v1-{dimension}"
+        self.dimension = dimension
+        self.max_batch_inputs = settings.local_embedding_batch_size
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_sync(texts).tolist()
+
+    def embed_sync(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts into a (len(texts), dimension) float32 matrix.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Row-normalized matrix
+        """
+        rows, buckets = [], []
+        for row, text in enumerate(texts):
+            words = _TOKEN.findall(text.casefold())
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            rows.extend([row] * len(features))
+            buckets.extend(_feature_hash(feature) for feature in features)
+
+        hashes = np.asarray(buckets, dtype=np.uint64)
+        signs = np.where(hashes >> np.uint64(63), -1.0, 1.0).astype(np.float32)
+        columns = (hashes % np.uint64(self.dimension)).astype(np.intp)
+
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.intp), columns), signs)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+
+@lru_cache(maxsize=65536)
+def _feature_hash(feature: str) -> int:
+    """64-bit stable hash of a feature."""
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def create_embedding_backend(backend: str = settings.embedding_backend) -> EmbeddingBackend:
+    """
+    Create the embedding backend.
+
+    Args:
+        backend: "openai", "onnx" (needs chromadb's onnxruntime) or "hashing"
+
+    Returns:
+        Embedding backend
+    """
+    if backend == "openai":
+        return OpenAIEmbeddingBackend()
+
+    if backend == "onnx":
+        try:
+            import onnxruntime  # noqa: F401
+
+            logger.info("✅ Embeddings: local ONNX all-MiniLM-L6-v2")
+            return OnnxEmbeddingBackend()
+
+        except ImportError:
+            logger.warning("onnxruntime not installed, falling back to hashing embeddings")
+
+    elif backend != "hashing":
+        raise ValueError(f"Unknown embedding backend: {backend}")
+
+    logger.info("✅ Embeddings: local feature hashing")
+    return HashingEmbeddingBackend()
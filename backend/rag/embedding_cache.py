@@ -0,0 +1,391 @@
+"""
+Caches for embedding vectors.
+
+Retrieval embeds the same short texts over and over (the sentiment agent's
+fixed "Recent news and updates about {ticker}" query, repeated user
+questions). QueryEmbeddingCache keeps those vectors in an in-process
+LRU with a TTL, keyed by (model, normalized text), and can persist them in a
+local SQLite file so they survive restarts.
+
+Ingestion re-embeds the same chunks whenever a filing or overlapping news is
+ingested again. ChunkEmbeddingCache stores chunk vectors permanently in the
+same SQLite file, content-addressed by sha256(model + text).
+"""
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+from backend.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Keys per SELECT ... IN (...) (SQLite limits bound parameters)
+SQLITE_BATCH_SIZE = 500
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize a query for cache lookup.
+
+    Unicode NFKC, collapsed whitespace and casefolding, so queries that differ
+    only in spacing or case share one entry.
+
+    Args:
+        text: Query text
+
+    Returns:
+        Normalized text
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip().casefold()
+
+
+def make_embedding_key(model: str, text: str) -> str:
+    """
+    Hex SHA-256 of model and text.
+
+    Args:
+        model: Embedding model
+        text: Text (already normalized where applicable)
+
+    Returns:
+        Cache key
+    """
+    return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+
+class SQLiteVectorStore:
+    """
+    SQLite table of vectors stored as compact float32/float16 blobs, with an
+    optional expiry time.
+
+    Calls are synchronous; async callers run them in a worker thread.
+    """
+
+    def __init__(self, path: str, table: str, dtype: str = "float32"):
+        """
+        Initialize store (the database is opened on first use).
+
+        Args:
+            path: SQLite file
+            table: Table name
+            dtype: Storage precision, "float32" or "float16" (half the size)
+        """
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported embedding storage dtype: {dtype}")
+
+        self.path = Path(path)
+        self.table = table
+        self.dtype = np.dtype(dtype)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, expires_at REAL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[List[float], Optional[float]]]:
+        """(vector, expires_at), or None if missing or expired."""
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT vector, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return self._decode(row[0]), row[1]
+
+    def set(self, key: str, vector: List[float], expires_at: Optional[float]):
+        """Insert or replace a vector."""
+        self.set_many([(key, vector)], expires_at)
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up several vectors (expired ones are skipped).
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            {key: vector} for the keys found
+        """
+        found = {}
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(keys), SQLITE_BATCH_SIZE):
+                batch = keys[i:i + SQLITE_BATCH_SIZE]
+                rows = conn.execute(
+                    f"SELECT key, vector, expires_at FROM {self.table} "
+                    f"WHERE key IN ({', '.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for key, blob, expires_at in rows:
+                    if expires_at is None or expires_at >= now:
+                        found[key] = self._decode(blob)
+        return found
+
+    def set_many(self, items: Iterable[Tuple[str, List[float]]], expires_at: Optional[float] = None):
+        """
+        Insert or replace several vectors in one transaction.
+
+        Args:
+            items: (key, vector) pairs
+            expires_at: Expiry timestamp, None to keep forever
+        """
+        rows = [
+            (key, np.asarray(vector, dtype=self.dtype).tobytes(), expires_at)
+            for key, vector in items
+        ]
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, vector, expires_at) VALUES (?, ?, ?)",
+                rows
+            )
+            conn.commit()
+
+    def _decode(self, blob: bytes) -> List[float]:
+        return np.frombuffer(blob, dtype=self.dtype).astype(np.float32).tolist()
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class QueryEmbeddingCache:
+    """
+    LRU + TTL cache of query embeddings keyed by (model, normalized text).
+
+    Lookups check process memory first, then (if persistence is on) the
+    SQLite file; disk hits are promoted to memory.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = settings.query_embedding_cache_size,
+        ttl: int = settings.query_embedding_cache_ttl_seconds,
+        persist: bool = settings.query_embedding_cache_persist,
+        path: str = settings.embedding_cache_path,
+        enabled: bool = settings.query_embedding_cache_enabled
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Vectors kept in memory (least recently used are dropped)
+            ttl: Seconds a vector stays valid
+            persist: Also store vectors in the SQLite file
+            path: SQLite file used when persisting
+            enabled: Global switch
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self.store = SQLiteVectorStore(path, "query_embeddings") if persist else None
+        # {key: (vector, expires_at)}
+        self._entries: "OrderedDict[str, Tuple[List[float], float]]" = OrderedDict()
+
+        # Metrics
+        self.stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "errors": 0
+        }
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of lookups served from cache (memory or disk)."""
+        hits = self.stats["hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return hits / lookups if lookups else 0.0
+
+    @property
+    def size(self) -> int:
+        """Vectors held in memory."""
+        return len(self._entries)
+
+    async def get(self, model: str, text: str) -> Optional[List[float]]:
+        """
+        Look up a query embedding.
+
+        Args:
+            model: Embedding model
+            text: Query text (normalized here)
+
+        Returns:
+            Embedding vector, or None on miss/expiry
+        """
+        if not self.enabled:
+            return None
+
+        key = make_embedding_key(model, normalize_query(text))
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[0]
+            del self._entries[key]
+
+        if self.store is not None:
+            try:
+                stored = await asyncio.to_thread(self.store.get, key)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Query embedding cache read failed: {e}")
+                stored = None
+
+            if stored is not None:
+                vector, expires_at = stored
+                self.stats["disk_hits"] += 1
+                self._remember(key, vector, expires_at)
+                return vector
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, model: str, text: str, vector: List[float]):
+        """
+        Store a query embedding.
+
+        Args:
+            model: Embedding model
+            text: Query text (normalized here)
+            vector: Embedding vector
+        """
+        if not self.enabled:
+            return
+
+        key = make_embedding_key(model, normalize_query(text))
+        expires_at = time.time() + self.ttl
+        self._remember(key, vector, expires_at)
+        self.stats["writes"] += 1
+
+        if self.store is not None:
+            try:
+                await asyncio.to_thread(self.store.set, key, vector, expires_at)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Query embedding cache write failed: {e}")
+
+    def _remember(self, key: str, vector: List[float], expires_at: float):
+        self._entries[key] = (vector, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class ChunkEmbeddingCache:
+    """
+    Persistent, content-addressed cache of document chunk embeddings.
+
+    Keys are sha256(model + text), so a chunk is embedded once per model no
+    matter how often the document it came from is ingested. Entries never
+    expire: the vector of a given text and model does not change.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.embedding_cache_path,
+        dtype: str = settings.chunk_embedding_cache_dtype,
+        enabled: bool = settings.chunk_embedding_cache_enabled
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            path: SQLite file
+            dtype: Storage precision, "float32" or "float16"
+            enabled: Global switch
+        """
+        self.enabled = enabled
+        self.store = SQLiteVectorStore(path, f"chunk_embeddings_{dtype}", dtype)
+
+        # Metrics
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "errors": 0
+        }
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of chunk lookups served from cache."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    async def get_many(self, model: str, texts: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up chunk embeddings.
+
+        Args:
+            model: Embedding model
+            texts: Chunk texts
+
+        Returns:
+            {text: vector} for the texts found
+        """
+        if not self.enabled or not texts:
+            return {}
+
+        keys = {make_embedding_key(model, text): text for text in texts}
+        try:
+            found = await asyncio.to_thread(self.store.get_many, list(keys))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Chunk embedding cache read failed: {e}")
+            found = {}
+
+        vectors = {keys[key]: vector for key, vector in found.items()}
+        self.stats["hits"] += len(vectors)
+        self.stats["misses"] += len(keys) - len(vectors)
+        return vectors
+
+    async def set_many(self, model: str, vectors: Dict[str, List[float]]):
+        """
+        Store chunk embeddings.
+
+        Args:
+            model: Embedding model
+            vectors: {text: vector}
+        """
+        if not self.enabled or not vectors:
+            return
+
+        items = [(make_embedding_key(model, text), vector) for text, vector in vectors.items()]
+        try:
+            await asyncio.to_thread(self.store.set_many, items)
+            self.stats["writes"] += len(items)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Chunk embedding cache write failed: {e}")
+
+
+# Singleton instances
+query_embedding_cache = QueryEmbeddingCache()
+chunk_embedding_cache = ChunkEmbeddingCache()
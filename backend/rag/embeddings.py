@@ -1,31 +1,56 @@
 """
-OpenAI embedding service for generating vector embeddings.
-Uses text-embedding-3-small for cost-effective embeddings.
+Embedding service for generating vector embeddings.
+Uses OpenAI text-embedding-3-small by default, or a local CPU backend
+(see rag/embedding_backends.py).
 """
-from openai import AsyncOpenAI
-from typing import List, Dict, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 import asyncio
 import logging
-from tenacity import retry, stop_after_attempt, wait_exponential
+import time
 
-from backend.config.settings import settings
+from backend.rag.embedding_backends import EmbeddingBackend, create_embedding_backend
+from backend.rag.embedding_cache import chunk_embedding_cache, query_embedding_cache
+from backend.services.tokenizer import encoding_for
 
 logger = logging.getLogger(__name__)
 
 
 class EmbeddingService:
-    """Service for generating embeddings using OpenAI."""
-
-    def __init__(self):
-        """Initialize OpenAI client."""
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
-        self.model = settings.openai_embedding_model
-        self.embedding_dim = 1536  # text-embedding-3-small dimension
-
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10)
-    )
+    """Service for generating embeddings with a pluggable backend."""
+
+    def __init__(self, backend: Optional[EmbeddingBackend] = None):
+        """
+        Initialize embedding service.
+
+        Args:
+            backend: Embedding backend (default: EMBEDDING_BACKEND setting)
+        """
+        self.backend = backend or create_embedding_backend()
+        self.query_cache = query_embedding_cache
+        self.chunk_cache = chunk_embedding_cache
+
+        # Metrics (query embeddings computed by the backend, cache hits excluded)
+        self.stats = {
+            "queries_embedded": 0,
+            "query_embed_ms": 0.0
+        }
+
+    @property
+    def model(self) -> str:
+        """Embedding model of the backend (part of every cache key)."""
+        return self.backend.model
+
+    @property
+    def embedding_dim(self) -> int:
+        """Vector size of the backend."""
+        return self.backend.dimension
+
+    @property
+    def avg_query_ms(self) -> float:
+        """Mean latency of query embeddings computed by the backend."""
+        count = self.stats["queries_embedded"]
+        return self.stats["query_embed_ms"] / count if count else 0.0
+
     async def embed_text(self, text: str) -> List[float]:
         """
         Generate embedding for a single text.
@@ -37,65 +62,115 @@ class EmbeddingService:
             List of floats (embedding vector)
         """
         try:
-            response = await self.client.embeddings.create(
-                model=self.model,
-                input=text
-            )
-
-            embedding = response.data[0].embedding
-            return embedding
+            embeddings = await self.backend.embed([text])
+            return embeddings[0]
 
         except Exception as e:
             logger.error(f"❌ Failed to generate embedding: {e}")
             raise
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10)
-    )
     async def embed_batch(
         self,
         texts: List[str],
-        batch_size: int = 100
+        batch_size: Optional[int] = None,
+        token_counts: Optional[List[int]] = None,
+        checkpoint: Optional[Callable[[Dict[str, List[float]]], Awaitable[None]]] = None
     ) -> List[List[float]]:
         """
-        Generate embeddings for multiple texts in batches.
+        Generate embeddings for multiple texts in concurrent batches.
+
+        Texts are packed into batches of at most `batch_size` texts (and, for
+        OpenAI, EMBEDDING_BATCH_MAX_TOKENS tokens), with up to the backend's
+        `max_concurrency` batches in flight. A failed batch does not cancel
+        the others. `checkpoint` receives the vectors of every completed
+        batch, so a failed run keeps what succeeded.
 
         Args:
             texts: List of texts to embed
-            batch_size: Number of texts per API call (max 100 for OpenAI)
+            batch_size: Maximum texts per backend call (default: backend limit)
+            token_counts: Token count per text, if already known (only used
+                by token-limited backends)
+            checkpoint: Async callback called with {text: vector} per completed batch
 
         Returns:
             List of embedding vectors
-        """
-        all_embeddings = []
-
-        # Process in batches
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-
-            try:
-                response = await self.client.embeddings.create(
-                    model=self.model,
-                    input=batch
-                )
-
-                # Extract embeddings in order
-                batch_embeddings = [item.embedding for item in response.data]
-                all_embeddings.extend(batch_embeddings)
 
-                logger.info(f"✅ Generated embeddings for batch {i//batch_size + 1} ({len(batch)} texts)")
+        Raises:
+            Exception: First batch failure, after all batches have finished
+        """
+        max_tokens = self.backend.max_batch_tokens
+        if max_tokens is None:
+            token_counts = [0] * len(texts)  # Not needed to plan batches
+        elif token_counts is None:
+            token_counts = [len(tokens) for tokens in self.encoding.encode_ordinary_batch(texts)]
+
+        batches = self._plan_batches(token_counts, batch_size or self.backend.max_batch_inputs, max_tokens)
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        semaphore = asyncio.Semaphore(self.backend.max_concurrency)
+
+        async def run_batch(number: int, start: int, end: int):
+            batch = texts[start:end]
+            async with semaphore:
+                batch_embeddings = await self.backend.embed(batch)
+            embeddings[start:end] = batch_embeddings
+
+            if checkpoint is not None:
+                await checkpoint(dict(zip(batch, batch_embeddings)))
+
+            tokens = f", {sum(token_counts[start:end])} tokens" if max_tokens is not None else ""
+            logger.info(
+                f"✅ Generated embeddings for batch {number}/{len(batches)} "
+                f"({len(batch)} texts{tokens})"
+            )
 
-                # Small delay to avoid rate limits
-                if i + batch_size < len(texts):
-                    await asyncio.sleep(0.1)
+        outcomes = await asyncio.gather(
+            *(run_batch(number, start, end) for number, (start, end) in enumerate(batches, 1)),
+            return_exceptions=True
+        )
+
+        failures = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+        if failures:
+            logger.error(f"❌ {len(failures)}/{len(batches)} embedding batches failed: {failures[0]}")
+            raise failures[0]
+
+        logger.info(f"✅ Generated {len(embeddings)} total embeddings in {len(batches)} batches")
+        return embeddings
+
+    @property
+    def encoding(self):
+        """Tokenizer of the embedding model (loaded on first use)."""
+        return encoding_for(self.model)
+
+    @staticmethod
+    def _plan_batches(
+        token_counts: List[int],
+        max_inputs: int,
+        max_tokens: Optional[int]
+    ) -> List[Tuple[int, int]]:
+        """
+        Greedily pack consecutive texts into batches under both request limits.
 
-            except Exception as e:
-                logger.error(f"❌ Failed to generate batch embeddings: {e}")
-                raise
+        Args:
+            token_counts: Token count per text
+            max_inputs: Texts per batch
+            max_tokens: Tokens per batch (a larger single text gets its own batch),
+                None for no token limit
 
-        logger.info(f"✅ Generated {len(all_embeddings)} total embeddings")
-        return all_embeddings
+        Returns:
+            (start, end) index ranges
+        """
+        batches = []
+        start, tokens = 0, 0
+        for i, count in enumerate(token_counts):
+            if i > start and (
+                i - start >= max_inputs or (max_tokens is not None and tokens + count > max_tokens)
+            ):
+                batches.append((start, i))
+                start, tokens = i, 0
+            tokens += count
+        if start < len(token_counts):
+            batches.append((start, len(token_counts)))
+        return batches
 
     async def embed_document_chunks(
         self,
@@ -104,6 +179,11 @@ class EmbeddingService:
         """
         Generate embeddings for document chunks.
 
+        Chunks already embedded with this model (earlier ingestion of the same
+        filing, overlapping news) are taken from the chunk embedding cache;
+        only new texts are sent to the API. Each completed batch is written to
+        the cache right away, so a failed ingestion never pays for it twice.
+
         Args:
             chunks: List of dicts with 'text' and 'metadata' keys
 
@@ -112,38 +192,72 @@ class EmbeddingService:
         """
         # Extract texts
         texts = [chunk["text"] for chunk in chunks]
-
-        # Generate embeddings
-        embeddings = await self.embed_batch(texts)
+        unique_texts = list(dict.fromkeys(texts))
+
+        # Reuse cached vectors, embed the rest
+        vectors = await self.chunk_cache.get_many(self.model, unique_texts)
+        missing = [text for text in unique_texts if text not in vectors]
+
+        if missing:
+            # Token counts from the chunker avoid tokenizing the texts again
+            known_counts = {chunk["text"]: chunk.get("metadata", {}).get("token_count") for chunk in chunks}
+            token_counts = [known_counts[text] for text in missing]
+            if any(count is None for count in token_counts):
+                token_counts = None
+
+            new_embeddings = await self.embed_batch(
+                missing,
+                token_counts=token_counts,
+                checkpoint=lambda batch: self.chunk_cache.set_many(self.model, batch)
+            )
+            vectors.update(zip(missing, new_embeddings))
 
         # Add embeddings to chunks
         embedded_chunks = []
-        for chunk, embedding in zip(chunks, embeddings):
+        for chunk in chunks:
             embedded_chunks.append({
                 **chunk,
-                "embedding": embedding
+                "embedding": vectors[chunk["text"]]
             })
 
-        logger.info(f"✅ Embedded {len(embedded_chunks)} document chunks")
+        reused = len(unique_texts) - len(missing)
+        logger.info(
+            f"✅ Embedded {len(embedded_chunks)} document chunks "
+            f"({reused}/{len(unique_texts)} unique texts from cache, "
+            f"hit ratio {self.chunk_cache.hit_ratio:.1%} since start)"
+        )
         return embedded_chunks
 
     async def embed_query(self, query: str) -> List[float]:
         """
         Generate embedding for a search query.
 
+        Repeated queries (e.g. the sentiment agent's fixed per-ticker news
+        query) are served from the query embedding cache.
+
         Args:
             query: Search query text
 
         Returns:
             Query embedding vector
         """
-        return await self.embed_text(query)
+        embedding = await self.query_cache.get(self.model, query)
+        if embedding is not None:
+            return embedding
+
+        start = time.perf_counter()
+        embedding = await self.embed_text(query)
+        self.stats["queries_embedded"] += 1
+        self.stats["query_embed_ms"] += (time.perf_counter() - start) * 1000
+
+        await self.query_cache.set(self.model, query, embedding)
+        return embedding
 
     def get_embedding_cost(self, num_tokens: int) -> float:
         """
         Calculate cost for embeddings.
 
-        text-embedding-3-small: $0.02 per 1M tokens
+        text-embedding-3-small: $0.02 per 1M tokens; local backends are free.
 
         Args:
             num_tokens: Number of tokens to embed
@@ -151,7 +265,7 @@ class EmbeddingService:
         Returns:
             Cost in USD
         """
-        cost_per_million = 0.02
+        cost_per_million = self.backend.cost_per_million_tokens
         cost = (num_tokens / 1_000_000) * cost_per_million
         return cost
 
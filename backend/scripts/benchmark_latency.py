@@ -0,0 +1,351 @@
+"""
+Latency benchmark suite for the research workflow.
+
+Runs offline: every external dependency (MongoDB, OpenAI, Yahoo Finance) is
+replaced by a stub with injected latency, so the numbers isolate the effect
+of workflow topology and orchestration changes.
+
+The cold-start benchmark imports the real modules in fresh interpreters.
+The hedging benchmark drives the real LLM gateway against a stub client.
+The embedding benchmark compares a stubbed OpenAI round-trip with the real
+local backends (ONNX only if its model has already been downloaded).
+The chunking benchmark needs tiktoken's cl100k_base file (cached after the
+first download).
+
+Usage:
+    python -m backend.scripts.benchmark_latency
+"""
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Awaitable, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from langgraph.graph import StateGraph
+from langgraph.constants import START, END
+
+from backend.agents.state import AgentState, create_initial_state
+
+# Injected latencies (seconds), roughly matching observed production timings
+MONGO_READ_LATENCY = 0.08
+ROUTER_LATENCY = 0.40
+SPECIALIST_LATENCY = 0.30
+
+# Stubbed LLM latency per model: (base min, base max, tail probability, tail latency)
+LLM_LATENCY_PROFILES = {
+    "strong": (0.040, 0.060, 0.04, 1.00),
+    "fast": (0.020, 0.030, 0.04, 0.80),
+}
+
+NUM_RUNS = 10
+NUM_COLD_START_RUNS = 5
+NUM_LLM_WARMUP_CALLS = 50
+NUM_LLM_CALLS = 300
+LLM_CONCURRENCY = 20
+EMBEDDING_API_LATENCY = 0.15  # OpenAI embeddings round-trip
+NUM_EMBEDDING_QUERIES = 50
+CHUNKING_SECTION_WORDS = 20000  # Per section of the synthetic 10-K (5 sections)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+# Cold-start stages, each timed in a fresh interpreter (code, label)
+COLD_START_STAGES = [
+    ("import backend.main", "API app import"),
+    ("import backend.agents.graph", "graph module import"),
+    (
+        "from backend.agents.graph import get_research_graph; get_research_graph()",
+        "graph build (first request)"
+    ),
+]
+
+
+def _stub_node(name: str, latency: float, updates: Dict = None):
+    """Create an async graph node that sleeps for `latency` seconds."""
+    async def node(state: AgentState) -> AgentState:
+        await asyncio.sleep(latency)
+        return {**(updates or {}), "executed_agents": [name]}
+    return node
+
+
+def _build_router_stage_graph(parallel: bool):
+    """
+    Build the START → memory_loader/router → specialists slice of the graph.
+
+    Args:
+        parallel: Run memory_loader and router as parallel branches (current
+                  topology) instead of sequentially (previous topology)
+
+    Returns:
+        Compiled StateGraph
+    """
+    workflow = StateGraph(AgentState)
+    workflow.add_node("memory_loader", _stub_node("memory_loader", MONGO_READ_LATENCY))
+    workflow.add_node("router", _stub_node("router", ROUTER_LATENCY, {"intent": "price_query"}))
+    workflow.add_node("market_data", _stub_node("market_data", SPECIALIST_LATENCY))
+
+    if parallel:
+        workflow.add_node("router_join", lambda state: {})
+        workflow.add_edge(START, "memory_loader")
+        workflow.add_edge(START, "router")
+        workflow.add_edge(["memory_loader", "router"], "router_join")
+        workflow.add_edge("router_join", "market_data")
+    else:
+        workflow.add_edge(START, "memory_loader")
+        workflow.add_edge("memory_loader", "router")
+        workflow.add_edge("router", "market_data")
+
+    workflow.add_edge("market_data", END)
+    return workflow.compile()
+
+
+async def _time_runs(run: Callable[[], Awaitable], runs: int = NUM_RUNS) -> List[float]:
+    """Time `runs` sequential invocations of an async callable (ms)."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _print_comparison(title: str, results: Dict[str, List[float]]):
+    """Print p50/p95 latency per variant and the speedup of the last variant."""
+    print(f"\n{'='*60}")
+    print(title)
+    print(f"{'='*60}")
+
+    for variant, timings in results.items():
+        ordered = sorted(timings)
+        p50 = statistics.median(ordered)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        print(f"{variant:<28} p50={p50:8.1f} ms   p95={p95:8.1f} ms   p99={p99:8.1f} ms")
+
+    baseline, candidate = list(results.values())[0], list(results.values())[-1]
+    saved = statistics.median(baseline) - statistics.median(candidate)
+    print(f"{'Median saved':<28} {saved:8.1f} ms")
+
+
+async def benchmark_router_stage():
+    """Compare sequential vs parallel memory_loader/router topology."""
+    results = {}
+
+    for label, parallel in [("sequential (before)", False), ("parallel (after)", True)]:
+        graph = _build_router_stage_graph(parallel)
+        state = create_initial_state("bench-session", "AAPL price")
+        results[label] = await _time_runs(lambda: graph.ainvoke(state))
+
+    _print_comparison(
+        f"ROUTER STAGE: memory_loader ({MONGO_READ_LATENCY*1000:.0f} ms) + "
+        f"router ({ROUTER_LATENCY*1000:.0f} ms)",
+        results
+    )
+
+
+def _time_cold_start(code: str) -> float:
+    """Run `code` in a fresh interpreter and return its wall time (ms)."""
+    timed = (
+        "import time; _t = time.perf_counter()\n"
+        f"{code}\n"
+        "print((time.perf_counter() - _t) * 1000)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", timed],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "PYTHONPATH": str(PROJECT_ROOT)},
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+async def benchmark_cold_start():
+    """Measure import and first-build time of the app and research graph."""
+    print(f"\n{'='*60}")
+    print(f"COLD START ({NUM_COLD_START_RUNS} fresh interpreters per stage)")
+    print(f"{'='*60}")
+
+    for code, label in COLD_START_STAGES:
+        try:
+            timings = [
+                await asyncio.to_thread(_time_cold_start, code)
+                for _ in range(NUM_COLD_START_RUNS)
+            ]
+        except subprocess.CalledProcessError as e:
+            error = e.stderr.strip().splitlines()[-1] if e.stderr.strip() else e
+            print(f"{label:<28} failed: {error}")
+            continue
+
+        ordered = sorted(timings)
+        print(f"{label:<28} p50={statistics.median(ordered):8.1f} ms   max={ordered[-1]:8.1f} ms")
+
+
+class _StubCompletions:
+    """chat.completions stand-in that sleeps according to the model's latency profile."""
+
+    def __init__(self, models: Dict[str, str], seed: int = 42):
+        self.models = models  # model name -> profile name
+        self.rng = random.Random(seed)
+
+    async def create(self, model: str, **kwargs):
+        base_min, base_max, tail_probability, tail = LLM_LATENCY_PROFILES[self.models[model]]
+        latency = tail if self.rng.random() < tail_probability else self.rng.uniform(base_min, base_max)
+        await asyncio.sleep(latency)
+        return SimpleNamespace(model=model, usage=None)
+
+
+async def _time_llm_calls(gateway, calls: int) -> List[float]:
+    """Time `calls` report completions, LLM_CONCURRENCY at a time (ms)."""
+    semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+    async def one() -> float:
+        async with semaphore:
+            start = time.perf_counter()
+            await gateway.chat_completion(
+                "report", cache=False, model=gateway.model_for("report"), messages=[]
+            )
+            return (time.perf_counter() - start) * 1000
+
+    return await asyncio.gather(*(one() for _ in range(calls)))
+
+
+async def benchmark_llm_hedging():
+    """Compare report completions without and with hedging on a stubbed LLM."""
+    from backend.config.settings import settings
+    from backend.services.llm_gateway import LLMGateway
+
+    models = {settings.openai_model: "strong", settings.openai_fast_model: "fast"}
+    hedging_enabled, min_delay = settings.llm_hedging_enabled, settings.llm_hedge_min_delay
+    settings.llm_hedge_min_delay = 0.0  # Stub latencies are scaled down to milliseconds
+    results = {}
+
+    try:
+        for label, hedging in [("no hedging (before)", False), ("hedged (after)", True)]:
+            settings.llm_hedging_enabled = hedging
+            gateway = LLMGateway(requests_per_minute=1_000_000, tokens_per_minute=1_000_000_000)
+            gateway._client = SimpleNamespace(chat=SimpleNamespace(completions=_StubCompletions(models)))
+
+            # Warm-up fills the latency window the hedge delay is derived from
+            await _time_llm_calls(gateway, NUM_LLM_WARMUP_CALLS)
+            results[label] = await _time_llm_calls(gateway, NUM_LLM_CALLS)
+            if hedging:
+                print(f"\nHedge delay: {gateway.hedge_delay('report') * 1000:.1f} ms, "
+                      f"hedges: {gateway.stats['hedges']}, hedge wins: {gateway.stats['hedge_wins']}")
+    finally:
+        settings.llm_hedging_enabled, settings.llm_hedge_min_delay = hedging_enabled, min_delay
+
+    strong = LLM_LATENCY_PROFILES["strong"]
+    _print_comparison(
+        f"LLM TAIL: {NUM_LLM_CALLS} report calls, {strong[2]:.0%} take {strong[3]*1000:.0f} ms",
+        results
+    )
+
+
+async def benchmark_query_embedding():
+    """Compare query embedding latency of the OpenAI API and local backends."""
+    from backend.rag.embedding_backends import (
+        EmbeddingBackend, HashingEmbeddingBackend, OnnxEmbeddingBackend
+    )
+
+    class StubOpenAIBackend(EmbeddingBackend):
+        name, model, dimension = "openai", "text-embedding-3-small", 1536
+
+        async def embed(self, texts):
+            await asyncio.sleep(EMBEDDING_API_LATENCY)
+            return [[0.0] * self.dimension for _ in texts]
+
+    backends = {"openai (stubbed API)": StubOpenAIBackend()}
+    onnx = OnnxEmbeddingBackend()
+    try:
+        from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+        if Path(ONNXMiniLM_L6_V2.DOWNLOAD_PATH).exists():
+            await onnx.embed(["warm-up"])  # Model load is not part of query latency
+            backends["onnx (local CPU)"] = onnx
+    except ImportError:
+        pass
+    backends["hashing (local CPU)"] = HashingEmbeddingBackend()
+
+    results = {}
+    for label, backend in backends.items():
+        queries = iter(f"What is the outlook for ticker {i}?" for i in range(NUM_EMBEDDING_QUERIES))
+        results[label] = await _time_runs(lambda: backend.embed([next(queries)]), NUM_EMBEDDING_QUERIES)
+
+    _print_comparison(
+        f"QUERY EMBEDDING: {NUM_EMBEDDING_QUERIES} uncached queries "
+        f"(API round-trip {EMBEDDING_API_LATENCY*1000:.0f} ms)",
+        results
+    )
+
+
+def _chunk_filing_re_encoding(chunker, filing: Dict) -> List[Dict]:
+    """Previous chunk_edgar_filing: decode per window, re-count every chunk twice."""
+    chunk_docs = []
+    for section, text in filing["sections"].items():
+        tokens = chunker.encoding.encode(text)
+        start = 0
+        while start < len(tokens):
+            end = min(start + chunker.chunk_size, len(tokens))
+            chunk = chunker.encoding.decode(tokens[start:end])
+            chunker.count_tokens(chunk)  # chunk_by_section
+            chunk_docs.append({"text": chunk, "token_count": chunker.count_tokens(chunk)})  # metadata
+            if end >= len(tokens):
+                break
+            start = end - chunker.overlap
+    return chunk_docs
+
+
+async def benchmark_chunking():
+    """Compare re-encoding chunking with single-pass chunking on a synthetic 10-K."""
+    from backend.rag.chunking import DocumentChunker
+
+    chunker = DocumentChunker(chunk_size=512, overlap=50)
+    try:
+        chunker.count_tokens("warm-up")
+    except Exception as e:
+        print(f"\nCHUNKING: skipped (tokenizer unavailable: {e})")
+        return
+
+    rng = random.Random(42)
+    vocabulary = ["revenue", "margin", "segment", "fiscal", "increased", "decreased", "risk",
+                  "customers", "billion", "operating", "compared", "year", "the", "of", "and", "%"]
+    filing = {
+        "ticker": "BENCH", "filing_type": "10-K", "filing_date": "2024-01-01",
+        "sections": {
+            f"Item {i}": " ".join(rng.choice(vocabulary) for _ in range(CHUNKING_SECTION_WORDS))
+            for i in range(5)
+        }
+    }
+
+    async def run(chunk):
+        chunk(chunker, filing)
+
+    results = {
+        "re-encoding (before)": await _time_runs(lambda: run(_chunk_filing_re_encoding)),
+        "single pass (after)": await _time_runs(lambda: run(DocumentChunker.chunk_edgar_filing)),
+    }
+    _print_comparison(
+        f"CHUNKING: synthetic 10-K, 5 sections x {CHUNKING_SECTION_WORDS} words",
+        results
+    )
+
+
+async def main():
+    print("\nLATENCY BENCHMARK SUITE\n")
+    await benchmark_router_stage()
+    await benchmark_llm_hedging()
+    await benchmark_query_embedding()
+    await benchmark_chunking()
+    await benchmark_cold_start()
+    print("\n✅ Benchmarks complete!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
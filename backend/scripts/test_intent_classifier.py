@@ -0,0 +1,68 @@
+"""
+Check the fast-path intent classifier against sample queries.
+
+Each sample names the intent the keyword rules must pick with fast-path
+confidence, or "llm" if the query must fall through to the router LLM.
+
+Usage:
+    python -m backend.scripts.test_intent_classifier
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.agents.intent_classifier import intent_classifier
+from backend.config.settings import settings
+
+# (query, expected intent or "llm")
+SAMPLE_QUERIES = [
+    # Plain lookups
+    ("What is the price of AAPL?", "price_query"),
+    ("TSLA stock price", "price_query"),
+    ("How much is NVDA trading at?", "price_query"),
+    ("苹果股价多少", "price_query"),
+    ("特斯拉现价", "price_query"),
+    # Explanations, targets, forecasts and advice need the LLM
+    ("Why did AAPL price drop today?", "llm"),
+    ("What is the analyst price target for NVDA?", "llm"),
+    ("What is the price forecast for MSFT?", "llm"),
+    ("Should I sell my TSLA shares?", "llm"),
+    ("Should I hold AMZN?", "llm"),
+    ("为什么特斯拉股价今天下跌", "llm"),
+    ("苹果的目标价是多少", "llm"),
+    # Other intents
+    ("What is MSFT's P/E ratio?", "fundamental_analysis"),
+    ("Show me Apple revenue and margins", "fundamental_analysis"),
+    ("What's the latest news on NVDA?", "sentiment_analysis"),
+    ("特斯拉最近的新闻", "sentiment_analysis"),
+    ("Should I invest in Google?", "general_research"),
+    ("特斯拉值得投资吗", "general_research"),
+    ("Compare AAPL vs MSFT", "comparison"),
+    ("对比苹果和微软", "comparison"),
+    # Nothing to go on
+    ("Tell me something interesting", "llm"),
+]
+
+
+def check_samples() -> int:
+    """Classify every sample and print mismatches. Returns the number of failures."""
+    failures = 0
+    for query, expected in SAMPLE_QUERIES:
+        decision = intent_classifier.classify(query)
+        fast_path = decision["confidence"] >= settings.router_fast_path_confidence
+        actual = decision["intent"] if fast_path else "llm"
+
+        ok = actual == expected
+        failures += not ok
+        print(
+            f"{'✅' if ok else '❌'} {query:<48} expected={expected:<22} "
+            f"got={actual} ({decision['intent']}, {decision['confidence']:.2f})"
+        )
+
+    print(f"\n{len(SAMPLE_QUERIES) - failures}/{len(SAMPLE_QUERIES)} samples passed")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if check_samples() else 0)
@@ -0,0 +1,150 @@
+"""
+Request-scoped artifact store.
+
+Bulky agent outputs (e.g. a year of daily price points per ticker) are kept
+here instead of in the LangGraph state. State carries only short string
+handles, which the API layer resolves when building the response; the
+graph's reducers and node copies never touch the payloads.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import time
+import uuid
+
+from backend.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+HANDLE_PREFIX = "artifact://"
+
+
+class ArtifactStore:
+    """
+    In-process store of request-scoped artifacts.
+
+    Handles have the form artifact://<request_id>/<kind>/<id>. Artifacts of a
+    request are dropped by release() once its run has finished and the
+    response is built. A failed run keeps them, since a retry with the same
+    request_id resumes from checkpoints holding the handles; requests that
+    are never retried are swept `ttl` seconds after their last use.
+    """
+
+    def __init__(self, ttl: float = settings.artifact_ttl_seconds):
+        """
+        Initialize artifact store.
+
+        Args:
+            ttl: Seconds after the last put/touch at which unreleased artifacts
+                are evicted (keep above the checkpoint TTL)
+        """
+        self.ttl = ttl
+        # {request_id: (last_used, {handle: payload})}
+        self._requests: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+        # Metrics
+        self.stats = {
+            "stored": 0,
+            "resolved": 0,
+            "missing": 0,
+            "released_requests": 0,
+            "evicted_requests": 0
+        }
+
+    @property
+    def request_count(self) -> int:
+        """Number of requests currently holding artifacts."""
+        return len(self._requests)
+
+    def put(self, request_id: str, kind: str, payload: Any) -> str:
+        """
+        Store an artifact.
+
+        Args:
+            request_id: Request the artifact belongs to
+            kind: Artifact type (e.g. "visualization")
+            payload: Artifact data
+
+        Returns:
+            Handle to keep in state
+        """
+        self._evict_expired()
+
+        handle = f"{HANDLE_PREFIX}{request_id}/{kind}/{uuid.uuid4().hex[:12]}"
+        _, artifacts = self._requests.get(request_id, (None, {}))
+        self._requests[request_id] = (time.monotonic(), artifacts)
+        artifacts[handle] = payload
+        self.stats["stored"] += 1
+        return handle
+
+    def get(self, handle: str) -> Optional[Any]:
+        """
+        Resolve a handle.
+
+        Args:
+            handle: Handle returned by put()
+
+        Returns:
+            Artifact payload, or None if released/evicted
+        """
+        request_id = self._request_id(handle)
+        entry = self._requests.get(request_id)
+        payload = entry[1].get(handle) if entry else None
+
+        if payload is None:
+            self.stats["missing"] += 1
+            logger.warning(f"Artifact not found (released or expired): {handle}")
+        else:
+            self.stats["resolved"] += 1
+        return payload
+
+    def resolve(self, handles: List[str]) -> List[Any]:
+        """
+        Resolve a list of handles, skipping missing artifacts.
+
+        Args:
+            handles: Handles from state
+
+        Returns:
+            Payloads in handle order
+        """
+        payloads = (self.get(handle) for handle in handles or [])
+        return [payload for payload in payloads if payload is not None]
+
+    def touch(self, request_id: str):
+        """
+        Restart the TTL of a request's artifacts (e.g. when its run resumes).
+
+        Args:
+            request_id: Request identifier
+        """
+        entry = self._requests.get(request_id)
+        if entry is not None:
+            self._requests[request_id] = (time.monotonic(), entry[1])
+
+    def release(self, request_id: str):
+        """
+        Drop all artifacts of a request.
+
+        Args:
+            request_id: Request identifier
+        """
+        if self._requests.pop(request_id, None) is not None:
+            self.stats["released_requests"] += 1
+
+    def _evict_expired(self):
+        """Drop artifacts of requests not used within the TTL."""
+        cutoff = time.monotonic() - self.ttl
+        expired = [rid for rid, (created, _) in self._requests.items() if created < cutoff]
+        for request_id in expired:
+            del self._requests[request_id]
+        if expired:
+            self.stats["evicted_requests"] += len(expired)
+            logger.info(f"Evicted artifacts of {len(expired)} expired requests")
+
+    @staticmethod
+    def _request_id(handle: str) -> str:
+        return handle[len(HANDLE_PREFIX):].split("/", 1)[0]
+
+
+# Singleton instance
+artifact_store = ArtifactStore()
@@ -12,13 +12,26 @@ from backend.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Space of collections created before the embedding space was recorded
+# (OpenAI was the only backend then)
+LEGACY_EMBEDDING_SPACE = "openai:text-embedding-3-small:1536"
+
 
 class ChromaDB:
-    """ChromaDB client manager."""
+    """
+    ChromaDB client manager.
+
+    Each embedding backend writes to its own collection, and the collection
+    records the backend's vector space (backend, model, dimension) in its
+    metadata: vectors of different backends are never mixed or compared.
+    """
 
     def __init__(self):
         self.client: Optional[chromadb.Client] = None
         self.collection: Optional[chromadb.Collection] = None
+        self.collection_name: Optional[str] = None
+        self.embedding_space: Optional[str] = None
+        self.embedding_dim: Optional[int] = None
 
     def connect(self):
         """Initialize ChromaDB client and collection."""
@@ -35,19 +48,76 @@ class ChromaDB:
                 )
             )
 
-            # Get or create collection
+            # Get or create the collection of the configured embedding backend
+            self._select_collection()
             self.collection = self.client.get_or_create_collection(
-                name=settings.chroma_collection_name,
-                metadata={"hnsw:space": "cosine"}  # Cosine similarity
+                name=self.collection_name,
+                metadata=self._collection_metadata()
             )
+            self._check_embedding_space()
 
-            logger.info(f"✅ Connected to ChromaDB: {settings.chroma_collection_name}")
+            logger.info(f"✅ Connected to ChromaDB: {self.collection_name} ({self.embedding_space})")
             logger.info(f"📊 Collection count: {self.collection.count()}")
 
         except Exception as e:
             logger.error(f"❌ Failed to initialize ChromaDB: {e}")
             raise
 
+    def _select_collection(self):
+        """Pick the collection of the configured embedding backend."""
+        from backend.rag.embeddings import embedding_service
+
+        backend = embedding_service.backend
+        self.embedding_space = backend.space
+        self.embedding_dim = backend.dimension
+
+        # OpenAI keeps the configured name, so existing collections stay in use
+        if backend.name == "openai":
+            self.collection_name = settings.chroma_collection_name
+        else:
+            self.collection_name = f"{settings.chroma_collection_name}_{backend.name}_{backend.dimension}"
+
+    def _collection_metadata(self) -> Dict[str, Any]:
+        return {
+            "hnsw:space": "cosine",  # Cosine similarity
+            "embedding_space": self.embedding_space,
+            "embedding_dim": self.embedding_dim
+        }
+
+    def _check_embedding_space(self):
+        """
+        Refuse a collection holding vectors of another embedding space.
+
+        Raises:
+            ValueError: Collection space differs from the backend's
+        """
+        metadata = self.collection.metadata or {}
+        recorded = metadata.get("embedding_space")
+        if recorded is None:
+            if self.collection.count() == 0:
+                return
+            recorded = LEGACY_EMBEDDING_SPACE
+
+        if recorded != self.embedding_space:
+            raise ValueError(
+                f"Collection '{self.collection_name}' holds {recorded} vectors, "
+                f"but the embedding backend produces {self.embedding_space}; "
+                f"use another CHROMA_COLLECTION_NAME or re-ingest after a reset"
+            )
+
+    def _check_dimension(self, embeddings: List[List[float]]):
+        """
+        Make sure vectors match the collection's dimension.
+
+        Raises:
+            ValueError: Vector size differs from the collection's
+        """
+        if embeddings and len(embeddings[0]) != self.embedding_dim:
+            raise ValueError(
+                f"Got {len(embeddings[0])}-dimensional vectors for collection "
+                f"'{self.collection_name}' ({self.embedding_space})"
+            )
+
     def add_documents(
         self,
         ids: List[str],
@@ -61,11 +131,12 @@ class ChromaDB:
         Args:
             ids: Unique IDs for each document
             documents: Text content of documents
-            embeddings: Vector embeddings (1536 dims for OpenAI)
+            embeddings: Vector embeddings (dimension of the embedding backend)
             metadatas: Optional metadata dicts (ticker, date, source, etc.)
         """
         if self.collection is None:
             self.connect()
+        self._check_dimension(embeddings)
 
         try:
             self.collection.add(
@@ -101,6 +172,7 @@ class ChromaDB:
         """
         if self.collection is None:
             self.connect()
+        self._check_dimension(query_embeddings)
 
         try:
             results = self.collection.query(
@@ -180,10 +252,10 @@ class ChromaDB:
             self.connect()
 
         try:
-            self.client.delete_collection(settings.chroma_collection_name)
+            self.client.delete_collection(self.collection_name)
             self.collection = self.client.create_collection(
-                name=settings.chroma_collection_name,
-                metadata={"hnsw:space": "cosine"}
+                name=self.collection_name,
+                metadata=self._collection_metadata()
             )
             logger.info("✅ ChromaDB collection reset")
 
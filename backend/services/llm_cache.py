@@ -0,0 +1,270 @@
+"""
+Content-addressed cache for LLM responses.
+
+Entries are keyed by a SHA-256 of the request (model, messages, temperature,
+max_tokens, response_format), so the same prompt over the same data returns
+the stored completion instead of calling OpenAI again. Each call site has
+its own TTL; call sites without a TTL (the free-form report) are never cached.
+"""
+from typing import Any, Dict, Optional
+from datetime import datetime, timedelta
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+from backend.config.settings import settings
+from backend.services.database import mongodb
+from backend.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# TTL per call site in seconds. Call sites not listed are not cached.
+CALL_SITE_TTLS: Dict[str, int] = {
+    "router": 24 * 3600,               # Intent of a query text does not change
+    "ticker_resolver": 30 * 24 * 3600,  # Company name → ticker is stable
+    "sentiment": 3600,                 # Same news items → same sentiment
+    "sentiment_batch": 3600,
+    "snapshot": 900,                   # Prompt embeds live prices; keep short
+}
+
+cache_requests_total = metrics.counter(
+    "llm_cache_requests_total",
+    "LLM response cache lookups",
+    label_names=("call_site", "result")
+)
+cache_tokens_saved_total = metrics.counter(
+    "llm_cache_tokens_saved_total",
+    "OpenAI tokens avoided by LLM response cache hits",
+    label_names=("call_site",)
+)
+
+
+def make_cache_key(
+    model: str,
+    messages: Any,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    response_format: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Build the content address of a chat completion request.
+
+    Args:
+        model: Model name
+        messages: Chat messages
+        temperature: Sampling temperature
+        max_tokens: Completion token limit
+        response_format: Response format constraint
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "response_format": response_format
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    LLM response cache with a disk or MongoDB backend.
+
+    - disk: one JSON file per entry under `cache_dir` (sharded by key prefix)
+    - mongo: `llm_cache` collection with a TTL index on expires_at
+    Stored values are `ChatCompletion.model_dump()` payloads.
+    """
+
+    COLLECTION_NAME = "llm_cache"
+
+    def __init__(
+        self,
+        backend: str = settings.llm_cache_backend,
+        cache_dir: str = settings.llm_cache_dir,
+        enabled: bool = settings.llm_cache_enabled
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            backend: "disk" or "mongo"
+            cache_dir: Directory for the disk backend
+            enabled: Global switch
+        """
+        if backend not in ("disk", "mongo"):
+            raise ValueError(f"Unknown LLM cache backend: {backend}")
+
+        self.backend = backend
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self.db = None
+
+        # Metrics
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "errors": 0,
+            "tokens_saved": 0
+        }
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of lookups served from cache."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def ttl_for(self, call_site: str) -> Optional[int]:
+        """
+        TTL for a call site.
+
+        Args:
+            call_site: Logical caller
+
+        Returns:
+            TTL in seconds, or None if the call site is not cacheable
+        """
+        if not self.enabled:
+            return None
+        return CALL_SITE_TTLS.get(call_site)
+
+    async def get(self, key: str, call_site: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Cache key from make_cache_key()
+            call_site: Logical caller (for metrics)
+
+        Returns:
+            Stored response payload, or None on miss/expiry
+        """
+        try:
+            if self.backend == "mongo":
+                payload = await self._mongo_get(key)
+            else:
+                payload = await asyncio.to_thread(self._disk_get, key)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"LLM cache read failed: {e}")
+            payload = None
+
+        if payload is None:
+            self.stats["misses"] += 1
+            cache_requests_total.inc(call_site=call_site, result="miss")
+            return None
+
+        tokens = (payload.get("usage") or {}).get("total_tokens", 0) or 0
+        self.stats["hits"] += 1
+        self.stats["tokens_saved"] += tokens
+        cache_requests_total.inc(call_site=call_site, result="hit")
+        cache_tokens_saved_total.inc(tokens, call_site=call_site)
+        logger.debug(f"⚡ LLM cache hit for {call_site} ({tokens} tokens saved)")
+        return payload
+
+    async def set(self, key: str, payload: Dict[str, Any], ttl: int):
+        """
+        Store a response.
+
+        Args:
+            key: Cache key
+            payload: Response payload (model_dump of the completion)
+            ttl: Time to live in seconds
+        """
+        try:
+            if self.backend == "mongo":
+                await self._mongo_set(key, payload, ttl)
+            else:
+                await asyncio.to_thread(self._disk_set, key, payload, ttl)
+            self.stats["writes"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"LLM cache write failed: {e}")
+
+    async def create_indexes(self):
+        """Create the TTL index (mongo backend only)."""
+        if self.backend != "mongo":
+            return
+
+        collection = await self._get_collection()
+        await collection.create_index("expires_at", expireAfterSeconds=0)
+        logger.info("✅ Created indexes for llm_cache collection")
+
+    # Disk backend
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _disk_get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+
+        if entry["expires_at"] < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return entry["response"]
+
+    def _disk_set(self, key: str, payload: Dict[str, Any], ttl: int):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file of our own and rename so readers never see
+        # partial JSON and concurrent writers of a key never share a temp file
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=path.parent, prefix=f"{key}.", suffix=".tmp", delete=False
+            ) as f:
+                tmp_path = f.name
+                json.dump({"expires_at": time.time() + ttl, "response": payload}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    # MongoDB backend
+
+    async def _get_collection(self):
+        if self.db is None:
+            self.db = await mongodb.get_database()
+        return self.db[self.COLLECTION_NAME]
+
+    async def _mongo_get(self, key: str) -> Optional[Dict[str, Any]]:
+        collection = await self._get_collection()
+        # TTL monitor runs once a minute, so check expiry explicitly too
+        entry = await collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+        return entry["response"] if entry else None
+
+    async def _mongo_set(self, key: str, payload: Dict[str, Any], ttl: int):
+        collection = await self._get_collection()
+        await collection.replace_one(
+            {"_id": key},
+            {
+                "_id": key,
+                "response": payload,
+                "expires_at": datetime.utcnow() + timedelta(seconds=ttl)
+            },
+            upsert=True
+        )
+
+
+# Singleton instance
+llm_response_cache = LLMResponseCache()
@@ -0,0 +1,592 @@
+"""
+Process-wide LLM gateway.
+
+All OpenAI traffic (chat completions and embeddings) goes through one
+AsyncOpenAI client backed by a tuned httpx connection pool. The gateway owns
+retry/backoff and enforces requests-per-minute and tokens-per-minute budgets
+shared by every agent, so bursts queue up locally instead of producing
+cascading 429s.
+
+Each call site is mapped to a model tier (fast model for routing, sentiment
+and snapshots, strong model for the report). A call that has not answered
+after its call site's p95 latency is hedged: a duplicate goes to the other
+tier and the first answer wins. At most settings.llm_hedge_max_rate of a call
+site's recent calls are hedged.
+"""
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
+
+from backend.config.settings import settings
+from backend.services.llm_cache import llm_response_cache, make_cache_key
+from backend.services.telemetry import cached_prompt_tokens, record_llm_usage
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying: throttling, timeouts, dropped connections, 5xx
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+# Rough characters-per-token ratio used to reserve budget before a call
+CHARS_PER_TOKEN = 4
+
+# Model tier per call site: "fast" = settings.openai_fast_model,
+# "strong" = settings.openai_model (unlisted call sites use "strong")
+CALL_SITE_TIERS: Dict[str, str] = {
+    "router": "fast",            # Short JSON classification
+    "ticker_resolver": "fast",
+    "sentiment": "fast",
+    "sentiment_batch": "fast",
+    "snapshot": "fast",          # Beginner summary of a few numbers
+    "report": "strong",          # The user-facing analysis
+    "report_combined": "strong",
+}
+
+# Latencies (and hedge decisions) remembered per call site for the hedge delay
+LATENCY_WINDOW = 200
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `per_minute / 60` units per second.
+
+    Waiters are served in FIFO order. A request larger than the whole bucket
+    is admitted once the bucket is full, so it cannot block forever.
+    """
+
+    def __init__(self, per_minute: int):
+        """
+        Initialize bucket.
+
+        Args:
+            per_minute: Budget per minute (also the burst capacity)
+        """
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> float:
+        """
+        Wait until `amount` units are available and take them.
+
+        Args:
+            amount: Units to take
+
+        Returns:
+            Seconds spent waiting
+        """
+        needed = min(amount, self.capacity)
+        waited = 0.0
+
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._available >= needed:
+                    self._available -= amount
+                    return waited
+                delay = (needed - self._available) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+    def refund(self, amount: float):
+        """
+        Return (or, if negative, charge) units after the real cost is known.
+
+        Args:
+            amount: Units to give back
+        """
+        self._refill()
+        self._available = min(self.capacity, self._available + amount)
+
+
+class LLMGateway:
+    """
+    Shared OpenAI client with pooled connections, retries and rate budgets.
+
+    - One httpx.AsyncClient (keep-alive, HTTP/2, bounded connections)
+    - Exponential backoff with jitter, honouring Retry-After on 429s
+    - Shared RPM/TPM token buckets; token reservations are reconciled
+      against the usage OpenAI reports
+    - Token usage of every call is recorded for node telemetry
+    - Non-streaming chat completions are served from the content-addressed
+      response cache when the call site has a TTL
+    - Chat calls slower than their call site's p95 are hedged on the other
+      model tier (streams: time to first chunk)
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = settings.llm_requests_per_minute,
+        tokens_per_minute: int = settings.llm_tokens_per_minute,
+        max_retries: int = settings.llm_max_retries
+    ):
+        """
+        Initialize gateway (the HTTP client is created on first use).
+
+        Args:
+            requests_per_minute: Shared request budget
+            tokens_per_minute: Shared token budget
+            max_retries: Retries per call after the first attempt
+        """
+        self.max_retries = max_retries
+        self.cache = llm_response_cache
+        self._request_bucket = TokenBucket(requests_per_minute)
+        self._token_bucket = TokenBucket(tokens_per_minute)
+        self._client: Optional[AsyncOpenAI] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._latencies: Dict[Tuple[str, bool], Deque[float]] = {}  # (call site, stream)
+        self._hedge_history: Dict[str, Deque[bool]] = {}
+
+        # Metrics
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failures": 0,
+            "throttle_wait_seconds": 0.0,
+            "prompt_tokens": 0,
+            "cached_prompt_tokens": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "hedges_capped": 0
+        }
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Shared AsyncOpenAI client (created lazily)."""
+        if self._client is None:
+            self._http_client = self._create_http_client()
+            self._client = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                http_client=self._http_client,
+                max_retries=0  # Retries are handled here, with the shared budgets
+            )
+        return self._client
+
+    def _create_http_client(self) -> httpx.AsyncClient:
+        """Build the pooled httpx client, using HTTP/2 when h2 is installed."""
+        http2 = settings.llm_http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("h2 package not installed, OpenAI pool falls back to HTTP/1.1")
+                http2 = False
+
+        logger.info(
+            f"✅ LLM gateway pool: max_connections={settings.llm_max_connections}, "
+            f"keepalive={settings.llm_max_keepalive_connections}, http2={http2}"
+        )
+
+        return httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+                keepalive_expiry=settings.llm_keepalive_expiry
+            ),
+            timeout=httpx.Timeout(settings.llm_request_timeout, connect=10.0)
+        )
+
+    async def chat_completion(self, call_site: str, cache: bool = True, **kwargs) -> Any:
+        """
+        Create a chat completion.
+
+        Args:
+            call_site: Logical caller for telemetry and cache TTL (e.g. "router")
+            cache: Set False to bypass the response cache for this call
+            **kwargs: Arguments for client.chat.completions.create (not stream)
+
+        Returns:
+            ChatCompletion
+        """
+        ttl = self.cache.ttl_for(call_site) if cache else None
+        cache_key = None
+
+        if ttl:
+            cache_key = make_cache_key(
+                kwargs.get("model"),
+                kwargs.get("messages"),
+                kwargs.get("temperature"),
+                kwargs.get("max_tokens"),
+                kwargs.get("response_format")
+            )
+            cached = await self.cache.get(cache_key, call_site)
+            if cached is not None:
+                return ChatCompletion.model_validate(cached)
+
+        estimate = self._estimate_chat_tokens(kwargs)
+
+        async def answer(request: Dict[str, Any]) -> tuple:
+            response = await self._call(lambda: self.client.chat.completions.create(**request), estimate)
+            return request.get("model"), response
+
+        model, response = await self._hedged(call_site, kwargs, answer)
+        self._settle(estimate, response.usage, call_site)
+
+        # A hedge win comes from the other tier: never store it as the requested model's answer
+        if cache_key and model == kwargs.get("model"):
+            await self.cache.set(cache_key, response.model_dump(mode="json"), ttl)
+
+        return response
+
+    async def chat_completion_stream(self, call_site: str, **kwargs) -> AsyncIterator[Any]:
+        """
+        Stream a chat completion.
+
+        Only opening the stream is retried; once chunks flow, errors propagate.
+        Usage is requested in the final chunk; the TPM reservation is settled
+        when the stream ends, also if the consumer stops early.
+        Hedging applies to the first chunk: the stream that starts first is kept.
+
+        Args:
+            call_site: Logical caller for telemetry (e.g. "report")
+            **kwargs: Arguments for client.chat.completions.create
+
+        Yields:
+            ChatCompletionChunk objects
+        """
+        estimate = self._estimate_chat_tokens(kwargs)
+        stream, first_chunk = await self._hedged(
+            call_site,
+            kwargs,
+            lambda request: self._open_stream(request, estimate),
+            discard=lambda opened: self._close_stream(opened[0]),
+            stream=True
+        )
+
+        async def chunks():
+            if first_chunk is not None:
+                yield first_chunk
+            async for chunk in stream:
+                yield chunk
+
+        usage = None
+        try:
+            async for chunk in chunks():
+                # Final chunk carries usage and no choices
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                yield chunk
+
+        finally:
+            # Consumer stopped early or disconnected: no usage chunk, so the
+            # estimate stays reserved; the stream still has to be closed
+            self._settle(estimate, usage, call_site)
+            if usage is None:
+                await self._close_stream(stream)
+
+    async def embeddings(
+        self,
+        model: str,
+        input: Union[str, List[str]],
+        call_site: str = "embeddings"
+    ) -> Any:
+        """
+        Create embeddings.
+
+        Args:
+            model: Embedding model
+            input: Text or list of texts
+            call_site: Logical caller for telemetry
+
+        Returns:
+            CreateEmbeddingResponse
+        """
+        texts = [input] if isinstance(input, str) else input
+        estimate = sum(len(text) for text in texts) // CHARS_PER_TOKEN + 1
+        response = await self._call(
+            lambda: self.client.embeddings.create(model=model, input=input),
+            estimate
+        )
+        self._settle(estimate, response.usage, call_site)
+        return response
+
+    async def aclose(self):
+        """Close the shared connection pool."""
+        if self._client is not None:
+            await self._client.close()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self._client = None
+        self._http_client = None
+
+    def model_for(self, call_site: str) -> str:
+        """
+        Model of the call site's tier.
+
+        Args:
+            call_site: Logical caller (e.g. "router")
+
+        Returns:
+            Model name
+        """
+        if CALL_SITE_TIERS.get(call_site, "strong") == "fast":
+            return settings.openai_fast_model
+        return settings.openai_model
+
+    def hedge_delay(self, call_site: str, stream: bool = False) -> Optional[float]:
+        """
+        Seconds to wait before hedging a call.
+
+        Args:
+            call_site: Logical caller
+            stream: Streamed call (latency = time to first chunk) or full completion
+
+        Returns:
+            p95 (settings.llm_hedge_percentile) of the call site's recent
+            latencies of that kind, floored at settings.llm_hedge_min_delay;
+            None while hedging is off or fewer than llm_hedge_min_samples are known
+        """
+        samples = self._latencies.get((call_site, stream))
+        if not settings.llm_hedging_enabled or not samples or len(samples) < settings.llm_hedge_min_samples:
+            return None
+
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * settings.llm_hedge_percentile))
+        return max(ordered[index], settings.llm_hedge_min_delay)
+
+    def _hedge_allowed(self, call_site: str) -> bool:
+        """Whether another hedge stays within settings.llm_hedge_max_rate of recent calls."""
+        history = self._hedge_history.get(call_site)
+        if not history:
+            return True
+        return sum(history) < settings.llm_hedge_max_rate * len(history)
+
+    def _record_latency(self, call_site: str, stream: bool, seconds: float):
+        """Remember a latency of the call site's primary model."""
+        self._latencies.setdefault((call_site, stream), deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def _alternate_model(self, model: Optional[str]) -> Optional[str]:
+        """Model of the other tier, None if the model is not tiered."""
+        if model == settings.openai_model and settings.openai_fast_model != model:
+            return settings.openai_fast_model
+        if model == settings.openai_fast_model and settings.openai_model != model:
+            return settings.openai_model
+        return None
+
+    async def _hedged(
+        self,
+        call_site: str,
+        kwargs: Dict[str, Any],
+        make_request: Callable[[Dict[str, Any]], Awaitable[Any]],
+        discard: Optional[Callable[[Any], Awaitable[None]]] = None,
+        stream: bool = False
+    ) -> Any:
+        """
+        Run a request, hedging it on the other tier if it is slow.
+
+        Only latencies of the primary model are recorded, so the hedge delay
+        tracks the configured model rather than the hedged outcome. The
+        primary is recorded whenever it answers, also after losing the race;
+        a primary cancelled because a hedge won is recorded at its elapsed
+        time, a lower bound that keeps slow calls in the p95. A hedge that is
+        cancelled keeps its TPM reservation (it may have been billed).
+
+        Args:
+            call_site: Logical caller
+            kwargs: Request arguments (model included)
+            make_request: Builds the request coroutine from arguments
+            discard: Releases the result of a request that lost the race
+            stream: The request opens a stream; its latencies (time to first
+                chunk) are kept apart from full completions of the call site
+
+        Returns:
+            Result of the first request to succeed
+        """
+        start = time.monotonic()
+        primary = asyncio.ensure_future(make_request(kwargs))
+        tasks = [primary]
+
+        def record_primary(task: asyncio.Future):
+            # Failed calls say nothing about latency; cancellations count only once hedged
+            if task.cancelled():
+                if len(tasks) > 1:
+                    self._record_latency(call_site, stream, time.monotonic() - start)
+            elif task.exception() is None:
+                self._record_latency(call_site, stream, time.monotonic() - start)
+
+        primary.add_done_callback(record_primary)
+
+        try:
+            delay = self.hedge_delay(call_site, stream)
+            alternate = self._alternate_model(kwargs.get("model"))
+            hedged = False
+            if delay is not None and alternate is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done and not self._hedge_allowed(call_site):
+                    self.stats["hedges_capped"] += 1
+                elif not done:
+                    hedged = True
+                    self.stats["hedges"] += 1
+                    logger.info(f"🏁 {call_site}: no answer after {delay:.2f}s, hedging on {alternate}")
+                    tasks.append(asyncio.ensure_future(make_request({**kwargs, "model": alternate})))
+            self._hedge_history.setdefault(call_site, deque(maxlen=LATENCY_WINDOW)).append(hedged)
+
+            winner = await self._first_success(tasks)
+
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        # A loser that finished too (the race was close) still holds resources
+        for task in tasks:
+            if task is winner or not task.done() or task.cancelled():
+                continue
+            if task.exception() is None and discard is not None:
+                await discard(task.result())
+
+        if winner is not primary:
+            self.stats["hedge_wins"] += 1
+
+        return winner.result()
+
+    @staticmethod
+    async def _first_success(tasks: List[asyncio.Future]) -> asyncio.Future:
+        """Wait for the first task to succeed; if all fail, return the first one."""
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task
+        return tasks[0]
+
+    async def _open_stream(self, kwargs: Dict[str, Any], token_estimate: int) -> tuple:
+        """
+        Open a chat stream and wait for its first chunk.
+
+        Returns:
+            (stream, first chunk or None if the stream was empty)
+        """
+        stream = await self._call(
+            lambda: self.client.chat.completions.create(
+                **kwargs,
+                stream=True,
+                stream_options={"include_usage": True}
+            ),
+            token_estimate
+        )
+        try:
+            return stream, await stream.__anext__()
+        except StopAsyncIteration:
+            return stream, None
+        except BaseException:
+            await self._close_stream(stream)
+            raise
+
+    @staticmethod
+    async def _close_stream(stream: Any):
+        """Close a stream that is no longer read."""
+        close = getattr(stream, "close", None) or getattr(stream, "aclose", None)
+        if close is not None:
+            await close()
+
+    async def _call(self, make_request, token_estimate: int) -> Any:
+        """
+        Run one OpenAI request under the shared budgets with retry/backoff.
+
+        Args:
+            make_request: Zero-argument callable returning the request coroutine
+            token_estimate: Tokens to reserve from the TPM budget
+
+        Returns:
+            OpenAI response
+        """
+        for attempt in range(self.max_retries + 1):
+            waited = await self._request_bucket.acquire(1)
+            waited += await self._token_bucket.acquire(token_estimate)
+            self.stats["throttle_wait_seconds"] += waited
+            self.stats["requests"] += 1
+
+            try:
+                return await make_request()
+
+            except RETRYABLE_ERRORS as e:
+                # Failed attempt consumed no tokens
+                self._token_bucket.refund(token_estimate)
+
+                if isinstance(e, openai.RateLimitError):
+                    self.stats["rate_limited"] += 1
+
+                if attempt == self.max_retries:
+                    self.stats["failures"] += 1
+                    logger.error(f"❌ OpenAI request failed after {attempt + 1} attempts: {e}")
+                    raise
+
+                delay = self._backoff_delay(attempt, e)
+                self.stats["retries"] += 1
+                logger.warning(
+                    f"🔄 OpenAI request failed ({type(e).__name__}), "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+            except Exception as e:
+                # Non-retryable error (bad request, auth, ...): no response, no tokens used
+                self._token_bucket.refund(token_estimate)
+                self.stats["failures"] += 1
+                logger.error(f"❌ OpenAI request failed ({type(e).__name__}): {e}")
+                raise
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Exponential backoff with jitter, or the server's Retry-After if given."""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), 60.0)
+            except ValueError:
+                pass
+
+        return min(0.5 * 2 ** attempt, 20.0) * (0.5 + random.random())
+
+    @property
+    def prompt_cache_ratio(self) -> float:
+        """Share of prompt tokens served from the provider's prefix cache."""
+        if self.stats["prompt_tokens"] == 0:
+            return 0.0
+        return self.stats["cached_prompt_tokens"] / self.stats["prompt_tokens"]
+
+    def _settle(self, estimate: int, usage: Any, call_site: str):
+        """Reconcile the TPM reservation with real usage and record it."""
+        record_llm_usage(usage, call_site)
+        if usage is not None:
+            self._token_bucket.refund(estimate - (getattr(usage, "total_tokens", 0) or 0))
+
+            prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            cached_tokens = cached_prompt_tokens(usage)
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["cached_prompt_tokens"] += cached_tokens
+            if cached_tokens:
+                logger.debug(f"🧊 {call_site}: {cached_tokens}/{prompt_tokens} prompt tokens cached")
+
+    @staticmethod
+    def _estimate_chat_tokens(kwargs: Dict[str, Any]) -> int:
+        """Estimate prompt + completion tokens of a chat request."""
+        prompt_chars = sum(len(str(message.get("content", ""))) for message in kwargs.get("messages", []))
+        return prompt_chars // CHARS_PER_TOKEN + (kwargs.get("max_tokens") or 512)
+
+
+# Singleton instance
+llm_gateway = LLMGateway()
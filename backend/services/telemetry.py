@@ -0,0 +1,200 @@
+"""
+Per-node timing spans and LLM token accounting.
+
+Each graph node runs inside a NodeSpan. The span measures wall time with a
+monotonic clock and installs a token ledger in a context variable, so every
+OpenAI call made while the node runs (including calls in tasks it spawns)
+is attributed to that node without threading a parameter through.
+"""
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+import functools
+import logging
+import time
+
+from backend.services.metrics import metrics, LATENCY_BUCKETS, TOKEN_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# Token ledger of the node currently executing (None outside a span)
+_usage_ledger: ContextVar[Optional[Dict[str, int]]] = ContextVar("usage_ledger", default=None)
+
+node_duration_seconds = metrics.histogram(
+    "research_node_duration_seconds",
+    "Wall time per graph node",
+    buckets=LATENCY_BUCKETS,
+    label_names=("node", "intent")
+)
+node_tokens = metrics.histogram(
+    "research_node_tokens",
+    "LLM tokens consumed per graph node execution",
+    buckets=TOKEN_BUCKETS,
+    label_names=("node", "intent")
+)
+llm_call_tokens = metrics.histogram(
+    "llm_call_tokens",
+    "Tokens per OpenAI call",
+    buckets=TOKEN_BUCKETS,
+    label_names=("call_site", "kind")
+)
+llm_tokens_total = metrics.counter(
+    "llm_tokens_total",
+    "Total OpenAI tokens consumed",
+    label_names=("call_site", "kind")
+)
+
+
+def _empty_usage() -> Dict[str, int]:
+    return {"prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "llm_calls": 0}
+
+
+def cached_prompt_tokens(usage: Any) -> int:
+    """
+    Prompt tokens served from the provider's prefix cache.
+
+    Args:
+        usage: `usage` object of an OpenAI response (None is allowed)
+
+    Returns:
+        usage.prompt_tokens_details.cached_tokens, 0 when not reported
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", 0) or 0
+
+
+def record_llm_usage(usage: Any, call_site: str):
+    """
+    Record token usage of one OpenAI call.
+
+    Args:
+        usage: `usage` object from a chat completion, stream chunk or
+               embeddings response (None is ignored)
+        call_site: Logical caller (e.g. "router", "report", "embeddings")
+    """
+    if usage is None:
+        return
+
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    total_tokens = getattr(usage, "total_tokens", 0) or (prompt_tokens + completion_tokens)
+    cached_tokens = cached_prompt_tokens(usage)
+
+    kinds = (("prompt", prompt_tokens), ("cached_prompt", cached_tokens), ("completion", completion_tokens))
+    for kind, value in kinds:
+        if value:
+            llm_call_tokens.observe(value, call_site=call_site, kind=kind)
+            llm_tokens_total.inc(value, call_site=call_site, kind=kind)
+
+    ledger = _usage_ledger.get()
+    if ledger is not None:
+        ledger["prompt_tokens"] += prompt_tokens
+        ledger["cached_tokens"] += cached_tokens
+        ledger["completion_tokens"] += completion_tokens
+        ledger["total_tokens"] += total_tokens
+        ledger["llm_calls"] += 1
+
+
+class NodeSpan:
+    """
+    Monotonic timing span with a token ledger for one graph node.
+
+    Usage:
+        span = NodeSpan("router")
+        with span:
+            updates = await run_node(state)
+        updates = {**updates, **span.finish(intent)}
+    """
+
+    def __init__(self, node: str):
+        """
+        Initialize span.
+
+        Args:
+            node: Graph node name
+        """
+        self.node = node
+        self.usage = _empty_usage()
+        self.duration_ms = 0.0
+        self._start = 0.0
+        self._token = None
+
+    def __enter__(self) -> "NodeSpan":
+        self._start = time.perf_counter()
+        self._token = _usage_ledger.set(self.usage)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        _usage_ledger.reset(self._token)
+        return False
+
+    def finish(self, intent: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Export the span to histograms and build its state updates.
+
+        Args:
+            intent: Query intent used as histogram label
+
+        Returns:
+            Partial state with node_timings, token_usage and total_tokens_used
+        """
+        intent = intent or "unknown"
+        node_duration_seconds.observe(self.duration_ms / 1000, node=self.node, intent=intent)
+
+        # total_tokens_used is always set: it is summed across nodes, so a node
+        # that echoes the full state back must not re-add the running total
+        updates: Dict[str, Any] = {
+            "node_timings": {self.node: round(self.duration_ms, 1)},
+            "total_tokens_used": self.usage["total_tokens"]
+        }
+        if self.usage["llm_calls"]:
+            node_tokens.observe(self.usage["total_tokens"], node=self.node, intent=intent)
+            updates["token_usage"] = {self.node: dict(self.usage)}
+
+        logger.debug(
+            f"⏱️ {self.node}: {self.duration_ms:.1f} ms, "
+            f"{self.usage['total_tokens']} tokens in {self.usage['llm_calls']} LLM calls"
+        )
+        return updates
+
+
+def span_intent(state: Dict, updates: Optional[Dict] = None) -> Optional[str]:
+    """
+    Intent label for a node span.
+
+    Nodes that run before the router has finished (memory_loader) see the
+    placeholder intent of the initial state, so they are labelled "unknown".
+
+    Args:
+        state: State the node was invoked with
+        updates: Partial state returned by the node
+
+    Returns:
+        Intent or None if not decided yet
+    """
+    if updates and updates.get("intent"):
+        return updates["intent"]
+    if "router" in state.get("executed_agents", []):
+        return state.get("intent")
+    return None
+
+
+def timed_node(name: str):
+    """
+    Decorator wrapping a plain async graph node in a NodeSpan.
+
+    Args:
+        name: Graph node name
+
+    Returns:
+        Decorator
+    """
+    def decorator(func: Callable[[Dict], Awaitable[Dict]]):
+        @functools.wraps(func)
+        async def wrapper(state: Dict) -> Dict:
+            span = NodeSpan(name)
+            with span:
+                updates = await func(state)
+            return {**(updates or {}), **span.finish(span_intent(state, updates))}
+        return wrapper
+    return decorator
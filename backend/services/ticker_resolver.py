@@ -9,15 +9,15 @@ Intelligently resolves company names to stock ticker symbols using:
 import json
 import os
 import re
+import asyncio
 import logging
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 from pathlib import Path
 
 import yfinance as yf
-from openai import AsyncOpenAI
 
-from backend.config.settings import settings
+from backend.services.llm_gateway import llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -54,16 +54,25 @@ class TickerResolver:
         self.enable_llm = enable_llm
         self.llm_confidence_threshold = llm_confidence_threshold
 
-        # In-memory cache for fast lookup
-        self.cache: Dict[str, Any] = {}
+        # In-memory cache for fast lookup (loaded from disk on first access)
+        self._cache: Optional[Dict[str, Any]] = None
 
-        # OpenAI client for LLM resolution
-        self.llm_client = AsyncOpenAI(api_key=settings.openai_api_key) if enable_llm else None
+        # Shared LLM gateway for LLM resolution
+        self.llm = llm_gateway if enable_llm else None
 
-        # Load cache from disk
-        self._load_cache()
+        logger.info("✅ TickerResolver initialized")
 
-        logger.info(f"✅ TickerResolver initialized with {len(self.cache.get('companies', {}))} cached companies")
+    @property
+    def cache(self) -> Dict[str, Any]:
+        """Ticker cache, loaded from disk on first access."""
+        if self._cache is None:
+            self._load_cache()
+            logger.info(f"Ticker cache ready with {len(self._cache.get('companies', {}))} cached companies")
+        return self._cache
+
+    @cache.setter
+    def cache(self, value: Dict[str, Any]):
+        self._cache = value
 
     def _load_cache(self):
         """Load cache from disk into memory."""
@@ -160,8 +169,8 @@ class TickerResolver:
 
         # Check if already a valid ticker (uppercase, 1-5 chars)
         if re.match(r'^[A-Z]{1,5}$', company_name.strip()):
-            # Validate it's a real ticker
-            if self._validate_ticker_sync(company_name):
+            # Validate it's a real ticker (yfinance is synchronous, run in thread pool)
+            if await asyncio.to_thread(self._validate_ticker_sync, company_name):
                 return company_name.upper()
 
         # Normalize for cache lookup
@@ -234,9 +243,8 @@ class TickerResolver:
             Ticker or None
         """
         try:
-            # Try as ticker first
-            ticker_obj = yf.Ticker(company_name)
-            info = ticker_obj.info
+            # Try as ticker first (yfinance is synchronous, run in thread pool)
+            info = await asyncio.to_thread(lambda: yf.Ticker(company_name).info)
 
             # Check if valid
             if info and info.get("symbol"):
@@ -264,7 +272,7 @@ class TickerResolver:
         Returns:
             Ticker or None
         """
-        if not self.llm_client:
+        if not self.llm:
             return None
 
         prompt = f"""You are a financial ticker resolver. Identify the stock ticker symbol for this company.
@@ -284,8 +292,9 @@ or
 {{"ticker": null, "confidence": 0.0, "official_name": null}}"""
 
         try:
-            response = await self.llm_client.chat.completions.create(
-                model=settings.openai_model,
+            response = await self.llm.chat_completion(
+                "ticker_resolver",
+                model=self.llm.model_for("ticker_resolver"),
                 messages=[
                     {"role": "system", "content": "You are an expert financial analyst. Respond only with valid JSON."},
                     {"role": "user", "content": prompt}
@@ -314,7 +323,7 @@ or
 
             if ticker and confidence >= self.llm_confidence_threshold:
                 # Validate ticker with yfinance
-                if self._validate_ticker_sync(ticker):
+                if await asyncio.to_thread(self._validate_ticker_sync, ticker):
                     return ticker.upper()
 
             return None
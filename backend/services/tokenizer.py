@@ -0,0 +1,44 @@
+"""
+Shared tiktoken lookup.
+
+Loading a tokenizer is slow (and may download its BPE file on first use),
+so each encoding is loaded once per process, on first use, and shared by
+every caller that counts tokens.
+"""
+from functools import lru_cache
+
+import tiktoken
+
+
+@lru_cache(maxsize=None)
+def encoding_for(model: str) -> tiktoken.Encoding:
+    """
+    Get the tokenizer of a model.
+
+    Args:
+        model: OpenAI model name (unknown models use cl100k_base)
+
+    Returns:
+        tiktoken encoding
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Count tokens of text with a model's tokenizer.
+
+    Special-token strings in the text (e.g. "<|endoftext|>" in scraped news)
+    are counted as plain text.
+
+    Args:
+        text: Text to measure
+        model: OpenAI model name
+
+    Returns:
+        Token count
+    """
+    return len(encoding_for(model).encode_ordinary(text))
@@ -3,15 +3,23 @@ Yahoo Finance API integration for stock data.
 Uses yfinance library for free access to market data.
 """
 import yfinance as yf
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List
 from datetime import datetime, timedelta
 import logging
 import asyncio
 from functools import lru_cache
 import time
 
+from backend.services.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
+prefetch_total = metrics.counter(
+    "market_data_prefetch_total",
+    "Speculative market data prefetches by outcome",
+    label_names=("result",)
+)
+
 
 class YahooFinanceService:
     """Service for fetching stock data from Yahoo Finance with async support and caching."""
@@ -22,6 +30,27 @@ class YahooFinanceService:
         self._cache: Dict[str, tuple] = {}
         self._cache_ttl = 300  # 5 minutes TTL
 
+        # In-flight fetches, so concurrent callers share one yfinance request
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        # Speculative fetches not yet used by any caller: {cache_key: started_at}
+        self._speculative: Dict[str, float] = {}
+
+        # Metrics
+        self.stats = {
+            "inflight_joins": 0,
+            "prefetch_started": 0,
+            "prefetch_hits": 0,
+            "prefetch_wasted": 0,
+            "prefetch_cancelled": 0
+        }
+
+    @property
+    def prefetch_hit_ratio(self) -> float:
+        """Fraction of settled prefetches that were used by an agent."""
+        settled = self.stats["prefetch_hits"] + self.stats["prefetch_wasted"]
+        return self.stats["prefetch_hits"] / settled if settled else 0.0
+
     def _get_cache_key(self, method: str, ticker: str, **kwargs) -> str:
         """Generate cache key for method + ticker + params."""
         params_str = "_".join(f"{k}={v}" for k, v in sorted(kwargs.items()))
@@ -495,30 +524,72 @@ class YahooFinanceService:
 
     # ========== ASYNC METHODS (Performance Optimized) ==========
 
-    async def get_stock_info_async(self, ticker: str) -> Optional[Dict]:
+    def _start_fetch(self, cache_key: str, fetch: Callable, *args) -> asyncio.Task:
         """
-        Async version of get_stock_info with caching.
+        Run a sync fetch in the thread pool as a shared task that fills the cache.
 
         Args:
-            ticker: Stock ticker symbol
+            cache_key: Cache key the result is stored under
+            fetch: Sync fetch method
+            *args: Arguments for fetch
 
         Returns:
-            Dict with stock info or None if error
+            Task resolving to the fetched data
         """
-        cache_key = self._get_cache_key("stock_info", ticker)
+        async def run():
+            data = await asyncio.to_thread(fetch, *args)
+            self._set_cache(cache_key, data)
+            return data
 
-        # Check cache
+        task = asyncio.create_task(run())
+        self._inflight[cache_key] = task
+
+        def done(finished: asyncio.Task):
+            if self._inflight.get(cache_key) is finished:
+                del self._inflight[cache_key]
+
+        task.add_done_callback(done)
+        return task
+
+    async def _get_or_fetch(self, cache_key: str, fetch: Callable, *args) -> Optional[Dict]:
+        """
+        Return cached data, join an in-flight fetch, or start a new one.
+
+        Args:
+            cache_key: Cache key
+            fetch: Sync fetch method
+            *args: Arguments for fetch
+
+        Returns:
+            Fetched data
+        """
         cached = self._get_from_cache(cache_key)
         if cached:
+            self._record_prefetch_hit(cache_key)
             return cached
 
-        # Fetch data in thread pool (yfinance is synchronous)
-        data = await asyncio.to_thread(self.get_stock_info, ticker)
+        task = self._inflight.get(cache_key)
+        if task is not None:
+            self.stats["inflight_joins"] += 1
+            self._record_prefetch_hit(cache_key)
+        else:
+            task = self._start_fetch(cache_key, fetch, *args)
 
-        # Cache result
-        self._set_cache(cache_key, data)
+        # Shield: a cancelled caller must not cancel a fetch others may share
+        return await asyncio.shield(task)
 
-        return data
+    async def get_stock_info_async(self, ticker: str) -> Optional[Dict]:
+        """
+        Async version of get_stock_info with caching.
+
+        Args:
+            ticker: Stock ticker symbol
+
+        Returns:
+            Dict with stock info or None if error
+        """
+        cache_key = self._get_cache_key("stock_info", ticker)
+        return await self._get_or_fetch(cache_key, self.get_stock_info, ticker)
 
     async def get_analyst_recommendations_async(self, ticker: str) -> Optional[Dict]:
         """
@@ -531,19 +602,85 @@ class YahooFinanceService:
             Dict with analyst consensus data or None
         """
         cache_key = self._get_cache_key("analyst_recommendations", ticker)
+        return await self._get_or_fetch(cache_key, self.get_analyst_recommendations, ticker)
 
-        # Check cache
-        cached = self._get_from_cache(cache_key)
-        if cached:
-            return cached
+    # ========== SPECULATIVE PREFETCH ==========
 
-        # Fetch data in thread pool
-        data = await asyncio.to_thread(self.get_analyst_recommendations, ticker)
+    def prefetch(self, tickers: List[str]) -> List[str]:
+        """
+        Start background fetches of stock info and analyst data.
 
-        # Cache result
-        self._set_cache(cache_key, data)
+        Called as soon as tickers are resolved, before it is known whether
+        the market data agents will run. Agents that do run pick the
+        results up from the cache (or join the in-flight fetch).
 
-        return data
+        Args:
+            tickers: Resolved tickers
+
+        Returns:
+            Cache keys of the started prefetches (for cancel_prefetch)
+        """
+        self._expire_prefetches()
+
+        started = []
+        for ticker in tickers:
+            for method, fetch in (
+                ("stock_info", self.get_stock_info),
+                ("analyst_recommendations", self.get_analyst_recommendations)
+            ):
+                cache_key = self._get_cache_key(method, ticker)
+                if cache_key in self._inflight or self._get_from_cache(cache_key):
+                    continue
+
+                self._start_fetch(cache_key, fetch, ticker)
+                self._speculative[cache_key] = time.time()
+                started.append(cache_key)
+
+        if started:
+            self.stats["prefetch_started"] += len(started)
+            prefetch_total.inc(len(started), result="started")
+            logger.info(f"🚀 Prefetching market data for {tickers} ({len(started)} fetches)")
+        return started
+
+    def cancel_prefetch(self, cache_keys: List[str]):
+        """
+        Cancel prefetches that no agent is going to use.
+
+        The yfinance call already running in a worker thread finishes, but
+        its result is dropped instead of being awaited.
+
+        Args:
+            cache_keys: Keys returned by prefetch()
+        """
+        for cache_key in cache_keys:
+            # Already consumed by an agent
+            if self._speculative.pop(cache_key, None) is None:
+                continue
+
+            task = self._inflight.pop(cache_key, None)
+            if task is not None and not task.done():
+                task.cancel()
+                self.stats["prefetch_cancelled"] += 1
+                prefetch_total.inc(result="cancelled")
+
+            self.stats["prefetch_wasted"] += 1
+            prefetch_total.inc(result="wasted")
+
+    def _record_prefetch_hit(self, cache_key: str):
+        """Count a speculative fetch as used the first time a caller reads it."""
+        if self._speculative.pop(cache_key, None) is not None:
+            self.stats["prefetch_hits"] += 1
+            prefetch_total.inc(result="hit")
+
+    def _expire_prefetches(self):
+        """Count prefetches nobody read within the cache TTL as wasted."""
+        cutoff = time.time() - self._cache_ttl
+        expired = [key for key, started in self._speculative.items() if started < cutoff]
+        for cache_key in expired:
+            del self._speculative[cache_key]
+        if expired:
+            self.stats["prefetch_wasted"] += len(expired)
+            prefetch_total.inc(len(expired), result="wasted")
 
     async def get_historical_data_async(
         self,
@@ -2,6 +2,7 @@ import axios from 'axios';
 import type {
   ResearchQueryRequest,
   ResearchQueryResponse,
+  ResearchStreamEvent,
   SessionHistoryResponse,
   SessionsResponse,
 } from '../types';
@@ -21,6 +22,57 @@ export const researchApi = {
     return response.data;
   },
 
+  // Streams progress events; resolves with the final response from the `done` event
+  streamQuery: async (
+    data: ResearchQueryRequest,
+    onEvent: (event: ResearchStreamEvent) => void
+  ): Promise<ResearchQueryResponse> => {
+    const response = await fetch(`${API_BASE_URL}/research/query/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(data),
+    });
+
+    if (!response.ok || !response.body) {
+      throw new Error(`Streaming request failed: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result: ResearchQueryResponse | null = null;
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      // SSE frames are separated by a blank line
+      const frames = buffer.split('\n\n');
+      buffer = frames.pop() ?? '';
+
+      for (const frame of frames) {
+        const eventLine = frame.split('\n').find((line) => line.startsWith('event: '));
+        const dataLine = frame.split('\n').find((line) => line.startsWith('data: '));
+        if (!eventLine || !dataLine) continue;
+
+        const event = {
+          event: eventLine.slice('event: '.length),
+          data: JSON.parse(dataLine.slice('data: '.length)),
+        } as ResearchStreamEvent;
+        onEvent(event);
+
+        if (event.event === 'done') result = event.data;
+        if (event.event === 'error') throw new Error(event.data.detail);
+      }
+    }
+
+    if (!result) {
+      throw new Error('Stream ended without a result');
+    }
+    return result;
+  },
+
   requestDeepAnalysis: async (ticker: string): Promise<void> => {
     await apiClient.post(`/research/deep-analysis/${ticker}`);
   },
@@ -79,6 +79,22 @@ export interface ResearchQueryResponse {
   timestamp: string;
 }
 
+// Server-Sent Events from POST /research/query/stream
+export type ResearchStreamEvent =
+  | { event: 'start'; data: { session_id: string; query: string } }
+  | {
+      event: 'router';
+      data: {
+        intent: string;
+        tickers: string[];
+        routing_flags: { market_data: boolean; sentiment: boolean; context: boolean };
+      };
+    }
+  | { event: 'agent_complete'; data: { agent: string; data: Record<string, unknown> } }
+  | { event: 'report_token'; data: { token: string } }
+  | { event: 'done'; data: ResearchQueryResponse }
+  | { event: 'error'; data: { status_code: number; detail: string; session_id: string; request_id: string } };
+
 export interface Message {
   role: 'user' | 'assistant';
   content: string;